@@ -6,13 +6,22 @@ Created on Tue Jun 20 16:37:43 2017
 @author: damaderu
 """
 
+import os
+import sys
 import vtk
+
+# shared VTK helpers live in lab6/scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lab6', 'scripts'))
+import datacache
+import derived
+import glyphs
+import gridconvert
+import subsample
+
 #help(vtk.vtkRectilinearGridReader())
 
-rectGridReader = vtk.vtkRectilinearGridReader()
-rectGridReader.SetFileName("data/jet4_0.500.vtk")
-# do not forget to call "Update()" at the end of the reader
-rectGridReader.Update()
+# parsed once, then memory-mapped from the dataset cache (see datacache.py)
+rectGridReader = datacache.reader("data/jet4_0.500.vtk")
 
 
 rectGridOutline = vtk.vtkRectilinearGridOutlineFilter()
@@ -39,43 +48,28 @@ gridGeomActor.GetProperty().SetRepresentationToWireframe()
 gridGeomActor.GetProperty().SetColor(0, 0, 0) # changed the color to a red 
 gridGeomActor.GetProperty().SetOpacity(0.5);
 
-magnitudeCalcFilter = vtk.vtkArrayCalculator()
-magnitudeCalcFilter.SetInputConnection(rectGridReader.GetOutputPort())
-magnitudeCalcFilter.AddVectorArrayName('vectors')
-# Set up here the array that is going to be used for the computation ('vectors')
-magnitudeCalcFilter.SetResultArrayName('magnitude')
-magnitudeCalcFilter.SetFunction("mag(vectors)")
-# Set up here the function that calculates the magnitude of a vector
-magnitudeCalcFilter.Update()
+#magnitude of the vectors, computed with NumPy on the grid's own arrays and
+#attached to it as the 'magnitude' point array (see derived.py)
+fields = derived.DerivedFields(store=datacache.default_cache())
+fields.attach(rectGridReader.GetOutput(), 'magnitude')
 
 
-#Extract the data from the result of the vtkCalculator
-points = vtk.vtkPoints()
-grid = magnitudeCalcFilter.GetOutput()
-grid.GetPoints(points)
+grid = rectGridReader.GetOutput()
 scalars = grid.GetPointData().GetArray('magnitude')
 
-#Create an unstructured grid that will contain the points and scalars data
-ugrid = vtk.vtkUnstructuredGrid()
-ugrid.SetPoints(points)
+#Create an unstructured grid with the points and cells of the rectilinear grid,
+#the whole connectivity is built and handed over in one go (see gridconvert.py)
+ugrid = gridconvert.to_unstructured(grid)
 ugrid.GetPointData().SetScalars(scalars)
-
-#Populate the cells in the unstructured grid using the output of the vtkCalculator
-for i in range (0, grid.GetNumberOfCells()):
-    cell = grid.GetCell(i)
-    ugrid.InsertNextCell(cell.GetCellType(), cell.GetPointIds())
     
     
-#There are too many points, let's filter the points
-subset = vtk.vtkMaskPoints()
-subset.SetOnRatio(5)
-subset.RandomModeOn()
-subset.SetRandomModeType(1)
-subset.SetInputData(ugrid)
+#There are too many points, let's filter the points: a fifth of them, spread
+#evenly over the bounds and the same on every run (see subsample.py)
+subset = subsample.subset(ugrid, 'grid', ratio=5)
 
 #Make a vtkPolyData with a vertex on each point.
 pointsGlyph = vtk.vtkVertexGlyphFilter()
-pointsGlyph.SetInputConnection(subset.GetOutputPort())
+pointsGlyph.SetInputData(subset)
 #pointsGlyph.SetInputData(ugrid)
 pointsGlyph.Update()
 
@@ -106,36 +100,16 @@ isoActor = vtk.vtkActor()
 isoActor.SetMapper(isoMapper)
 isoActor.GetProperty().SetOpacity(0.5)
 
-subset = vtk.vtkMaskPoints()
-subset.SetOnRatio(10)
-subset.RandomModeOn()
-subset.SetInputConnection(rectGridReader.GetOutputPort())
-
-#vtk.vtkColorTransferFunction()
-#vtk.vtkLookupTable()
-lut = vtk.vtkLookupTable()
-lut.SetNumberOfColors(256)
-lut.SetHueRange(0.667, 0.0)
-lut.SetVectorModeToMagnitude()
-lut.Build()
-
-hh = vtk.vtkHedgeHog()
-hh.SetInputConnection(subset.GetOutputPort())
-hh.SetScaleFactor(0.001)
-
-hhm = vtk.vtkPolyDataMapper()
-hhm.SetInputConnection(hh.GetOutputPort())
-hhm.SetLookupTable(lut)
-hhm.SetScalarVisibility(True)
-hhm.SetScalarModeToUsePointFieldData()
-hhm.SelectColorArray('vectors')
-hhm.SetScalarRange((rectGridReader.GetOutput().GetPointData().GetVectors().GetRange(-1)))
-
-hha = vtk.vtkActor()
-hha.SetMapper(hhm)
+# instanced arrows (vtkGlyph3DMapper) on evenly spaced samples of the
+# vectors, coloured by magnitude through one lookup table; the density
+# follows the camera distance once attached to the renderer (see glyphs.py)
+lut = glyphs.magnitude_lut(fields.range(rectGridReader.GetOutput(), 'vectors'))
+arrows = glyphs.VectorGlyphs(rectGridReader.GetOutput(), 'vectors', lut=lut)
+hha = arrows.actor
 
 
 renderer = vtk.vtkRenderer()
+arrows.attach(renderer)
 renderer.AddActor(pointsActor)    
 renderer.AddActor(outlineActor)
 renderer.AddActor(isoActor)
@@ -6,22 +6,27 @@ Created on Tue Jun 20 16:52:32 2017
 @author: damaderu
 """
 
+import os
+import sys
 import vtk
 
-# Read the file (to test that it was written correctly)
-reader = vtk.vtkXMLImageDataReader()
-reader.SetFileName("../data/challenge_2.vti")
-reader.Update()
+# shared VTK helpers live in lab6/scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'lab6', 'scripts'))
+import contouring
+import datacache
 
-# Convert the image to a polydata
-imageDataGeometryFilter = vtk.vtkImageDataGeometryFilter()
-imageDataGeometryFilter.SetInputConnection(reader.GetOutputPort())
-imageDataGeometryFilter.Update()
+# Read the file (to test that it was written correctly)
+# parsed once, then memory-mapped from the dataset cache (see datacache.py)
+reader = datacache.reader("../data/challenge_2.vti")
 
+# Contour the image directly (flying edges, all isovalues in one threaded
+# pass) instead of converting it to polydata with vtkImageDataGeometryFilter
+contouring.use_threads()
 scalarRange = reader.GetOutput().GetPointData().GetScalars().GetRange(-1)
-contoursFilter = vtk.vtkContourFilter()
-contoursFilter.SetInputConnection(imageDataGeometryFilter.GetOutputPort())
-contoursFilter.GenerateValues(20, scalarRange)
+scalarComponents = reader.GetOutput().GetPointData().GetScalars().GetNumberOfComponents()
+contoursInput, contoursFilter = contouring.contour_filter(n=20, value_range=scalarRange,
+                                                          n_components=scalarComponents)
+contoursInput.SetInputConnection(reader.GetOutputPort())
 
 
 contoursMapper = vtk.vtkPolyDataMapper()
@@ -1,8 +1,17 @@
+import os
+import sys
 import vtk
 
-rectGridReader = vtk.vtkRectilinearGridReader()
-rectGridReader.SetFileName("../data/jet4_0.500.vtk")
-rectGridReader.Update()
+# shared VTK helpers live in lab6/scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'lab6', 'scripts'))
+import datacache
+import derived
+import glyphs
+import gridconvert
+import subsample
+
+# parsed once, then memory-mapped from the dataset cache (see datacache.py)
+rectGridReader = datacache.reader("../data/jet4_0.500.vtk")
 
 #------------ CHALLENGE ONE ----------------------
 rectGridOutline = vtk.vtkRectilinearGridOutlineFilter()
@@ -28,34 +37,25 @@ gridGeomActor.GetProperty().SetRepresentationToWireframe()
 gridGeomActor.GetProperty().SetColor(1, 0, 0)
 
 #------------ CHALLENGE TWO ----------------------
-magnitudeCalcFilter = vtk.vtkArrayCalculator()
-magnitudeCalcFilter.SetInputConnection(rectGridReader.GetOutputPort())
-magnitudeCalcFilter.AddVectorArrayName('vectors')
-magnitudeCalcFilter.SetResultArrayName('magnitude')
-magnitudeCalcFilter.SetFunction("mag(vectors)") 
-magnitudeCalcFilter.Update()
+#magnitude of the vectors, computed with NumPy on the grid's own arrays and
+#attached to it as the 'magnitude' point array (see derived.py)
+fields = derived.DerivedFields(store=datacache.default_cache())
+fields.attach(rectGridReader.GetOutput(), 'magnitude')
 
 #------------ CHALLENGE THREE ----------------------
-points = vtk.vtkPoints()
-grid = magnitudeCalcFilter.GetOutput()
-grid.GetPoints(points)
+grid = rectGridReader.GetOutput()
 scalars = grid.GetPointData().GetArray("magnitude")
 
-ugrid = vtk.vtkUnstructuredGrid()
-ugrid.SetPoints(points)
+# all cells are handed over in one go instead of one InsertNextCell per cell
+ugrid = gridconvert.to_unstructured(grid)
 ugrid.GetPointData().SetScalars(scalars)
 
-for i in range (0, grid.GetNumberOfCells()):
-    cell = grid.GetCell(i)
-    ugrid.InsertNextCell(cell.GetCellType(), cell.GetPointIds())
-
-subset = vtk.vtkMaskPoints()
-subset.SetOnRatio(50)
-subset.RandomModeOn()
-subset.SetInputData(ugrid)
+# a fiftieth of the points, spread evenly over the bounds and the same on
+# every run (see subsample.py); 'poisson' and 'importance' are the other modes
+subset = subsample.subset(ugrid, 'grid', ratio=50)
 
 pointsGlyph = vtk.vtkVertexGlyphFilter()
-pointsGlyph.SetInputConnection(subset.GetOutputPort())
+pointsGlyph.SetInputData(subset)
 #pointsGlyph.SetInputData(ugrid)
 pointsGlyph.Update()
 
@@ -89,36 +89,18 @@ isoActor.SetMapper(isoMapper)
 isoActor.GetProperty().SetOpacity(0.5)
 
 #------------ CHALLENGE FIVE ----------------------
-subset = vtk.vtkMaskPoints()
-subset.SetOnRatio(10)
-subset.RandomModeOn()
-subset.SetInputConnection(rectGridReader.GetOutputPort())
-
-lut = vtk.vtkLookupTable()
-lut.SetNumberOfColors(256)
-lut.SetHueRange(0.667, 0.0)
-lut.SetVectorModeToMagnitude()
-lut.Build()
-
-hh = vtk.vtkHedgeHog()
-hh.SetInputConnection(subset.GetOutputPort())
-hh.SetScaleFactor(0.001)
-
-hhm = vtk.vtkPolyDataMapper()
-hhm.SetInputConnection(hh.GetOutputPort())
-hhm.SetLookupTable(lut)
-hhm.SetScalarVisibility(True)
-hhm.SetScalarModeToUsePointFieldData()
-hhm.SelectColorArray('vectors')
-hhm.SetScalarRange((rectGridReader.GetOutput().GetPointData().GetVectors().GetRange(-1)))
-
-hha = vtk.vtkActor()
-hha.SetMapper(hhm)
+# instanced arrows (vtkGlyph3DMapper) on evenly spaced samples of the
+# vectors, coloured by magnitude through one lookup table; the density
+# follows the camera distance once attached to the renderer (see glyphs.py)
+lut = glyphs.magnitude_lut(fields.range(rectGridReader.GetOutput(), 'vectors'))
+arrows = glyphs.VectorGlyphs(rectGridReader.GetOutput(), 'vectors', lut=lut)
+hha = arrows.actor
 
 
 #------------ RENDERER, RENDER WINDOW, AND INTERACTOR ----------------------
 #Option 1: Default vtk render window
 renderer = vtk.vtkRenderer()
+arrows.attach(renderer)
 renderer.SetBackground(0.5, 0.5, 0.5)
 #renderer.AddActor(outlineActor)
 #renderer.AddActor(gridGeomActor)
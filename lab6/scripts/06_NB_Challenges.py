@@ -1,19 +1,20 @@
 import vtk
 
-# Read the file (to test that it was written correctly)
-reader = vtk.vtkXMLImageDataReader()
-reader.SetFileName("D:/Notebooks_Bogota2017/SS_2017/data/challenge_0.vti")
-reader.Update()
+import contouring
+import datacache
 
-# Convert the image to a polydata
-imageDataGeometryFilter = vtk.vtkImageDataGeometryFilter()
-imageDataGeometryFilter.SetInputConnection(reader.GetOutputPort())
-imageDataGeometryFilter.Update()
+# Read the file (to test that it was written correctly)
+# parsed once, then memory-mapped from the dataset cache (see datacache.py)
+reader = datacache.reader("D:/Notebooks_Bogota2017/SS_2017/data/challenge_0.vti")
 
+# Contour the image directly (flying edges, all isovalues in one threaded
+# pass) instead of converting it to polydata with vtkImageDataGeometryFilter
+contouring.use_threads()
 scalarRange = reader.GetOutput().GetPointData().GetScalars().GetRange(-1)
-contoursFilter = vtk.vtkContourFilter()
-contoursFilter.SetInputConnection(imageDataGeometryFilter.GetOutputPort())
-contoursFilter.GenerateValues(100, scalarRange)
+scalarComponents = reader.GetOutput().GetPointData().GetScalars().GetNumberOfComponents()
+contoursInput, contoursFilter = contouring.contour_filter(n=100, value_range=scalarRange,
+                                                          n_components=scalarComponents)
+contoursInput.SetInputConnection(reader.GetOutputPort())
 
 contoursMapper = vtk.vtkPolyDataMapper()
 contoursMapper.SetInputConnection(contoursFilter.GetOutputPort())
@@ -1,22 +1,27 @@
 import vtk
 
-# Read the file (to test that it was written correctly)
-reader = vtk.vtkXMLImageDataReader()
-reader.SetFileName("../data/challenge_0.vti")
-reader.Update()
+import contourcache
+import contouring
+import datacache
 
-# Convert the image to a polydata
-imageDataGeometryFilter = vtk.vtkImageDataGeometryFilter()
-imageDataGeometryFilter.SetInputConnection(reader.GetOutputPort())
-imageDataGeometryFilter.Update()
+# Read the file (to test that it was written correctly)
+# parsed once, then memory-mapped from the dataset cache (see datacache.py)
+reader = datacache.reader("../data/challenge_0.vti")
 
+# Contour the image directly (flying edges, all isovalues in one threaded
+# pass) instead of converting it to polydata with vtkImageDataGeometryFilter
+contouring.use_threads()
 scalarRange = reader.GetOutput().GetPointData().GetScalars().GetRange(-1)
-contoursFilter = vtk.vtkContourFilter()
-contoursFilter.SetInputConnection(imageDataGeometryFilter.GetOutputPort())
-contoursFilter.GenerateValues(100, scalarRange)
+
+# every isoline is cached on its own, so changing the level set (+/- keys
+# below) only computes the levels that have not been seen before; the keys
+# halve or double the step, which keeps the existing isovalues (128
+# intervals can be halved down to the two end points)
+cache = contourcache.ContourCache()
+nLevels = 129
 
 contoursMapper = vtk.vtkPolyDataMapper()
-contoursMapper.SetInputConnection(contoursFilter.GetOutputPort())
+contoursMapper.SetInputData(cache.contour(reader.GetOutput(), n=nLevels, value_range=scalarRange))
 
 contoursActor = vtk.vtkActor()
 contoursActor.SetMapper(contoursMapper)
@@ -36,4 +41,20 @@ renderWindow.AddRenderer(renderer)
 renderWindowInteractor = vtk.vtkRenderWindowInteractor()
  
 renderWindowInteractor.SetRenderWindow(renderWindow)
+
+# '+' / '-' double or halve the number of levels and re-render
+def changeLevels(obj, event):
+    global nLevels
+    key = obj.GetKeySym()
+    if key in ('plus', 'KP_Add'):
+        nLevels = contourcache.refine(nLevels)
+    elif key in ('minus', 'KP_Subtract'):
+        nLevels = contourcache.coarsen(nLevels)
+    else:
+        return
+    contoursMapper.SetInputData(cache.contour(reader.GetOutput(), n=nLevels, value_range=scalarRange))
+    print( '%d levels, %d cached, %d computed so far' % (nLevels, len(cache), cache.misses) )
+    renderWindow.Render()
+
+renderWindowInteractor.AddObserver('KeyPressEvent', changeLevels)
 renderWindowInteractor.Start()
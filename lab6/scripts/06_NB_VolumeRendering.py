@@ -1,39 +1,30 @@
+import sys
+
 import vtk
 
+import datacache
+import derived
+import framerender
+import resample
+import volumerender
+
+# --headless writes an orbit of PNG frames to frames/ instead of opening a window
+headless = '--headless' in sys.argv
+
 #------------READER ----------------------
-rectGridReader = vtk.vtkRectilinearGridReader()
-rectGridReader.SetFileName("../data/jet4_0.500.vtk")
-rectGridReader.Update()
+# parsed once, then memory-mapped from the dataset cache (see datacache.py)
+rectGridReader = datacache.reader("../data/jet4_0.500.vtk")
 #------------END READER ------------------
 
 #------------ FILTER: CALCULATE VECTOR MAGNITUDE ----------------------
-magnitudeCalcFilter = vtk.vtkArrayCalculator()
-magnitudeCalcFilter.SetInputConnection(rectGridReader.GetOutputPort())
-magnitudeCalcFilter.AddVectorArrayName('vectors')
-magnitudeCalcFilter.SetResultArrayName('magnitude')
-magnitudeCalcFilter.SetFunction("mag(vectors)") 
-magnitudeCalcFilter.Update()
+fields = derived.DerivedFields(store=datacache.default_cache())
+fields.attach(rectGridReader.GetOutput(), 'magnitude', active=True)
 #------------END CALCULATE VECTOR MAGNITUDE ----------------------
 
 #------------FILTER: RECTILINEAR GRID TO IMAGE DATA-----------
-bounds = magnitudeCalcFilter.GetOutput().GetBounds()
-dimensions = magnitudeCalcFilter.GetOutput().GetDimensions()
-origin = (bounds[0], bounds[2], bounds[4])
-spacing = ( (bounds[1]-bounds[0])/dimensions[0], 
-            (bounds[3]-bounds[2])/dimensions[1],
-            (bounds[5]-bounds[4])/dimensions[2])
-
-imageData = vtk.vtkImageData()
-imageData.SetOrigin(origin)
-imageData.SetDimensions(dimensions)
-imageData.SetSpacing(spacing)
-
-probeFilter = vtk.vtkProbeFilter()
-probeFilter.SetInputData(imageData)
-probeFilter.SetSourceData(magnitudeCalcFilter.GetOutput())
-probeFilter.Update()
-
-imageData2 = probeFilter.GetImageDataOutput()
+# exact resampling onto an image spanning the grid's bounds: per-axis binary
+# search plus trilinear interpolation, threaded over z slabs (see resample.py)
+imageData2 = resample.to_image(rectGridReader.GetOutput(), 'magnitude')
 #------------END RECTILINEAR GRID TO IMAGE DATA-----------
 
 ##------------FILTER, MAPPER, AND ACTOR: VOLUME RENDERING -------------------
@@ -61,7 +52,9 @@ volumeProperty.SetInterpolationTypeToLinear()
 # The mapper / ray cast function know how to render the data
 #volumeMapper = vtk.vtkProjectedTetrahedraMapper()
 #volumeMapper = vtk.vtkUnstructuredGridVolumeZSweepMapper()
-volumeMapper = vtk.vtkGPUVolumeRayCastMapper()
+# GPU ray caster on hardware OpenGL, multi-threaded CPU ray caster otherwise
+# (set VOLUME_BACKEND=gpu/cpu to choose, see volumerender.py)
+volumeMapper, backend = volumerender.volume_mapper()
 #volumeMapper = vtk.vtkUnstructuredGridVolumeRayCastMapper()
 volumeMapper.SetInputData(imageData2)
 
@@ -82,9 +75,15 @@ renderer.ResetCamera()
 renderWindow = vtk.vtkRenderWindow()
 renderWindow.AddRenderer(renderer)
 renderWindow.SetSize(500, 500)
+timer = volumerender.FrameTimer(renderWindow, backend)
+renderWindow.SetOffScreenRendering(headless)
 renderWindow.Render()
 
-iren = vtk.vtkRenderWindowInteractor()
-iren.SetRenderWindow(renderWindow)
-iren.Start()
+if headless:
+    fps = framerender.record(renderWindow, 'frames/volume_%04d.png', 72)
+    print( '72 frames, %.1f frames/s' % fps )
+else:
+    iren = vtk.vtkRenderWindowInteractor()
+    iren.SetRenderWindow(renderWindow)
+    iren.Start()
 #---------END RENDERER, RENDER WINDOW, AND INTERACTOR -------
\ No newline at end of file
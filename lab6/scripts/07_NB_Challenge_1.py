@@ -1,8 +1,11 @@
 import vtk
 
-reader = vtk.vtkRectilinearGridReader()
-reader.SetFileName("../data/jet4_0.500.vtk")
-reader.Update()
+import datacache
+import derived
+import streamlines
+
+# parsed once, then memory-mapped from the dataset cache (see datacache.py)
+reader = datacache.reader("../data/jet4_0.500.vtk")
 output = reader.GetOutput()
 
 xmi, xma, ymi, yma, zmi, zma = output.GetBounds()
@@ -46,19 +49,21 @@ outlineActor = vtk.vtkActor()
 outlineActor.SetMapper(outlineMapper)
 outlineActor.GetProperty().SetColor(1,1,1)
 
-# Compute streamlines
-streamline = vtk.vtkStreamTracer()
-streamline.SetSourceConnection(plane.GetOutputPort())
-streamline.SetInputConnection(reader.GetOutputPort())
-# Try different integration alternatives! See the documentation of vtkStreamTracer
-streamline.SetIntegrationDirectionToForward()
-streamline.SetMaximumPropagation(10)
-streamline.SetComputeVorticity(True)
+# Compute streamlines (vectorized over all seeds, see streamlines.py)
+plane.Update()
+# vorticity=... adds the 'Vorticity' and 'Normals' arrays of vtkStreamTracer
+fields = derived.DerivedFields(store=datacache.default_cache())
+tracer = streamlines.Tracer(output, 'vectors')
+# Try different integration alternatives! method='rk4' or 'rk45',
+# direction='forward', 'backward' or 'both'
+streamlinesData = tracer.trace(plane.GetOutput(), direction='forward',
+                               method='rk45', max_propagation=10,
+                               vorticity=fields.compute(output, 'vorticity'))
 
 # Pass the streamlines to the mapper
 streamlineMapper = vtk.vtkPolyDataMapper()
 streamlineMapper.SetLookupTable(lut)
-streamlineMapper.SetInputConnection(streamline.GetOutputPort())
+streamlineMapper.SetInputData(streamlinesData)
 streamlineMapper.SetScalarVisibility(True)
 streamlineMapper.SetScalarModeToUsePointFieldData()
 streamlineMapper.SelectColorArray('vectors')
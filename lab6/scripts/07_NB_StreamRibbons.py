@@ -1,8 +1,15 @@
 import vtk
 
-reader = vtk.vtkRectilinearGridReader()
-reader.SetFileName("../data/jet4_0.500.vtk")
-reader.Update()
+import datacache
+import derived
+import lic
+import streamlines
+
+# set to True to add a LIC texture of the z mid-plane (see lic.py)
+SHOW_LIC = False
+
+# parsed once, then memory-mapped from the dataset cache (see datacache.py)
+reader = datacache.reader("../data/jet4_0.500.vtk")
 output = reader.GetOutput()
 
 xmi, xma, ymi, yma, zmi, zma = output.GetBounds()
@@ -42,19 +49,25 @@ outlineActor = vtk.vtkActor()
 outlineActor.SetMapper(outlineMapper)
 outlineActor.GetProperty().SetColor(1,1,1)
 
-# Compute streamlines
-streamline = vtk.vtkStreamTracer()
-streamline.SetSourceConnection(plane.GetOutputPort())
-streamline.SetInputConnection(reader.GetOutputPort())
-streamline.SetIntegrationDirectionToForward()
-#streamline.SetIntegrationDirectionToBackward()
-#streamline.SetIntegrationDirectionToBoth()
-streamline.SetMaximumPropagation(10)
-streamline.SetComputeVorticity(True)
+# Compute streamlines: all seeds advance together, split across worker
+# threads (see streamlines.py), so much finer seed planes stay interactive
+plane.Update()
+# with the vorticity along the lines (sampled from derived.py's field) the
+# lines get vtkStreamTracer's vorticity normals, which twist the ribbons
+fields = derived.DerivedFields(store=datacache.default_cache())
+vorticity = fields.compute(output, 'vorticity')
+tracer = streamlines.Tracer(output, 'vectors')
+streamlinesData = tracer.trace(plane.GetOutput(), direction='forward',
+                               method='rk45', max_propagation=10,
+                               vorticity=vorticity)
+#streamlinesData = tracer.trace(plane.GetOutput(), direction='backward', max_propagation=10, vorticity=vorticity)
+#streamlinesData = tracer.trace(plane.GetOutput(), direction='both', max_propagation=10, vorticity=vorticity)
+print( '%(lines)d streamlines, %(points)d points: %(seeds_per_s).0f seeds/s on %(workers)d workers'
+       % tracer.stats )
 
 # Visualize stream as ribbons (= Stream ribbons); i.e. we need to pass the streamlines through the ribbon filter
 streamRibbons = vtk.vtkRibbonFilter()
-streamRibbons.SetInputConnection(streamline.GetOutputPort())
+streamRibbons.SetInputData(streamlinesData)
 streamRibbons.SetWidth(0.01)
 streamRibbons.Update()
 
@@ -70,7 +83,7 @@ streamRibbonsActor.SetMapper(streamRibbonsMapper)
 # Pass the streamlines to the mapper
 streamlineMapper = vtk.vtkPolyDataMapper()
 streamlineMapper.SetLookupTable(lut)
-streamlineMapper.SetInputConnection(streamline.GetOutputPort())
+streamlineMapper.SetInputData(streamlinesData)
 streamlineMapper.SetScalarVisibility(True)
 streamlineMapper.SetScalarModeToUsePointFieldData()
 streamlineMapper.SelectColorArray('vectors')
@@ -98,6 +111,12 @@ renderer.AddActor(streamRibbonsActor)
 renderer.AddActor(outlineActor)
 renderer.AddActor(gOutlineActor)
 
+# The whole flow in the z mid-plane at once: line integral convolution of
+# the in-plane velocity, as a textured plane (see lic.py)
+if SHOW_LIC:
+    licImage = lic.slice_lic(output, 'vectors', axis=2, position=0.5, size=256)
+    renderer.AddActor(lic.texture_actor(licImage))
+
 renderWindow = vtk.vtkRenderWindow()
 renderWindow.AddRenderer(renderer)
 renderWindow.SetSize(500, 500)
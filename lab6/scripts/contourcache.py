@@ -0,0 +1,165 @@
+"""
+Per-level contour cache
+
+Re-running GenerateValues(n, range) recomputes every level even when most of
+them were already computed for the previous level set. ContourCache keeps
+each isoline/isosurface as its own polydata, keyed by (dataset hash, array
+name, component, isovalue), and only runs flying edges (see contouring.py)
+for the values it has not seen. Entries are evicted least recently used
+first once their total size exceeds `max_bytes`.
+
+Note that changing the number of evenly spaced levels moves most of the
+values; only levels whose value is unchanged are reused. Going from n to
+2n-1 levels (halving the step, see refine()) keeps every level, and going
+back (coarsen()) keeps every other one, so step through level sets that way.
+"""
+
+import hashlib
+import weakref
+from collections import OrderedDict
+
+import vtk
+from vtk.util import numpy_support
+
+import contouring
+
+
+def generate_values(n, value_range):
+    """The isovalues vtkContourValues.GenerateValues(n, value_range) sets."""
+    lo, hi = value_range
+    if n == 1:
+        return [float(lo)]
+    step = (hi - lo) / float(n - 1)
+    return [lo + i*step for i in range(n)]
+
+
+def refine(n):
+    """Level count with half the step: every one of the n levels is kept."""
+    return 2*n - 1 if n > 1 else 2
+
+
+def coarsen(n):
+    """
+    Level count with twice the step, keeping every other level; n itself if
+    the levels cannot be halved (an even number of intervals is needed).
+    """
+    return (n + 1) // 2 if n > 2 and n % 2 == 1 else n
+
+
+def _value_key(value):
+    # values generated from the same range in different ways may differ in
+    # the last bits; 12 significant digits identify a level unambiguously
+    return float('%.12g' % value)
+
+
+class ContourCache(object):
+    """
+    max_bytes -- size limit of the cached polydata (vtk memory estimate)
+    """
+
+    def __init__(self, max_bytes=256*2**20):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._digests = {}
+        self._datasets = {}
+
+    def dataset_hash(self, dataset, array_name=None):
+        """Digest of the geometry and the contoured array of an image."""
+        scalars = self._array(dataset, array_name)
+        # one digest per dataset and array, dropped with the dataset
+        did = id(dataset)
+        if did not in self._datasets:
+            self._datasets[did] = weakref.ref(
+                dataset, lambda ref, did=did: self._forget(did))
+        memo = (did, scalars.GetName())
+        stamp = (dataset.GetMTime(), scalars.GetMTime())
+        if self._digests.get(memo, (None,))[0] != stamp:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(repr((dataset.GetDimensions(), dataset.GetOrigin(),
+                           dataset.GetSpacing(), scalars.GetName(),
+                           scalars.GetNumberOfComponents())).encode())
+            h.update(numpy_support.vtk_to_numpy(scalars).tobytes())
+            self._digests[memo] = (stamp, h.hexdigest())
+        return self._digests[memo][1]
+
+    def _forget(self, did):
+        self._datasets.pop(did, None)
+        for memo in [m for m in self._digests if m[0] == did]:
+            del self._digests[memo]
+
+    def _array(self, dataset, array_name):
+        if array_name is None:
+            return dataset.GetPointData().GetScalars()
+        return dataset.GetPointData().GetArray(array_name)
+
+    def levels(self, dataset, values=None, n=None, value_range=None,
+               array_name=None, component=0):
+        """One polydata per isovalue (in the order of the values)."""
+        if values is None:
+            values = generate_values(n, value_range)
+        digest = self.dataset_hash(dataset, array_name)
+        scalars = self._array(dataset, array_name)
+        keys = [(digest, scalars.GetName(), component, _value_key(v))
+                for v in values]
+
+        missing = [(k, v) for k, v in zip(keys, values)
+                   if k not in self._entries]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            self._compute(dataset, scalars, component, missing)
+
+        result = []
+        for key in keys:
+            self._entries.move_to_end(key)
+            result.append(self._entries[key][0])
+        self._evict()
+        return result
+
+    def contour(self, dataset, values=None, n=None, value_range=None,
+                array_name=None, component=0):
+        """All requested levels appended into one polydata."""
+        append = vtk.vtkAppendPolyData()
+        for level in self.levels(dataset, values, n, value_range,
+                                 array_name, component):
+            append.AddInputData(level)
+        append.Update()
+        return append.GetOutput()
+
+    def _compute(self, dataset, scalars, component, missing):
+        # contour a shallow copy so that the requested array can be made the
+        # active scalars without touching the caller's dataset
+        image = dataset.NewInstance()
+        image.ShallowCopy(dataset)
+        image.GetPointData().SetScalars(scalars)
+
+        first, last = contouring.contour_filter(
+            values=[0.0], component=component,
+            n_components=scalars.GetNumberOfComponents(),
+            three_d=1 not in image.GetDimensions())
+        first.SetInputData(image)
+        for key, value in missing:
+            last.SetValue(0, value)
+            last.Update()
+            level = vtk.vtkPolyData()
+            level.DeepCopy(last.GetOutput())
+            size = level.GetActualMemorySize() * 1024
+            self._entries[key] = (level, size)
+            self.nbytes += size
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            key, (level, size) = self._entries.popitem(last=False)
+            self.nbytes -= size
+
+    def clear(self):
+        self._entries.clear()
+        self._digests.clear()
+        self._datasets.clear()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,354 @@
+"""
+Content-addressed on-disk cache of parsed datasets and derived arrays
+
+Every launch re-parses jet4_0.500.vtk (legacy VTK) and the challenge .vti
+files, and re-derives the same fields. DatasetCache parses a file once and
+stores the geometry and every point/cell array as a plain .npy file; later
+loads memory-map those files (copy-on-write) and hand them to VTK without
+copying, so opening the dataset costs little more than a few mmap calls.
+
+Entries are keyed by a hash of the file contents, so the copies of the same
+data file in lab3-lab7 share one entry. Hashing is only redone when the
+size or modification time of a path changes (index.json remembers the
+digest per path). Derived arrays (see derived.py) are stored in the entry
+of the file they were computed from.
+
+    rectGridReader = datacache.reader('../data/jet4_0.500.vtk')
+    grid = rectGridReader.GetOutput()
+
+The cache lives in $SCICOMPVIZ_CACHE, or ~/.cache/scicompviz.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+
+FORMAT = 1
+
+# field data array holding the digest of the file a dataset was loaded from
+DIGEST_ARRAY = 'cache_digest'
+
+# field data array with the point and cell counts and the bounds of the
+# loaded dataset: filters pass field data on to their outputs, so the digest
+# alone does not say the dataset is (a copy of) the one that was loaded
+SIGNATURE_ARRAY = 'cache_signature'
+
+_READERS = {
+    '.vti': vtk.vtkXMLImageDataReader,
+    '.vtr': vtk.vtkXMLRectilinearGridReader,
+    '.vtk': vtk.vtkDataSetReader,
+}
+
+
+def default_root():
+    return os.environ.get('SCICOMPVIZ_CACHE') or os.path.join(
+        os.path.expanduser('~'), '.cache', 'scicompviz')
+
+
+def file_digest(filename, chunk=1 << 24):
+    """Hex digest of the contents of a file."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(chunk), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def parse(filename):
+    """Read a dataset with the VTK reader matching its extension."""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in _READERS:
+        raise ValueError('no reader for %r files' % ext)
+    reader = _READERS[ext]()
+    reader.SetFileName(filename)
+    reader.Update()
+    output = reader.GetOutput()
+    if output is None or output.GetNumberOfPoints() == 0:
+        raise IOError('could not read %s' % filename)
+    return output
+
+
+def signature(dataset):
+    """Point count, cell count and bounds of a dataset."""
+    return np.array([dataset.GetNumberOfPoints(), dataset.GetNumberOfCells()]
+                    + list(dataset.GetBounds()), dtype=np.float64)
+
+
+def source_digest(dataset):
+    """
+    Digest of the cached file a dataset came from, or None.
+
+    None as well for the output of a filter that passed the field data of a
+    cached dataset on but has other points or cells (an extracted block, a
+    clipped or transformed copy, ...).
+    """
+    array = dataset.GetFieldData().GetAbstractArray(DIGEST_ARRAY)
+    if array is None:
+        return None
+    stored = dataset.GetFieldData().GetArray(SIGNATURE_ARRAY)
+    if stored is None or not np.array_equal(numpy_support.vtk_to_numpy(stored),
+                                            signature(dataset)):
+        return None
+    return array.GetValue(0)
+
+
+def _atomic_save(path, values):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        np.save(f, np.ascontiguousarray(values))
+    os.replace(tmp, path)
+
+
+class DatasetCache(object):
+    """
+    root -- cache directory (default: $SCICOMPVIZ_CACHE or ~/.cache/scicompviz)
+    """
+
+    def __init__(self, root=None):
+        self.root = root or default_root()
+        os.makedirs(self.root, exist_ok=True)
+        self._index_path = os.path.join(self.root, 'index.json')
+        try:
+            with open(self._index_path) as f:
+                self._index = json.load(f)
+        except (IOError, ValueError):
+            self._index = {}
+
+    def digest(self, filename):
+        """Content digest of a file, rehashed only when size or mtime change."""
+        path = os.path.abspath(filename)
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        known = self._index.get(path)
+        if known and known[0] == stamp:
+            return known[1]
+        digest = file_digest(path)
+        self._index[path] = [stamp, digest]
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self._index_path)
+        return digest
+
+    def entry(self, digest):
+        return os.path.join(self.root, digest)
+
+    def load(self, filename):
+        """The dataset in `filename`, from the cache when it has been seen."""
+        digest = self.digest(filename)
+        entry = self.entry(digest)
+        if not os.path.exists(os.path.join(entry, 'meta.json')):
+            dataset = parse(filename)
+            if not self._store(dataset, entry):
+                # unsupported dataset type or array: use it as parsed
+                return dataset
+        dataset = self._open(entry)
+        tag = vtk.vtkStringArray()
+        tag.SetName(DIGEST_ARRAY)
+        tag.InsertNextValue(digest)
+        dataset.GetFieldData().AddArray(tag)
+        shape = numpy_support.numpy_to_vtk(signature(dataset), deep=True)
+        shape.SetName(SIGNATURE_ARRAY)
+        dataset.GetFieldData().AddArray(shape)
+        return dataset
+
+    def reader(self, filename):
+        """A CachedReader for `filename`, already updated."""
+        reader = CachedReader(self)
+        reader.SetFileName(filename)
+        reader.Update()
+        return reader
+
+    def array(self, digest, name, compute):
+        """Derived array `name` of a cached file, computed once by compute()."""
+        directory = os.path.join(self.entry(digest), 'derived')
+        path = os.path.join(directory, name + '.npy')
+        if os.path.exists(path):
+            return np.load(path, mmap_mode='c')
+        values = compute()
+        os.makedirs(directory, exist_ok=True)
+        _atomic_save(path, values)
+        return values
+
+    def arrays(self, digest, name, compute):
+        """
+        Named group of arrays (a dict) derived from a cached file, computed
+        once by compute() and memory-mapped afterwards.
+        """
+        directory = os.path.join(self.entry(digest), 'derived', name)
+        listing = os.path.join(directory, 'arrays.json')
+        if os.path.exists(listing):
+            with open(listing) as f:
+                names = json.load(f)
+            return dict((key, np.load(os.path.join(directory, key + '.npy'),
+                                      mmap_mode='c')) for key in names)
+        values = compute()
+        os.makedirs(os.path.dirname(directory), exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=os.path.dirname(directory), suffix='.tmp')
+        try:
+            for key, array in values.items():
+                np.save(os.path.join(tmp, key + '.npy'), np.ascontiguousarray(array))
+            with open(os.path.join(tmp, 'arrays.json'), 'w') as f:
+                json.dump(sorted(values), f)
+            try:
+                os.rename(tmp, directory)
+            except OSError:
+                # stored concurrently by another process
+                pass
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return values
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
+        self._index = {}
+
+    def _store(self, dataset, entry):
+        if isinstance(dataset, vtk.vtkRectilinearGrid):
+            kind = 'rectilinear'
+        elif isinstance(dataset, vtk.vtkImageData):
+            kind = 'image'
+        else:
+            return False
+        meta = {'format': FORMAT, 'type': kind,
+                'dimensions': list(dataset.GetDimensions()), 'arrays': []}
+
+        os.makedirs(self.root, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=self.root, suffix='.tmp')
+        try:
+            if kind == 'image':
+                meta['origin'] = list(dataset.GetOrigin())
+                meta['spacing'] = list(dataset.GetSpacing())
+            else:
+                for axis, coords in zip('xyz', (dataset.GetXCoordinates(),
+                                                dataset.GetYCoordinates(),
+                                                dataset.GetZCoordinates())):
+                    np.save(os.path.join(tmp, axis + '.npy'),
+                            numpy_support.vtk_to_numpy(coords))
+
+            for association, data in (('point', dataset.GetPointData()),
+                                      ('cell', dataset.GetCellData())):
+                active = {'scalars': data.GetScalars(),
+                          'vectors': data.GetVectors()}
+                for i in range(data.GetNumberOfArrays()):
+                    array = data.GetArray(i)
+                    if array is None or not array.GetName():
+                        return False
+                    filename = '%s_%d.npy' % (association, i)
+                    np.save(os.path.join(tmp, filename),
+                            numpy_support.vtk_to_numpy(array))
+                    meta['arrays'].append({
+                        'name': array.GetName(),
+                        'association': association,
+                        'file': filename,
+                        'components': array.GetNumberOfComponents(),
+                        'active': [k for k, a in active.items()
+                                   if a is not None and a.GetName() == array.GetName()],
+                    })
+
+            with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+                json.dump(meta, f, indent=1)
+            try:
+                os.rename(tmp, entry)
+            except OSError:
+                # stored concurrently by another process
+                pass
+            return True
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _open(self, entry):
+        with open(os.path.join(entry, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta['format'] != FORMAT:
+            raise ValueError('cache entry %s has format %r' % (entry, meta['format']))
+
+        def mapped(filename):
+            return np.load(os.path.join(entry, filename), mmap_mode='c')
+
+        if meta['type'] == 'image':
+            dataset = vtk.vtkImageData()
+            dataset.SetOrigin(meta['origin'])
+            dataset.SetSpacing(meta['spacing'])
+            dataset.SetDimensions(meta['dimensions'])
+        else:
+            dataset = vtk.vtkRectilinearGrid()
+            dataset.SetDimensions(meta['dimensions'])
+            dataset.SetXCoordinates(numpy_support.numpy_to_vtk(mapped('x.npy')))
+            dataset.SetYCoordinates(numpy_support.numpy_to_vtk(mapped('y.npy')))
+            dataset.SetZCoordinates(numpy_support.numpy_to_vtk(mapped('z.npy')))
+
+        for info in meta['arrays']:
+            values = mapped(info['file'])
+            if values.ndim == 2 and info['components'] == 1:
+                values = values[:, 0]
+            array = numpy_support.numpy_to_vtk(values)
+            array.SetName(info['name'])
+            data = (dataset.GetPointData() if info['association'] == 'point'
+                    else dataset.GetCellData())
+            data.AddArray(array)
+            if 'scalars' in info['active']:
+                data.SetActiveScalars(info['name'])
+            if 'vectors' in info['active']:
+                data.SetActiveVectors(info['name'])
+        return dataset
+
+
+class CachedReader(object):
+    """
+    Stand-in for a VTK reader (SetFileName/Update/GetOutput/GetOutputPort)
+    that loads through a DatasetCache.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache or default_cache()
+        self.filename = None
+        self._producer = vtk.vtkTrivialProducer()
+        self._output = None
+
+    def SetFileName(self, filename):
+        if filename != self.filename:
+            self.filename = filename
+            self._output = None
+
+    def GetFileName(self):
+        return self.filename
+
+    def Update(self):
+        if self._output is None:
+            self._output = self.cache.load(self.filename)
+            self._producer.SetOutput(self._output)
+        self._producer.Update()
+
+    def GetOutput(self):
+        return self._output
+
+    def GetOutputPort(self):
+        return self._producer.GetOutputPort()
+
+
+_default = None
+
+
+def default_cache():
+    """The process-wide cache in the default directory."""
+    global _default
+    if _default is None:
+        _default = DatasetCache()
+    return _default
+
+
+def load(filename):
+    return default_cache().load(filename)
+
+
+def reader(filename):
+    return default_cache().reader(filename)
@@ -0,0 +1,177 @@
+"""
+Derived fields of a vector field on a vtkRectilinearGrid (or vtkImageData)
+
+vtkArrayCalculator parses and interprets "mag(vectors)" point by point, and
+the scripts then go back to the reader output for the range. Here the
+vector array is viewed as a (nz, ny, nx, 3) NumPy array without copying,
+derived fields are computed with vectorized NumPy (central differences on
+the grid's own, possibly non-uniform, axis coordinates) and attached back to
+the dataset as VTK arrays that share the NumPy memory.
+
+Results are cached per dataset and vector array (keyed on their MTime, and
+dropped with the dataset), and
+vorticity, divergence and Q-criterion share a single velocity gradient. For
+datasets loaded through datacache.py the fields can also be kept on disk.
+
+    fields = DerivedFields()
+    fields.attach(grid, 'magnitude')      # adds a 'magnitude' point array
+    fields.range(grid, 'magnitude')       # (min, max) without a VTK pass
+"""
+
+import weakref
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+import datacache
+import gridconvert
+
+
+FIELDS = ('magnitude', 'vorticity', 'vorticity_magnitude', 'divergence',
+          'q_criterion')
+
+
+def vector_view(grid, name='vectors'):
+    """Zero-copy (nz, ny, nx, 3) view of a point vector array."""
+    array = grid.GetPointData().GetArray(name)
+    if array is None:
+        raise KeyError('no point array %r' % name)
+    nx, ny, nz = grid.GetDimensions()
+    return numpy_support.vtk_to_numpy(array).reshape(nz, ny, nx, -1)
+
+
+def gradient(v, coords):
+    """
+    Velocity gradient J[..., i, j] = d v_i / d x_j on a rectilinear grid.
+
+    v is (nz, ny, nx, 3), coords the (x, y, z) axis coordinates. Axes with a
+    single point have a zero derivative.
+    """
+    x, y, z = coords
+    J = np.zeros(v.shape[:3] + (3, 3))
+    # array axis of each spatial direction: x -> 2, y -> 1, z -> 0
+    for j, (axis, c) in enumerate(((2, x), (1, y), (0, z))):
+        if len(c) < 2:
+            continue
+        for i in range(3):
+            J[..., i, j] = np.gradient(v[..., i], c, axis=axis)
+    return J
+
+
+class DerivedFields(object):
+    """
+    Cache of derived fields, one entry per (dataset, vectors, field).
+
+    store -- a datacache.DatasetCache; fields of datasets loaded through it
+             are also kept on disk and memory-mapped on later runs
+    """
+
+    def __init__(self, vectors='vectors', store=None):
+        self.vectors = vectors
+        self.store = store
+        self._cache = {}
+        self._grids = {}
+
+    def _key(self, grid):
+        # entries of a grid are dropped when it is garbage collected, so a
+        # later grid that reuses its id() cannot see them
+        gid = id(grid)
+        if gid not in self._grids:
+            self._grids[gid] = weakref.ref(grid, lambda ref, gid=gid: self._forget(gid))
+        array = grid.GetPointData().GetArray(self.vectors)
+        return (gid, array.GetMTime(), self.vectors)
+
+    def _forget(self, gid):
+        self._grids.pop(gid, None)
+        for key in [k for k in self._cache if k[0] == gid]:
+            del self._cache[key]
+
+    def _cached(self, grid, name, compute):
+        key = self._key(grid) + (name,)
+        if key not in self._cache:
+            digest = None
+            if self.store is not None and name in FIELDS:
+                digest = datacache.source_digest(grid)
+            values = None
+            if digest is not None:
+                nx, ny, nz = grid.GetDimensions()
+                values = self.store.array(
+                    digest, '%s_%s_%dx%dx%d' % (self.vectors, name, nx, ny, nz), compute)
+                if values.shape[:3] != (nz, ny, nx):
+                    # stored for another dataset: do not trust it
+                    values = None
+            self._cache[key] = compute() if values is None else values
+        return self._cache[key]
+
+    def gradient(self, grid):
+        return self._cached(grid, 'gradient', lambda: gradient(
+            vector_view(grid, self.vectors), gridconvert.axis_coordinates(grid)))
+
+    def compute(self, grid, name):
+        """The field as a NumPy array, (nz, ny, nx) or (nz, ny, nx, 3)."""
+        if name == 'magnitude':
+            def magnitude():
+                v = vector_view(grid, self.vectors)
+                return np.sqrt(np.einsum('...i,...i->...', v, v))
+            return self._cached(grid, name, magnitude)
+
+        if name == 'vorticity':
+            def vorticity():
+                J = self.gradient(grid)
+                w = np.empty(J.shape[:3] + (3,))
+                np.subtract(J[..., 2, 1], J[..., 1, 2], out=w[..., 0])
+                np.subtract(J[..., 0, 2], J[..., 2, 0], out=w[..., 1])
+                np.subtract(J[..., 1, 0], J[..., 0, 1], out=w[..., 2])
+                return w
+            return self._cached(grid, name, vorticity)
+
+        if name == 'vorticity_magnitude':
+            def vorticity_magnitude():
+                w = self.compute(grid, 'vorticity')
+                return np.sqrt(np.einsum('...i,...i->...', w, w))
+            return self._cached(grid, name, vorticity_magnitude)
+
+        if name == 'divergence':
+            return self._cached(grid, name, lambda: np.trace(
+                self.gradient(grid), axis1=-2, axis2=-1).copy())
+
+        if name == 'q_criterion':
+            def q_criterion():
+                # Q = (|Omega|^2 - |S|^2)/2 = -(J:J^T)/2 for the
+                # antisymmetric/symmetric split of the gradient J
+                J = self.gradient(grid)
+                return -0.5 * np.einsum('...ij,...ji->...', J, J)
+            return self._cached(grid, name, q_criterion)
+
+        raise ValueError('unknown field %r (one of %s)' % (name, ', '.join(FIELDS)))
+
+    def attach(self, grid, name, active=False):
+        """Add the field to the grid's point data (sharing memory); returns grid."""
+        values = self.compute(grid, name)
+        flat = values.reshape(grid.GetNumberOfPoints(), -1)
+        if flat.shape[1] == 1:
+            flat = flat[:, 0]
+        array = numpy_support.numpy_to_vtk(flat, deep=False)
+        array.SetName(name)
+        pointData = grid.GetPointData()
+        pointData.AddArray(array)
+        if active:
+            if flat.ndim == 1:
+                pointData.SetActiveScalars(name)
+            else:
+                pointData.SetActiveVectors(name)
+        return grid
+
+    def range(self, grid, name):
+        """(min, max) of a scalar field, or of the magnitude of a vector one."""
+        if name == self.vectors:
+            name = 'magnitude'
+        elif name == 'vorticity':
+            name = 'vorticity_magnitude'
+        values = self.compute(grid, name)
+        return (float(values.min()), float(values.max()))
+
+    def clear(self):
+        self._cache.clear()
+        self._grids.clear()
@@ -0,0 +1,237 @@
+"""
+Off-screen rendering of PNG frame sequences
+
+The scripts end in vtkRenderWindowInteractor().Start(), and writing an image
+means wiring vtkWindowToImageFilter (or vtkRenderLargeImage) and vtkPNGWriter
+by hand for a single file. For movies on a server:
+
+    FrameWriter -- one window-to-image filter and one PNG writer attached to
+                   an existing render window, reused for every frame
+    Orbit       -- a camera path turning around the focal point
+    render      -- builds a pipeline in one or more worker processes, each
+                   with its own off-screen window, and writes the frames of
+                   a list of time steps along a camera path
+
+A pipeline is a module level function setup(renderer) that adds its actors
+to the renderer and returns update(step) (or None for a static scene); it
+has to be importable by name for the worker processes.
+
+    python framerender.py demo --frames 120 --workers 4 --out frames
+    python framerender.py mymodule:setup --frames 360 --fps 30
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+
+class FrameWriter(object):
+    """
+    Writes the contents of a render window to numbered PNG files.
+
+    pattern -- file name with a %d-style field for the frame number
+    """
+
+    def __init__(self, renderWindow, pattern='frame_%04d.png'):
+        self.renderWindow = renderWindow
+        self.pattern = pattern
+        self.toImage = vtk.vtkWindowToImageFilter()
+        self.toImage.SetInput(renderWindow)
+        self.toImage.ReadFrontBufferOff()
+        self.toImage.ShouldRerenderOff()
+        self.writer = vtk.vtkPNGWriter()
+        self.writer.SetInputConnection(self.toImage.GetOutputPort())
+
+    def write(self, index):
+        """Render the window and write it as frame `index`; returns the file."""
+        self.renderWindow.Render()
+        self.toImage.Modified()
+        filename = self.pattern % index
+        self.writer.SetFileName(filename)
+        self.writer.Write()
+        return filename
+
+
+class Orbit(object):
+    """
+    Camera path turning `degrees` around the focal point over the sequence.
+
+    Called as path(camera, base, i, n): the camera is set from the start
+    camera `base`, so any frame can be produced independently of the others
+    (and the path can be sent to worker processes).
+    """
+
+    def __init__(self, degrees=360.0, elevation=0.0):
+        self.degrees = degrees
+        self.elevation = elevation
+
+    def __call__(self, camera, base, i, n):
+        camera.DeepCopy(base)
+        camera.Azimuth(self.degrees * i / float(n))
+        if self.elevation:
+            camera.Elevation(self.elevation * np.sin(2*np.pi * i / float(n)))
+            camera.OrthogonalizeViewUp()
+
+
+def record(renderWindow, pattern, frames, camera_path=None, renderer=None):
+    """
+    Write `frames` frames of an existing window along a camera path.
+
+    For scripts that already built their window (make it off-screen before
+    its first Render); returns the frames per second.
+    """
+    if camera_path is None:
+        camera_path = Orbit()
+    if renderer is None:
+        renderer = renderWindow.GetRenderers().GetFirstRenderer()
+    directory = os.path.dirname(pattern)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    base = vtk.vtkCamera()
+    base.DeepCopy(renderer.GetActiveCamera())
+    writer = FrameWriter(renderWindow, pattern)
+    start = time.perf_counter()
+    for i in range(frames):
+        camera_path(renderer.GetActiveCamera(), base, i, frames)
+        renderer.ResetCameraClippingRange()
+        writer.write(i)
+    return frames / (time.perf_counter() - start)
+
+
+def load_setup(spec):
+    """The setup function named by 'module:function' (or 'demo')."""
+    if spec == 'demo':
+        return demo
+    module, _, name = spec.partition(':')
+    return getattr(importlib.import_module(module), name or 'setup')
+
+
+def _render_range(args):
+    # one worker: one window, one writer, frames [first, last)
+    (setup, steps, first, last, pattern, size, camera_path, background) = args
+    if isinstance(setup, str):
+        setup = load_setup(setup)
+    renderer = vtk.vtkRenderer()
+    renderer.SetBackground(background)
+    renderWindow = vtk.vtkRenderWindow()
+    renderWindow.SetOffScreenRendering(1)
+    renderWindow.SetSize(size)
+    renderWindow.AddRenderer(renderer)
+    update = setup(renderer)
+    if update is not None:
+        # every worker frames the scene of the first step, so the camera
+        # does not depend on how the frames are split between workers
+        update(steps[0])
+    renderer.ResetCamera()
+    base = vtk.vtkCamera()
+    base.DeepCopy(renderer.GetActiveCamera())
+
+    writer = FrameWriter(renderWindow, pattern)
+    renderWindow.Render()       # context creation is not part of the timing
+    start = time.perf_counter()
+    for i in range(first, last):
+        if update is not None:
+            update(steps[i])
+        if camera_path is not None:
+            camera_path(renderer.GetActiveCamera(), base, i, len(steps))
+            renderer.ResetCameraClippingRange()
+        writer.write(i)
+    elapsed = time.perf_counter() - start
+    renderWindow.Finalize()
+    return last - first, elapsed
+
+
+def render(setup, steps, pattern='frame_%04d.png', size=(640, 480),
+           camera_path=None, workers=1, background=(0.5, 0.5, 0.5)):
+    """
+    Write one frame per time step and return the frames per second.
+
+    setup       -- pipeline function, or its 'module:function' name
+    steps       -- the time steps, or a number of frames (steps 0..n-1)
+    camera_path -- e.g. Orbit(); None keeps the camera fixed
+    workers     -- processes, each rendering a contiguous block of frames
+    """
+    if isinstance(steps, int):
+        steps = list(range(steps))
+    steps = list(steps)
+    directory = os.path.dirname(pattern)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    workers = max(1, min(workers, len(steps)))
+    edges = np.linspace(0, len(steps), workers + 1).astype(int)
+    jobs = [(setup, steps, first, last, pattern, tuple(size), camera_path,
+             tuple(background)) for first, last in zip(edges[:-1], edges[1:])]
+
+    start = time.perf_counter()
+    if workers == 1:
+        list(map(_render_range, jobs))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            list(pool.map(_render_range, jobs))
+    elapsed = time.perf_counter() - start
+    return len(steps) / elapsed
+
+
+def demo(renderer):
+    """A travelling wave on a warped plane, colored by height."""
+    n = 128
+    plane = vtk.vtkPlaneSource()
+    plane.SetResolution(n - 1, n - 1)
+    plane.Update()
+    surface = vtk.vtkPolyData()
+    surface.DeepCopy(plane.GetOutput())
+
+    points = numpy_support.vtk_to_numpy(surface.GetPoints().GetData())
+    r = np.hypot(points[:, 0], points[:, 1])
+    height = numpy_support.numpy_to_vtk(np.zeros(len(points)), deep=True)
+    height.SetName('height')
+    surface.GetPointData().SetScalars(height)
+    heights = numpy_support.vtk_to_numpy(height)
+
+    mapper = vtk.vtkPolyDataMapper()
+    mapper.SetInputData(surface)
+    mapper.SetScalarRange(-0.1, 0.1)
+    actor = vtk.vtkActor()
+    actor.SetMapper(mapper)
+    actor.RotateX(-60)
+    renderer.AddActor(actor)
+
+    def update(step):
+        heights[:] = 0.1 * np.cos(20*r - 0.2*step) * np.exp(-3*r)
+        points[:, 2] = heights
+        surface.GetPoints().Modified()
+        height.Modified()
+    return update
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Off-screen PNG frame rendering')
+    parser.add_argument('setup', nargs='?', default='demo',
+                        help="pipeline as module:function, or 'demo'")
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--out', default='frames')
+    parser.add_argument('--size', default='640x480', help='WIDTHxHEIGHT')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--orbit', type=float, default=360.0,
+                        help='degrees turned over the sequence (0 for a fixed camera)')
+    parser.add_argument('--fps', type=float, default=None,
+                        help='frames per second to meet')
+    args = parser.parse_args()
+
+    size = tuple(int(s) for s in args.size.split('x'))
+    path = Orbit(args.orbit) if args.orbit else None
+    pattern = os.path.join(args.out, 'frame_%04d.png')
+    fps = render(args.setup, args.frames, pattern, size, path, args.workers)
+    print( '%d frames of %dx%d in %s, %d workers: %.1f frames/s'
+           % (args.frames, size[0], size[1], args.out, args.workers, fps) )
+    if args.fps and fps < args.fps:
+        print( 'below the target of %.1f frames/s' % args.fps )
+        sys.exit(1)
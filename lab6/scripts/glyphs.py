@@ -0,0 +1,222 @@
+"""
+Instanced vector glyphs with camera-distance level of detail
+
+vtkHedgeHog turns every sample into a line segment of a new polydata that a
+plain vtkPolyDataMapper then draws. vtkGlyph3DMapper instead uploads a
+single arrow and draws it once per point with GPU instancing, oriented and
+scaled from the vector array at draw time, so there is no per-glyph geometry
+on the CPU and far more vectors stay interactive.
+
+VectorGlyphs samples the vectors on evenly spaced lattices of a few
+densities (interpolate.Interpolator, built on first use) and picks one per
+render from the distance of the camera to the data: the densest level, as
+many arrows as the grid has points, up close and in the default view,
+sparser as the camera moves away, where the arrows would only overlap.
+Arrows are scaled so the longest one spans a lattice cell at every level,
+and all levels share one lookup table over the magnitude.
+
+    lut = glyphs.magnitude_lut(scalarRange)
+    arrows = glyphs.VectorGlyphs(grid, 'vectors', lut=lut)
+    renderer.AddActor(arrows.actor)
+    arrows.attach(renderer)      # switch density on every render
+
+Run `python glyphs.py [n]` for frame times of vtkHedgeHog and the
+instanced arrows on the same n^3 samples, off-screen.
+"""
+
+import sys
+import time
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+import interpolate
+
+
+# relative lattice points per axis, densest first
+LEVELS = (1.0, 0.5, 0.25)
+
+# camera distances, in bounding box diagonals, at which the next sparser
+# level takes over; ResetCamera() puts the camera about 2 diagonals away,
+# so the whole data set is shown at the densest level
+DISTANCES = (2.5, 5.0)
+
+
+def magnitude_lut(scalarRange=None):
+    """The blue-to-red lookup table of the hedgehogs, over vector magnitude."""
+    lut = vtk.vtkLookupTable()
+    lut.SetNumberOfColors(256)
+    lut.SetHueRange(0.667, 0.0)
+    lut.SetVectorModeToMagnitude()
+    if scalarRange is not None:
+        lut.SetTableRange(scalarRange)
+    lut.Build()
+    return lut
+
+
+def arrow_source(resolution=6):
+    """A low-polygon arrow; each instance costs its triangles on the GPU."""
+    arrow = vtk.vtkArrowSource()
+    arrow.SetTipResolution(resolution)
+    arrow.SetShaftResolution(resolution)
+    return arrow
+
+
+class VectorGlyphs(object):
+    """
+    Instanced arrows for the point vectors of a rectilinear grid or image.
+
+    levels       -- relative lattice points per axis, densest first
+    distances    -- level switch distances, in bounding box diagonals
+    max_fraction -- optional cap on the samples of the densest level, as a
+                    fraction of the grid's points; all levels are scaled
+                    down together (default: no cap, the distances alone
+                    set the cost)
+    lut          -- lookup table (default: magnitude_lut over the samples)
+    """
+
+    def __init__(self, grid, vectors='vectors', levels=LEVELS,
+                 distances=DISTANCES, max_fraction=None, lut=None,
+                 interpolator=None):
+        if len(distances) != len(levels) - 1:
+            raise ValueError('need one distance less than levels')
+        self.vectors = vectors
+        self.interpolator = interpolator or interpolate.Interpolator(grid)
+        self.dims = grid.GetDimensions()
+        self.distances = distances
+        scale = 1.0
+        if max_fraction is not None:
+            # per-axis fractions whose densest level meets max_fraction
+            axes = sum(1 for d in self.dims if d > 1) or 1
+            scale = min(1.0, max_fraction ** (1.0 / axes) / levels[0])
+        self.levels = [scale * level for level in levels]
+        bounds = np.array(self.interpolator.bounds()).reshape(3, 2)
+        self.center = bounds.mean(axis=1)
+        self.diagonal = np.linalg.norm(bounds[:, 1] - bounds[:, 0])
+        self._samples = {}
+        self.level = None
+
+        # kept: a port of a source that has been released is invalid
+        self.arrow = arrow_source()
+        self.mapper = vtk.vtkGlyph3DMapper()
+        self.mapper.SetSourceConnection(self.arrow.GetOutputPort())
+        self.mapper.SetOrientationArray(vectors)
+        self.mapper.SetOrientationModeToDirection()
+        self.mapper.SetScaleArray(vectors)
+        self.mapper.SetScaleModeToScaleByMagnitude()
+        self.mapper.SetScalarModeToUsePointFieldData()
+        self.mapper.SelectColorArray('magnitude')
+        self.mapper.SetScalarVisibility(True)
+
+        self.actor = vtk.vtkActor()
+        self.actor.SetMapper(self.mapper)
+        self.set_level(0)
+        if lut is None:
+            lut = magnitude_lut(self._samples[self.level][1])
+        self.lut = lut
+        self.mapper.SetLookupTable(lut)
+        self.mapper.UseLookupTableScalarRangeOn()
+
+    def samples(self, level):
+        """(polydata, magnitude range, lattice spacing) of a level."""
+        if level not in self._samples:
+            dims = [max(2, int(round(d * self.levels[level]))) if d > 1 else 1
+                    for d in self.dims]
+            polydata = self.interpolator.lattice(dims, names=[self.vectors])
+            values = numpy_support.vtk_to_numpy(
+                polydata.GetPointData().GetArray(self.vectors))
+            magnitude = np.sqrt(np.einsum('ij,ij->i', values, values))
+            array = numpy_support.numpy_to_vtk(magnitude, deep=True)
+            array.SetName('magnitude')
+            polydata.GetPointData().AddArray(array)
+            extent = np.array(self.interpolator.bounds()).reshape(3, 2) @ [-1, 1]
+            spacing = min(e / (d - 1) for e, d in zip(extent, dims) if d > 1)
+            self._samples[level] = (polydata, (magnitude.min(), magnitude.max()), spacing)
+        return self._samples[level]
+
+    def set_level(self, level):
+        if level == self.level:
+            return
+        polydata, (low, high), spacing = self.samples(level)
+        self.mapper.SetInputData(polydata)
+        # the longest arrow spans one lattice cell
+        self.mapper.SetScaleFactor(spacing / high if high > 0 else 1.0)
+        self.level = level
+
+    def level_for(self, camera):
+        """Level for the camera's distance to the centre of the data."""
+        distance = np.linalg.norm(np.array(camera.GetPosition()) - self.center)
+        return int(np.searchsorted(self.distances, distance / self.diagonal))
+
+    def attach(self, renderer):
+        """Update the level before every render of `renderer`."""
+        def update(caller, event):
+            self.set_level(self.level_for(renderer.GetActiveCamera()))
+        return renderer.AddObserver('StartEvent', update)
+
+    def count(self):
+        """Number of arrows currently drawn."""
+        return self.samples(self.level)[0].GetNumberOfPoints()
+
+
+if __name__ == '__main__':
+    import streamlines
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 48
+    frames = 20
+    grid = streamlines.swirling_jet(n)
+
+    def frame_time(actor):
+        renderer = vtk.vtkRenderer()
+        renderer.AddActor(actor)
+        renderWindow = vtk.vtkRenderWindow()
+        renderWindow.SetOffScreenRendering(1)
+        renderWindow.AddRenderer(renderer)
+        renderWindow.SetSize(500, 500)
+        renderer.ResetCamera()
+        renderWindow.Render()
+        start = time.perf_counter()
+        for i in range(frames):
+            renderer.GetActiveCamera().Azimuth(360.0 / frames)
+            renderWindow.Render()
+        return (time.perf_counter() - start) / frames
+
+    arrows = VectorGlyphs(grid, 'vectors', levels=(1.0,), distances=())
+    samples = arrows.samples(0)[0]
+
+    hh = vtk.vtkHedgeHog()
+    hh.SetInputData(samples)
+    hh.SetScaleFactor(arrows.mapper.GetScaleFactor())
+    hhm = vtk.vtkPolyDataMapper()
+    hhm.SetInputConnection(hh.GetOutputPort())
+    hhm.SetLookupTable(arrows.lut)
+    hhm.SetScalarModeToUsePointFieldData()
+    hhm.SelectColorArray('magnitude')
+    hhm.UseLookupTableScalarRangeOn()
+    hha = vtk.vtkActor()
+    hha.SetMapper(hhm)
+
+    # the same arrows as one big polydata, for the cost of the instancing
+    glyph = vtk.vtkGlyph3D()
+    glyph.SetInputData(samples)
+    glyph.SetSourceConnection(arrows.arrow.GetOutputPort())
+    glyph.SetInputArrayToProcess(1, 0, 0, 0, 'vectors')
+    glyph.SetScaleModeToScaleByVector()
+    glyph.SetVectorModeToUseVector()
+    glyph.SetScaleFactor(arrows.mapper.GetScaleFactor())
+    glyph.SetColorModeToColorByScalar()
+    gm = vtk.vtkPolyDataMapper()
+    gm.SetInputConnection(glyph.GetOutputPort())
+    gm.SetLookupTable(arrows.lut)
+    gm.SetScalarModeToUsePointFieldData()
+    gm.SelectColorArray('magnitude')
+    gm.UseLookupTableScalarRangeOn()
+    ga = vtk.vtkActor()
+    ga.SetMapper(gm)
+
+    print( '%d vectors' % samples.GetNumberOfPoints() )
+    for label, actor in (('vtkHedgeHog lines', hha),
+                         ('vtkGlyph3D arrows', ga),
+                         ('vtkGlyph3DMapper arrows', arrows.actor)):
+        print( '%-24s %7.1f ms/frame' % (label, 1000 * frame_time(actor)) )
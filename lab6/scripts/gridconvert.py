@@ -0,0 +1,135 @@
+"""
+Bulk conversion of structured VTK grids to vtkUnstructuredGrid
+
+Copying cells one at a time (grid.GetCell(i) + ugrid.InsertNextCell(...))
+costs a Python/C++ round trip and a temporary cell object per cell. For a
+rectilinear grid the connectivity is implicit in the dimensions, so it is
+generated here with NumPy for all cells at once and handed to VTK as a
+single offsets/connectivity pair through vtk.util.numpy_support.
+"""
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+
+# NumPy dtype matching vtkIdType (64 or 32 bit depending on the VTK build)
+ID_DTYPE = numpy_support.get_vtk_to_numpy_typemap()[vtk.VTK_ID_TYPE]
+
+# number of varying axes -> (cell type, points per cell)
+_CELL_TYPES = {
+    1: (vtk.VTK_LINE, 2),
+    2: (vtk.VTK_PIXEL, 4),
+    3: (vtk.VTK_VOXEL, 8),
+}
+
+# the same for curved (vtkStructuredGrid) cells, and the order in which
+# they visit the voxel/pixel corners
+_CURVED_TYPES = {
+    1: (vtk.VTK_LINE, 2),
+    2: (vtk.VTK_QUAD, 4),
+    3: (vtk.VTK_HEXAHEDRON, 8),
+}
+_CURVED_ORDER = [0, 1, 3, 2, 4, 5, 7, 6]
+
+
+def structured_cells(dims, curved=False):
+    """
+    Cell type, offsets and connectivity of a (nx, ny, nz) point lattice.
+
+    Cells are numbered like vtkRectilinearGrid/vtkImageData cells (i fastest)
+    and their corners follow the VTK voxel/pixel/line point ordering, so the
+    result matches what GetCell(i).GetPointIds() would give for every i.
+    With `curved` they are hexahedra/quads in vtkStructuredGrid order.
+    """
+    dims = [int(d) for d in dims]
+    strides = [1, dims[0], dims[0]*dims[1]]
+    axes = [a for a in range(3) if dims[a] > 1]
+    if not axes:
+        raise ValueError('grid has no cells (dimensions %r)' % (dims,))
+    cell_type, npts = (_CURVED_TYPES if curved else _CELL_TYPES)[len(axes)]
+
+    # id of the lowest corner of every cell, i fastest
+    base = np.zeros(1, dtype=ID_DTYPE)
+    for a in axes:
+        ids = np.arange(dims[a] - 1, dtype=base.dtype) * strides[a]
+        base = (ids[:, None] + base[None, :]).ravel()
+
+    # corner c has bit b set when it is one step along the b-th varying axis
+    corners = np.zeros(npts, dtype=base.dtype)
+    for c in range(npts):
+        for b, a in enumerate(axes):
+            if c >> b & 1:
+                corners[c] += strides[a]
+    if curved and npts > 2:
+        corners = corners[_CURVED_ORDER[:npts]]
+
+    connectivity = (base[:, None] + corners[None, :]).ravel()
+    offsets = np.arange(0, npts*(len(base) + 1), npts, dtype=base.dtype)
+    return cell_type, offsets, connectivity
+
+
+def dimensions(grid):
+    """Points per axis of a structured grid, from its extent (VTK 9.7's
+    vtkStructuredGrid.GetDimensions() needs an output argument)."""
+    extent = grid.GetExtent()
+    return tuple(extent[2*a + 1] - extent[2*a] + 1 for a in range(3))
+
+
+def axis_coordinates(grid):
+    """The three 1D axis coordinate arrays of a rectilinear or image grid."""
+    if isinstance(grid, vtk.vtkRectilinearGrid):
+        return [numpy_support.vtk_to_numpy(a).astype(np.float64)
+                for a in (grid.GetXCoordinates(), grid.GetYCoordinates(),
+                          grid.GetZCoordinates())]
+    dims = grid.GetDimensions()
+    origin, spacing = grid.GetOrigin(), grid.GetSpacing()
+    return [origin[a] + spacing[a]*np.arange(dims[a]) for a in range(3)]
+
+
+def lattice_points(grid):
+    """(n, 3) point coordinates of a rectilinear or image grid, i fastest."""
+    x, y, z = axis_coordinates(grid)
+    nx, ny, nz = len(x), len(y), len(z)
+    coords = np.empty((nx*ny*nz, 3))
+    coords[:, 0] = np.tile(x, ny*nz)
+    coords[:, 1] = np.tile(np.repeat(y, nx), nz)
+    coords[:, 2] = np.repeat(z, nx*ny)
+    return coords
+
+
+def to_unstructured(grid, method='numpy'):
+    """
+    vtkUnstructuredGrid with the points, cells, point and field data of `grid`.
+
+    method -- 'numpy' builds the connectivity in bulk (vtkRectilinearGrid,
+              vtkImageData or vtkStructuredGrid input); 'append' runs the
+              native vtkAppendFilter instead, which accepts any dataset.
+    """
+    if method == 'append':
+        append = vtk.vtkAppendFilter()
+        append.SetInputData(grid)
+        append.Update()
+        return append.GetOutput()
+    if method != 'numpy':
+        raise ValueError('unknown method %r' % method)
+
+    points = vtk.vtkPoints()
+    if isinstance(grid, vtk.vtkStructuredGrid):
+        points.ShallowCopy(grid.GetPoints())
+    else:
+        points.SetData(numpy_support.numpy_to_vtk(lattice_points(grid), deep=True))
+
+    cell_type, offsets, connectivity = structured_cells(
+        dimensions(grid), curved=isinstance(grid, vtk.vtkStructuredGrid))
+    cells = vtk.vtkCellArray()
+    cells.SetData(numpy_support.numpy_to_vtkIdTypeArray(offsets, deep=True),
+                  numpy_support.numpy_to_vtkIdTypeArray(connectivity, deep=True))
+
+    ugrid = vtk.vtkUnstructuredGrid()
+    ugrid.SetPoints(points)
+    ugrid.SetCells(cell_type, cells)
+    ugrid.GetPointData().ShallowCopy(grid.GetPointData())
+    ugrid.GetCellData().ShallowCopy(grid.GetCellData())
+    ugrid.GetFieldData().ShallowCopy(grid.GetFieldData())
+    return ugrid
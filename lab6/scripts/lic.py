@@ -0,0 +1,275 @@
+"""
+Line integral convolution (LIC) of axis-aligned slices
+
+Hedgehogs and streamlines show the flow at a few places; LIC shows all of it
+at once. A white noise texture is smeared along the flow: every output
+pixel is the average of the noise along the streamline through it, traced
+`length` pixels forward and backward. Here all the pixels of a tile are
+advected together (midpoint Runge-Kutta, one pixel per step, bilinear
+sampling of the in-plane velocity), so one step is a few NumPy operations
+over the tile, and the tiles are processed by a thread pool.
+
+The slice is sampled from the grid with interpolate.Interpolator (square
+pixels over the grid's extent in the slice plane), and the result is a
+vtkImageData placed at the slice in world coordinates, with the texture as
+unsigned char scalars 'lic' and the velocity magnitude as 'magnitude':
+
+    image = lic.slice_lic(grid, 'vectors', axis=2, position=0.5)
+    actor = lic.texture_actor(image)     # textured plane at the slice
+
+    python lic.py ../data/wind_image.vti --axis z --png wind_lic.png
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+import interpolate
+
+
+TILE = 64
+
+_noise = {}
+
+
+def noise(shape, seed=0):
+    """White noise texture of `shape`, created once per shape and seed."""
+    key = (tuple(shape), seed)
+    if key not in _noise:
+        _noise[key] = np.random.default_rng(seed).random(shape)
+    return _noise[key]
+
+
+def _bilinear(image, x, y):
+    # image sampled at pixel coordinates (x, y), clamped to its edges
+    h, w = image.shape[:2]
+    x = np.clip(x, 0, w - 1)
+    y = np.clip(y, 0, h - 1)
+    i = np.minimum(y.astype(np.intp), h - 2) if h > 1 else np.zeros(len(y), np.intp)
+    j = np.minimum(x.astype(np.intp), w - 2) if w > 1 else np.zeros(len(x), np.intp)
+    fy = y - i
+    fx = x - j
+    if image.ndim == 3:
+        fx, fy = fx[:, None], fy[:, None]
+    i1 = np.minimum(i + 1, h - 1)
+    j1 = np.minimum(j + 1, w - 1)
+    top = image[i, j] * (1 - fx) + image[i, j1] * fx
+    bottom = image[i1, j] * (1 - fx) + image[i1, j1] * fx
+    return top * (1 - fy) + bottom * fy
+
+
+def _direction(field, x, y):
+    # unit in-plane direction at (x, y), zero where the flow stands still
+    v = _bilinear(field, x, y)
+    speed = np.sqrt(v[:, 0]**2 + v[:, 1]**2)
+    v /= np.where(speed > 0, speed, 1.0)[:, None]
+    return v
+
+
+def convolve(field, texture, length=20, rows=None):
+    """
+    LIC of a (h, w, 2) in-plane vector field (pixel units) over a (h, w)
+    noise texture, for the pixel rows `rows` (a slice, default all).
+
+    Returns the rows of the (h, w) float image.
+    """
+    h, w = texture.shape
+    rows = rows or slice(0, h)
+    y, x = np.mgrid[rows, 0:w]
+    x0 = x.ravel().astype(np.float64)
+    y0 = y.ravel().astype(np.float64)
+    total = texture[y0.astype(np.intp), x0.astype(np.intp)].copy()
+    count = np.ones(len(x0))
+
+    for sign in (1.0, -1.0):
+        px, py = x0.copy(), y0.copy()
+        alive = np.ones(len(x0), dtype=bool)
+        for step in range(length):
+            d = _direction(field, px, py)
+            mid = _direction(field, px + 0.5*sign*d[:, 0], py + 0.5*sign*d[:, 1])
+            px += sign * mid[:, 0]
+            py += sign * mid[:, 1]
+            # streamlines stop at the border and where the flow vanishes
+            alive &= (px >= 0) & (px <= w - 1) & (py >= 0) & (py <= h - 1)
+            alive &= (mid[:, 0] != 0) | (mid[:, 1] != 0)
+            if not alive.any():
+                break
+            total[alive] += _bilinear(texture, px[alive], py[alive])
+            count += alive
+    return (total / count).reshape(y.shape)
+
+
+def lic(field, length=20, seed=0, workers=None, tile=TILE):
+    """LIC of a (h, w, 2) vector field, in tiles of `tile` rows in parallel."""
+    h, w = field.shape[:2]
+    texture = noise((h, w), seed)
+    field = np.ascontiguousarray(field, dtype=np.float64)
+    out = np.empty((h, w))
+
+    def run(start):
+        rows = slice(start, min(start + tile, h))
+        out[rows] = convolve(field, texture, length, rows)
+
+    workers = workers or os.cpu_count() or 1
+    starts = range(0, h, tile)
+    if workers == 1:
+        for start in starts:
+            run(start)
+    else:
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(run, starts))
+    return out
+
+
+def stretch(values, contrast=2.0):
+    """0..255 unsigned char image of a LIC result, mean at mid-grey."""
+    std = values.std() or 1.0
+    scaled = 0.5 + (values - values.mean()) / (contrast * 2 * std)
+    return (np.clip(scaled, 0, 1) * 255).astype(np.uint8)
+
+
+def slice_geometry(bounds, axis, position, size):
+    """
+    (origin, spacing, dims) of an image of square pixels covering the
+    grid's bounds in the plane normal to `axis` at `position` (0..1 of the
+    extent along the axis); the longer side has `size` pixels.
+    """
+    u, v = [a for a in range(3) if a != axis]
+    extent = [bounds[2*a + 1] - bounds[2*a] for a in range(3)]
+    spacing = max(extent[u], extent[v]) / (size - 1)
+    dims = [1, 1, 1]
+    dims[u] = int(round(extent[u] / spacing)) + 1
+    dims[v] = int(round(extent[v] / spacing)) + 1
+    origin = [bounds[0], bounds[2], bounds[4]]
+    origin[axis] = bounds[2*axis] + position * extent[axis]
+    spacings = [spacing] * 3
+    return origin, spacings, dims
+
+
+def slice_lic(grid, vectors='vectors', axis=2, position=0.5, size=512,
+              length=20, seed=0, workers=None, interpolator=None):
+    """
+    vtkImageData of the LIC texture of an axis-aligned slice through a
+    rectilinear grid or image.
+
+    axis         -- 0, 1 or 2: the slice is normal to x, y or z
+    position     -- where along that axis, 0..1 of the grid's extent
+    size         -- pixels along the longer side of the slice
+    length       -- convolution length in pixels in each direction
+    interpolator -- an interpolate.Interpolator of the grid, to reuse
+    """
+    interpolator = interpolator or interpolate.Interpolator(grid, workers=workers)
+    origin, spacing, dims = slice_geometry(grid.GetBounds(), axis, position, size)
+    u, v = [a for a in range(3) if a != axis]
+    coords = [origin[a] + spacing[a] * np.arange(dims[a]) for a in range(3)]
+    z, y, x = np.meshgrid(coords[2], coords[1], coords[0], indexing='ij')
+    points = np.column_stack((x.ravel(), y.ravel(), z.ravel()))
+    velocity = interpolator.sample(points, vectors)
+
+    # (rows, columns) = (v, u) pixels of the slice, x fastest as in VTK
+    h, w = dims[v], dims[u]
+    field = velocity[:, [u, v]].reshape(h, w, 2)
+    texture = stretch(lic(field, length, seed, workers))
+
+    image = vtk.vtkImageData()
+    image.SetOrigin(origin)
+    image.SetSpacing(spacing)
+    image.SetDimensions(dims)
+    scalars = numpy_support.numpy_to_vtk(texture.ravel(), deep=True,
+                                         array_type=vtk.VTK_UNSIGNED_CHAR)
+    scalars.SetName('lic')
+    image.GetPointData().SetScalars(scalars)
+    magnitude = numpy_support.numpy_to_vtk(np.linalg.norm(velocity, axis=1), deep=True)
+    magnitude.SetName('magnitude')
+    image.GetPointData().AddArray(magnitude)
+    return image
+
+
+def texture_image(image):
+    """The 'lic' scalars of a slice as a 2D (w, h, 1) image, for vtkTexture
+    and vtkPNGWriter."""
+    dims = image.GetDimensions()
+    w, h = [d for d in dims if d > 1] if dims.count(1) == 1 else dims[:2]
+    flat = vtk.vtkImageData()
+    flat.SetDimensions(w, h, 1)
+    flat.GetPointData().SetScalars(image.GetPointData().GetArray('lic'))
+    return flat
+
+
+def texture_actor(image):
+    """A plane at the slice of `image`, textured with its 'lic' scalars."""
+    x0, x1, y0, y1, z0, z1 = image.GetBounds()
+    axis = [x1 - x0, y1 - y0, z1 - z0].index(0.0)
+    u, v = [a for a in range(3) if a != axis]
+    origin = [x0, y0, z0]
+    point1 = list(origin)
+    point1[u] = image.GetBounds()[2*u + 1]
+    point2 = list(origin)
+    point2[v] = image.GetBounds()[2*v + 1]
+
+    plane = vtk.vtkPlaneSource()
+    plane.SetOrigin(origin)
+    plane.SetPoint1(point1)
+    plane.SetPoint2(point2)
+
+    texture = vtk.vtkTexture()
+    texture.SetInputData(texture_image(image))
+    texture.InterpolateOn()
+
+    mapper = vtk.vtkPolyDataMapper()
+    mapper.SetInputConnection(plane.GetOutputPort())
+    actor = vtk.vtkActor()
+    actor.SetMapper(mapper)
+    actor.SetTexture(texture)
+    return actor
+
+
+if __name__ == '__main__':
+    import datacache
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('filename', nargs='?', default='../data/wind_image.vti')
+    parser.add_argument('--vectors', default=None,
+                        help='point vector array (default: the active vectors)')
+    parser.add_argument('--axis', choices='xyz', default='z')
+    parser.add_argument('--position', type=float, default=0.5)
+    parser.add_argument('--size', type=int, default=512)
+    parser.add_argument('--length', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--png', help='write the texture to a PNG file')
+    args = parser.parse_args()
+
+    grid = datacache.load(args.filename)
+    vectors = args.vectors or grid.GetPointData().GetVectors().GetName()
+
+    start = time.perf_counter()
+    image = slice_lic(grid, vectors, 'xyz'.index(args.axis), args.position,
+                      args.size, args.length, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    dims = image.GetDimensions()
+    print( '%s: %s slice at %.2f, %d pixels in %.2f s'
+           % (args.filename, args.axis, args.position,
+              dims[0]*dims[1]*dims[2], elapsed) )
+
+    if args.png:
+        writer = vtk.vtkPNGWriter()
+        writer.SetFileName(args.png)
+        writer.SetInputData(texture_image(image))
+        writer.Write()
+    else:
+        renderer = vtk.vtkRenderer()
+        renderer.AddActor(texture_actor(image))
+        renderWindow = vtk.vtkRenderWindow()
+        renderWindow.AddRenderer(renderer)
+        renderWindow.SetSize(600, 600)
+        renderWindow.Render()
+        interactor = vtk.vtkRenderWindowInteractor()
+        interactor.SetInteractorStyle(vtk.vtkInteractorStyleTrackballCamera())
+        interactor.SetRenderWindow(renderWindow)
+        interactor.Initialize()
+        interactor.Start()
@@ -0,0 +1,332 @@
+"""
+Memory-mapped PLOT3D reader
+
+vtkMultiBlockPLOT3DReader reads the whole xyz and q files into VTK arrays
+(and computes the requested functions) before anything can be looked at.
+Plot3D memory-maps the files instead: the header is parsed, the layout
+detected, and every block's coordinates, iblank and solution are exposed as
+NumPy views straight into the mapped file, so opening a file reads only its
+first few bytes and nothing is copied until the data is used. A
+vtkStructuredGrid (or the multiblock dataset the VTK reader produces) is
+built only on demand, with the functions that are asked for.
+
+The layout is detected from the header and the file size: byte order,
+Fortran record markers, single or multi grid, single or double precision
+and iblanking (3D whole-grid files, the common case). The combustor files of
+the lab3/lab4 exercises are big-endian, single grid, single precision,
+without record markers or iblank.
+
+    pl3d = Plot3D('data/combxyz.bin', 'data/combq.bin')
+    rho = pl3d.variable(0, 'density')           # (nk, nj, ni) view
+    b0 = pl3d.structured_grid(0, scalars=100, vectors=202)
+
+Function numbers follow vtkMultiBlockPLOT3DReader (100 density, 110
+pressure, 153 velocity magnitude, 163 stagnation energy, 200 velocity,
+202 momentum).
+"""
+
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+
+GAMMA = 1.4
+
+FUNCTIONS = {
+    100: 'density',
+    110: 'pressure',
+    153: 'velocity_magnitude',
+    163: 'stagnation_energy',
+    200: 'velocity',
+    202: 'momentum',
+}
+
+# array names used by vtkMultiBlockPLOT3DReader
+_VTK_NAMES = {
+    'density': 'Density',
+    'pressure': 'Pressure',
+    'velocity_magnitude': 'VelocityMagnitude',
+    'stagnation_energy': 'StagnationEnergy',
+    'velocity': 'Velocity',
+    'momentum': 'Momentum',
+}
+
+
+class _Stream(object):
+    # sequential reader of ints/arrays over a mapped file, with or without
+    # Fortran record markers around each record
+
+    def __init__(self, data, order, markers):
+        self.data = data
+        self.order = order
+        self.markers = markers
+        self.pos = 0
+        self._record = None
+
+    def array(self, dtype, count):
+        dtype = np.dtype(dtype).newbyteorder(self.order)
+        end = self.pos + dtype.itemsize * count
+        if end > len(self.data):
+            raise ValueError('record runs past the end of the file')
+        values = np.frombuffer(self.data, dtype, count, self.pos)
+        self.pos = end
+        return values
+
+    def begin(self):
+        if self.markers:
+            self._record = (int(self.array('i4', 1)[0]), self.pos)
+
+    def end(self):
+        if self.markers:
+            length, start = self._record
+            if self.pos - start != length or int(self.array('i4', 1)[0]) != length:
+                raise ValueError('record length does not match its markers')
+
+
+def _header(stream, multigrid):
+    stream.begin()
+    nblocks = int(stream.array('i4', 1)[0]) if multigrid else 1
+    if multigrid:
+        stream.end()
+        stream.begin()
+    if not 0 < nblocks < 1 << 20:
+        raise ValueError('implausible number of blocks %d' % nblocks)
+    dims = stream.array('i4', 3 * nblocks).reshape(nblocks, 3)
+    stream.end()
+    if (dims <= 0).any() or (dims > 1 << 20).any():
+        raise ValueError('implausible dimensions')
+    return [tuple(int(d) for d in row) for row in dims]
+
+
+def _parse_xyz(data, order, markers, multigrid, precision, iblank):
+    stream = _Stream(data, order, markers)
+    dims = _header(stream, multigrid)
+    real = 'f%d' % precision
+    blocks = []
+    for ni, nj, nk in dims:
+        n = ni * nj * nk
+        stream.begin()
+        xyz = stream.array(real, 3 * n).reshape(3, nk, nj, ni)
+        blank = stream.array('i4', n).reshape(nk, nj, ni) if iblank else None
+        stream.end()
+        blocks.append((xyz, blank))
+    if stream.pos != len(data):
+        raise ValueError('%d bytes left over' % (len(data) - stream.pos))
+    return dims, blocks
+
+
+def _parse_q(data, order, markers, multigrid, precision):
+    stream = _Stream(data, order, markers)
+    dims = _header(stream, multigrid)
+    real = 'f%d' % precision
+    blocks = []
+    for ni, nj, nk in dims:
+        stream.begin()
+        fsmach, alpha, re, t = [float(v) for v in stream.array(real, 4)]
+        stream.end()
+        stream.begin()
+        q = stream.array(real, 5 * ni * nj * nk).reshape(5, nk, nj, ni)
+        stream.end()
+        blocks.append((q, {'fsmach': fsmach, 'alpha': alpha, 're': re,
+                           'time': t}))
+    if stream.pos != len(data):
+        raise ValueError('%d bytes left over' % (len(data) - stream.pos))
+    return dims, blocks
+
+
+def _map(filename):
+    if os.path.getsize(filename) == 0:
+        raise ValueError('%s is empty' % filename)
+    return np.memmap(filename, dtype=np.uint8, mode='r')
+
+
+class Plot3D(object):
+    """
+    xyz_file -- grid file
+    q_file   -- solution file (optional)
+
+    The layout is detected unless given: byte_order ('<' or '>'),
+    record_markers, multigrid, precision (4 or 8) and iblank.
+    """
+
+    def __init__(self, xyz_file, q_file=None, byte_order=None,
+                 record_markers=None, multigrid=None, precision=None,
+                 iblank=None):
+        self._xyz_data = _map(xyz_file)
+        candidates = itertools.product(
+            [byte_order] if byte_order else ['>', '<'],
+            [record_markers] if record_markers is not None else [False, True],
+            [multigrid] if multigrid is not None else [False, True],
+            [precision] if precision else [4, 8],
+            [iblank] if iblank is not None else [False, True])
+        for layout in candidates:
+            try:
+                self.dims, self._xyz = _parse_xyz(self._xyz_data, *layout)
+            except ValueError:
+                continue
+            break
+        else:
+            raise ValueError('%s is not a 3D whole-grid PLOT3D file in any '
+                             'supported layout' % xyz_file)
+        order, markers, multi, prec, blank = layout
+        self.layout = {'byte_order': order, 'record_markers': markers,
+                       'multigrid': multi, 'precision': prec, 'iblank': blank}
+        # native-order reals of the file's precision, for the VTK arrays
+        self.dtype = np.dtype('f%d' % prec)
+
+        self._q = None
+        if q_file is not None:
+            self._q_data = _map(q_file)
+            dims, self._q = _parse_q(self._q_data, order, markers, multi, prec)
+            if dims != self.dims:
+                raise ValueError('%s does not match the grid dimensions of %s'
+                                 % (q_file, xyz_file))
+        self._grids = {}
+
+    @property
+    def blocks(self):
+        return len(self.dims)
+
+    def coordinates(self, block=0):
+        """(3, nk, nj, ni) view of x, y and z."""
+        return self._xyz[block][0]
+
+    def iblank(self, block=0):
+        """(nk, nj, ni) iblank view, or None without iblanking."""
+        return self._xyz[block][1]
+
+    def q(self, block=0):
+        """(5, nk, nj, ni) view of density, momentum (3) and energy."""
+        if self._q is None:
+            raise ValueError('no q file')
+        return self._q[block][0]
+
+    def conditions(self, block=0):
+        """Free-stream Mach number, angle of attack, Reynolds number, time."""
+        if self._q is None:
+            raise ValueError('no q file')
+        return dict(self._q[block][1])
+
+    def variable(self, block, name):
+        """
+        A solution variable by name or function number; scalars are
+        (nk, nj, ni), vectors (nk, nj, ni, 3). Density and energy are views,
+        the others are computed.
+        """
+        name = FUNCTIONS.get(name, name)
+        q = self.q(block)
+        if name == 'density':
+            return q[0]
+        if name == 'stagnation_energy':
+            return q[4]
+        if name == 'momentum':
+            return np.moveaxis(q[1:4], 0, -1)
+        rho = q[0].astype(np.float64)
+        velocity = np.moveaxis(q[1:4], 0, -1) / rho[..., None]
+        if name == 'velocity':
+            return velocity
+        speed2 = np.einsum('...i,...i->...', velocity, velocity)
+        if name == 'velocity_magnitude':
+            return np.sqrt(speed2)
+        if name == 'pressure':
+            return (GAMMA - 1) * (q[4] - 0.5 * rho * speed2)
+        raise ValueError('unknown variable %r (one of %s)'
+                         % (name, ', '.join(sorted(FUNCTIONS.values()))))
+
+    def structured_grid(self, block=0, scalars=100, vectors=202):
+        """
+        vtkStructuredGrid of a block with the requested functions (None to
+        skip); with iblanking, cells touching a blanked point are hidden.
+        """
+        key = (block, scalars, vectors)
+        if key in self._grids:
+            return self._grids[key]
+        ni, nj, nk = self.dims[block]
+        grid = vtk.vtkStructuredGrid()
+        grid.SetDimensions(ni, nj, nk)
+
+        # VTK wants native-order interleaved (n, 3) points: one copy here
+        xyz = self.coordinates(block).reshape(3, -1).T.astype(self.dtype)
+        points = vtk.vtkPoints()
+        points.SetData(numpy_support.numpy_to_vtk(xyz, deep=True))
+        grid.SetPoints(points)
+
+        blank = self.iblank(block)
+        if blank is not None:
+            array = numpy_support.numpy_to_vtk(blank.ravel().astype(np.int32), deep=True)
+            array.SetName('IBlank')
+            grid.GetPointData().AddArray(array)
+            # a cell is hidden when any of its corners is blanked
+            visible = blank != 0
+            for axis in range(3):
+                if visible.shape[axis] > 1:
+                    visible = np.logical_and(
+                        np.take(visible, range(visible.shape[axis] - 1), axis),
+                        np.take(visible, range(1, visible.shape[axis]), axis))
+            ghosts = np.where(visible.ravel(), 0,
+                              vtk.vtkDataSetAttributes.HIDDENCELL).astype(np.uint8)
+            array = numpy_support.numpy_to_vtk(ghosts, deep=True)
+            array.SetName(vtk.vtkDataSetAttributes.GhostArrayName())
+            grid.GetCellData().AddArray(array)
+
+        if self._q is not None:
+            for number, setter in ((scalars, grid.GetPointData().SetScalars),
+                                   (vectors, grid.GetPointData().SetVectors)):
+                if number is None:
+                    continue
+                values = self.variable(block, number)
+                flat = values.reshape(ni * nj * nk, -1).astype(self.dtype)
+                if flat.shape[1] == 1:
+                    flat = flat[:, 0]
+                array = numpy_support.numpy_to_vtk(flat, deep=True)
+                array.SetName(_VTK_NAMES[FUNCTIONS.get(number, number)])
+                setter(array)
+        self._grids[key] = grid
+        return grid
+
+    def multiblock(self, scalars=100, vectors=202):
+        """All blocks as a vtkMultiBlockDataSet, like the VTK reader output."""
+        blocks = vtk.vtkMultiBlockDataSet()
+        blocks.SetNumberOfBlocks(self.blocks)
+        for b in range(self.blocks):
+            blocks.SetBlock(b, self.structured_grid(b, scalars, vectors))
+        return blocks
+
+
+if __name__ == '__main__':
+    xyz_file = sys.argv[1] if len(sys.argv) > 1 else '../data/combxyz.bin'
+    q_file = sys.argv[2] if len(sys.argv) > 2 else '../data/combq.bin'
+
+    start = time.perf_counter()
+    pl3d = Plot3D(xyz_file, q_file)
+    t_open = time.perf_counter() - start
+    start = time.perf_counter()
+    b0 = pl3d.structured_grid(0)
+    t_grid = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reader = vtk.vtkMultiBlockPLOT3DReader()
+    reader.SetXYZFileName(xyz_file)
+    reader.SetQFileName(q_file)
+    reader.SetScalarFunctionNumber(100)
+    reader.SetVectorFunctionNumber(202)
+    reader.Update()
+    t_vtk = time.perf_counter() - start
+
+    print( '%s: %d block(s) %s, %s' % (xyz_file, pl3d.blocks, pl3d.dims, pl3d.layout) )
+    print( 'open %.2f ms, structured grid %.2f ms, vtkMultiBlockPLOT3DReader %.2f ms'
+           % (1000*t_open, 1000*t_grid, 1000*t_vtk) )
+    vb0 = reader.GetOutput().GetBlock(0)
+    a = numpy_support.vtk_to_numpy(b0.GetPoints().GetData())
+    b = numpy_support.vtk_to_numpy(vb0.GetPoints().GetData())
+    print( 'max difference: points %.3g, density %.3g, momentum %.3g' % (
+        np.abs(a - b).max(),
+        np.abs(numpy_support.vtk_to_numpy(b0.GetPointData().GetScalars())
+               - numpy_support.vtk_to_numpy(vb0.GetPointData().GetScalars())).max(),
+        np.abs(numpy_support.vtk_to_numpy(b0.GetPointData().GetVectors())
+               - numpy_support.vtk_to_numpy(vb0.GetPointData().GetVectors())).max()) )
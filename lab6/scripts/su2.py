@@ -0,0 +1,271 @@
+"""
+SU2 native mesh reader
+
+The SU2 mesh of sim_lab2 (Mesh_1.su2) is plain text: NDIME, then NELEM
+element rows "type node... [index]", NPOIN point rows "x y [z] [index]" and
+NMARK boundary markers (MARKER_TAG, MARKER_ELEMS, element rows). Each
+section is parsed in blocks of whole lines: np.fromstring tokenizes a block
+in C, the tokens per line are counted from the whitespace/newline bytes with
+NumPy, and the element types, offsets and connectivity are gathered from the
+flat token array without a Python loop over rows. The vtkUnstructuredGrid is
+then built in one shot from the offsets/connectivity arrays.
+
+iter_elements() yields the elements block by block, so meshes with tens of
+millions of elements can be processed with bounded parsing memory. read()
+stores the parsed arrays in the dataset cache (see datacache.py) next to
+the other data, so re-opening a mesh memory-maps them instead of parsing.
+
+    mesh = su2.read('../../sim_lab2/Mesh_1.su2')
+    grid = mesh.unstructured_grid()
+    surface = mesh.marker_grid('Surface')
+
+Element types are VTK cell type numbers, as in SU2 (3 line, 5 triangle,
+9 quadrilateral, 10 tetrahedron, 12 hexahedron, 13 wedge, 14 pyramid).
+"""
+
+import sys
+import time
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+import datacache
+import gridconvert
+
+
+# points per element of each VTK/SU2 element type
+NODES = np.zeros(256, dtype=np.int64)
+for _type, _n in ((3, 2), (5, 3), (9, 4), (10, 4), (12, 8), (13, 6), (14, 5)):
+    NODES[_type] = _n
+
+CHUNK_BYTES = 1 << 26
+
+_SPACE = np.zeros(256, dtype=bool)
+_SPACE[[9, 10, 11, 12, 13, 32]] = True
+
+
+def _token_counts(block):
+    """Number of whitespace-separated tokens on every line of `block`."""
+    data = np.frombuffer(block, dtype=np.uint8)
+    space = _SPACE[data]
+    starts = ~space
+    starts[1:] &= space[:-1]
+    line = np.cumsum(data == 10)
+    nlines = int(line[-1]) + (data[-1] != 10)
+    return np.bincount(line[starts], minlength=nlines)
+
+
+def _blocks(f, count, chunk_bytes):
+    # blocks of whole lines from f, `count` lines in total; the file is left
+    # positioned right after the last of them
+    while count > 0:
+        start = f.tell()
+        block = f.read(chunk_bytes)
+        if not block:
+            raise ValueError('file ends %d lines early' % count)
+        end = block.rfind(b'\n') + 1
+        if end == 0:
+            if len(block) == chunk_bytes:
+                chunk_bytes *= 2
+                f.seek(start)
+                continue
+            end = len(block)
+        newlines = np.flatnonzero(np.frombuffer(block, np.uint8, end) == 10)
+        lines = len(newlines) + (end == len(block) and block[-1:] != b'\n')
+        if lines > count:
+            end = int(newlines[count - 1]) + 1
+            lines = count
+        f.seek(start + end)
+        count -= lines
+        yield block[:end]
+
+
+def _parse_elements(block):
+    """(types, offsets, connectivity) of a block of element rows."""
+    if not block.strip():
+        return (np.zeros(0, np.uint8), np.zeros(1, gridconvert.ID_DTYPE),
+                np.zeros(0, gridconvert.ID_DTYPE))
+    counts = _token_counts(block)
+    counts = counts[counts > 0]
+    tokens = np.fromstring(block, dtype=np.int64, sep=' ')
+    if len(tokens) != counts.sum():
+        raise ValueError('could not parse element rows')
+    row = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    types = tokens[row]
+    nodes = NODES[types]
+    if (nodes == 0).any():
+        bad = types[nodes == 0][0]
+        raise ValueError('unsupported element type %d' % bad)
+    if ((counts - 1 - nodes) > 1).any() or ((counts - 1 - nodes) < 0).any():
+        raise ValueError('element rows with the wrong number of nodes')
+
+    offsets = np.zeros(len(types) + 1, dtype=gridconvert.ID_DTYPE)
+    np.cumsum(nodes, out=offsets[1:])
+    # position in `tokens` of every connectivity entry
+    within = np.arange(offsets[-1]) - np.repeat(offsets[:-1], nodes)
+    connectivity = tokens[np.repeat(row + 1, nodes) + within]
+    return types.astype(np.uint8), offsets, connectivity.astype(gridconvert.ID_DTYPE)
+
+
+def _keyword(f, name):
+    # next "NAME= value" line, skipping blank and % comment lines
+    while True:
+        line = f.readline()
+        if not line:
+            raise ValueError('missing %s' % name)
+        text = line.decode('ascii', 'replace').strip()
+        if not text or text.startswith('%'):
+            continue
+        key, _, value = text.partition('=')
+        if key.strip() != name:
+            raise ValueError('expected %s, found %r' % (name, text[:40]))
+        return value.split()
+
+
+def _concatenate(parts):
+    # join per-block (types, offsets, connectivity) into one set
+    types = np.concatenate([p[0] for p in parts])
+    connectivity = np.concatenate([p[2] for p in parts])
+    offsets = np.zeros(len(types) + 1, dtype=gridconvert.ID_DTYPE)
+    i, base = 1, 0
+    for t, o, c in parts:
+        offsets[i:i + len(t)] = o[1:] + base
+        i += len(t)
+        base += o[-1]
+    return types, offsets, connectivity
+
+
+def iter_elements(filename, chunk_bytes=CHUNK_BYTES):
+    """
+    (ndime, nelem) and then the volume elements as (types, offsets,
+    connectivity) blocks of about chunk_bytes of text each.
+    """
+    with open(filename, 'rb') as f:
+        ndime = int(_keyword(f, 'NDIME')[0])
+        nelem = int(_keyword(f, 'NELEM')[0])
+        yield ndime, nelem
+        for block in _blocks(f, nelem, chunk_bytes):
+            yield _parse_elements(block)
+
+
+def parse(filename, chunk_bytes=CHUNK_BYTES):
+    """All arrays of a mesh as a dict (see Mesh)."""
+    with open(filename, 'rb') as f:
+        ndime = int(_keyword(f, 'NDIME')[0])
+        if ndime not in (2, 3):
+            raise ValueError('NDIME must be 2 or 3, not %d' % ndime)
+        nelem = int(_keyword(f, 'NELEM')[0])
+        elements = _concatenate([_parse_elements(block) for block in
+                                 _blocks(f, nelem, chunk_bytes)]
+                                or [_parse_elements(b'')])
+
+        npoin = int(_keyword(f, 'NPOIN')[0])
+        points = np.zeros((npoin, 3))
+        filled = 0
+        for block in _blocks(f, npoin, chunk_bytes):
+            counts = _token_counts(block)
+            counts = counts[counts > 0]
+            columns = int(counts[0])
+            if (counts != columns).any() or columns not in (ndime, ndime + 1):
+                raise ValueError('point rows with the wrong number of values')
+            rows = np.fromstring(block, sep=' ').reshape(-1, columns)
+            if columns > ndime:
+                points[rows[:, ndime].astype(np.int64), :ndime] = rows[:, :ndime]
+            else:
+                points[filled:filled + len(rows), :ndime] = rows
+            filled += len(rows)
+
+        result = {'ndime': np.array([ndime]), 'points': points,
+                  'types': elements[0], 'offsets': elements[1],
+                  'connectivity': elements[2]}
+        tags = []
+        nmark = int(_keyword(f, 'NMARK')[0])
+        for m in range(nmark):
+            tags.append(' '.join(_keyword(f, 'MARKER_TAG')))
+            count = int(_keyword(f, 'MARKER_ELEMS')[0])
+            types, offsets, connectivity = _concatenate(
+                [_parse_elements(block) for block in _blocks(f, count, chunk_bytes)]
+                or [_parse_elements(b'')])
+            result['marker%d_types' % m] = types
+            result['marker%d_offsets' % m] = offsets
+            result['marker%d_connectivity' % m] = connectivity
+        result['marker_tags'] = np.array(tags, dtype=str)
+    return result
+
+
+class Mesh(object):
+    """
+    ndime        -- 2 or 3
+    points       -- (npoin, 3) coordinates (z = 0 for 2D meshes)
+    types        -- VTK cell type of every element
+    offsets      -- start of every element in connectivity (nelem + 1)
+    connectivity -- point ids of all elements
+    markers      -- {tag: (types, offsets, connectivity)} boundary elements
+    """
+
+    def __init__(self, arrays):
+        self.ndime = int(arrays['ndime'][0])
+        self.points = arrays['points']
+        self.types = arrays['types']
+        self.offsets = arrays['offsets']
+        self.connectivity = arrays['connectivity']
+        self.markers = {}
+        for m, tag in enumerate(arrays['marker_tags']):
+            self.markers[str(tag)] = tuple(arrays['marker%d_%s' % (m, k)] for k in
+                                           ('types', 'offsets', 'connectivity'))
+
+    def _grid(self, types, offsets, connectivity):
+        points = vtk.vtkPoints()
+        points.SetData(numpy_support.numpy_to_vtk(np.ascontiguousarray(self.points), deep=True))
+        cells = vtk.vtkCellArray()
+        cells.SetData(numpy_support.numpy_to_vtkIdTypeArray(np.ascontiguousarray(offsets), deep=True),
+                      numpy_support.numpy_to_vtkIdTypeArray(np.ascontiguousarray(connectivity), deep=True))
+        cellTypes = numpy_support.numpy_to_vtk(np.ascontiguousarray(types), deep=True,
+                                               array_type=vtk.VTK_UNSIGNED_CHAR)
+        grid = vtk.vtkUnstructuredGrid()
+        grid.SetPoints(points)
+        grid.SetCells(cellTypes, cells)
+        return grid
+
+    def unstructured_grid(self):
+        """The volume elements as a vtkUnstructuredGrid."""
+        return self._grid(self.types, self.offsets, self.connectivity)
+
+    def marker_grid(self, tag):
+        """The elements of a boundary marker (sharing the mesh points)."""
+        return self._grid(*self.markers[tag])
+
+
+def read(filename, cache=True, chunk_bytes=CHUNK_BYTES):
+    """
+    Mesh of an SU2 file; with cache the parsed arrays are kept in the
+    dataset cache (True for the default one, or a datacache.DatasetCache).
+    """
+    if not cache:
+        return Mesh(parse(filename, chunk_bytes))
+    if cache is True:
+        cache = datacache.default_cache()
+    digest = cache.digest(filename)
+    return Mesh(cache.arrays(digest, 'su2', lambda: parse(filename, chunk_bytes)))
+
+
+if __name__ == '__main__':
+    filename = sys.argv[1] if len(sys.argv) > 1 else '../../sim_lab2/Mesh_1.su2'
+
+    start = time.perf_counter()
+    mesh = read(filename, cache=False)
+    t_parse = time.perf_counter() - start
+    start = time.perf_counter()
+    grid = mesh.unstructured_grid()
+    t_grid = time.perf_counter() - start
+    read(filename)
+    start = time.perf_counter()
+    read(filename).unstructured_grid()
+    t_cached = time.perf_counter() - start
+
+    print( '%s: %dD, %d points, %d elements, markers %s'
+           % (filename, mesh.ndime, grid.GetNumberOfPoints(),
+              grid.GetNumberOfCells(), ', '.join(sorted(mesh.markers))) )
+    print( 'parse %.1f ms, vtkUnstructuredGrid %.1f ms, cached re-open %.1f ms'
+           % (1000*t_parse, 1000*t_grid, 1000*t_cached) )
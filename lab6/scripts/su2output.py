@@ -0,0 +1,360 @@
+"""
+Streaming loader for the SU2 CSV outputs (convergence history, surface flow)
+
+sim_lab2/history1.vtk is, despite its extension, the CSV convergence history
+(Iteration, CLift, CDrag, ..., Res_Flow[0..4], ...), and surface_flow1.csv
+has one row per surface node (coordinates, pressure, skin friction). Both
+are read here in blocks of whole lines, each block parsed in C with
+np.fromstring into a typed NumPy record array (integer columns such as
+Iteration and Global_Index stay integers).
+
+    chunks(filename)   -- record arrays of at most about chunk_bytes each
+    load(filename)     -- the whole file as one record array
+    follow(filename)   -- tail mode: new rows as a running solver appends them
+                          (None when a restart rewrote the file)
+    History            -- bounded-memory record of a history of any length:
+                          when full, every other row is dropped and only every
+                          2nd, 4th, ... row is kept from then on
+    ResidualPlot       -- residual convergence, updated incrementally
+
+    python su2output.py ../../sim_lab2/history1.vtk             # plot
+    python su2output.py history.csv --follow                    # live
+    python su2output.py ../../sim_lab2/history1.vtk --png res.png
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+
+CHUNK_BYTES = 1 << 24
+
+# bytes before the read position compared to tell a rewrite from an append
+TAIL_BYTES = 256
+
+# columns that hold counts rather than measurements
+INTEGER_COLUMNS = ('Iteration', 'Global_Index', 'Linear_Solver_Iterations',
+                   'Point_ID', 'Time_Iter', 'Outer_Iter', 'Inner_Iter')
+
+
+def read_header(line):
+    """Column names of a CSV header line (quotes and spaces stripped)."""
+    if isinstance(line, bytes):
+        line = line.decode('ascii', 'replace')
+    return [name.strip().strip('"').strip() for name in line.split(',')]
+
+
+def record_dtype(names):
+    return np.dtype([(name, np.int64 if name in INTEGER_COLUMNS else np.float64)
+                     for name in names])
+
+
+def parse_rows(block, dtype):
+    """Record array of the complete CSV rows in `block` (bytes)."""
+    ncols = len(dtype.names)
+    values = np.fromstring(block.replace(b',', b' '), sep=' ')
+    if len(values) % ncols:
+        raise ValueError('rows with other than %d values' % ncols)
+    values = values.reshape(-1, ncols)
+    rows = np.empty(len(values), dtype=dtype)
+    for i, name in enumerate(dtype.names):
+        rows[name] = values[:, i]
+    return rows
+
+
+def _identity(st):
+    # the file itself, as opposed to the name: a new file (written and
+    # renamed over the old one) has another inode
+    return (st.st_dev, st.st_ino)
+
+
+class _Reader(object):
+    # incremental reader: complete lines only, the partial last line is kept
+    # until the rest of it has been written
+
+    def __init__(self, filename, chunk_bytes):
+        self.filename = filename
+        self.chunk_bytes = chunk_bytes
+        self.f = open(filename, 'rb')
+        self.dtype = None
+        self._pending = b''
+        self._opened = _identity(os.fstat(self.f.fileno()))
+        self._seen = None
+        self._tail = b''
+
+    def _header(self):
+        line = self.f.readline()
+        if not line.endswith(b'\n'):
+            # header not complete yet
+            self.f.seek(0)
+            return False
+        self._tail = line[-TAIL_BYTES:]
+        self.dtype = record_dtype(read_header(line))
+        return True
+
+    def read(self):
+        """Record arrays of the complete rows available now."""
+        if self.dtype is None and not self._header():
+            return
+        while True:
+            data = self.f.read(self.chunk_bytes)
+            if not data:
+                return
+            self._tail = (self._tail + data[-TAIL_BYTES:])[-TAIL_BYTES:]
+            data = self._pending + data
+            end = data.rfind(b'\n') + 1
+            self._pending = data[end:]
+            if end and data[:end].strip():
+                yield parse_rows(data[:end], self.dtype)
+
+    def rewritten(self):
+        """
+        True if the file was replaced or rewritten (e.g. by a solver
+        restart) since it was read, rather than only appended to.
+        """
+        try:
+            st = os.stat(self.filename)
+        except OSError:
+            return False
+        if _identity(st) != self._opened:
+            return True
+        offset = self.f.tell()
+        if st.st_size < offset:
+            return True
+        seen = (st.st_size, st.st_mtime_ns)
+        if seen == self._seen or offset == 0:
+            return False
+        # appending never changes what has been read already: compare the
+        # bytes just before the read position with what was read there
+        start = max(0, offset - TAIL_BYTES)
+        self.f.seek(start)
+        tail = self.f.read(offset - start)
+        self.f.seek(offset)
+        if tail != self._tail:
+            return True
+        self._seen = seen
+        return False
+
+    def restart(self):
+        self.f.close()
+        self.f = open(self.filename, 'rb')
+        self._opened = _identity(os.fstat(self.f.fileno()))
+        self._seen = None
+        self._tail = b''
+        self.dtype = None
+        self._pending = b''
+
+    def finish(self):
+        """Rows of a last line without a trailing newline."""
+        if self._pending.strip() and self.dtype is not None:
+            rows = parse_rows(self._pending, self.dtype)
+            self._pending = b''
+            return rows
+        return None
+
+    def close(self):
+        self.f.close()
+
+
+def chunks(filename, chunk_bytes=CHUNK_BYTES):
+    """Record arrays of the rows of a CSV file, a block at a time."""
+    reader = _Reader(filename, chunk_bytes)
+    try:
+        for rows in reader.read():
+            yield rows
+        rows = reader.finish()
+        if rows is not None:
+            yield rows
+    finally:
+        reader.close()
+
+
+def load(filename, columns=None, chunk_bytes=CHUNK_BYTES):
+    """The whole file as one record array (optionally only some columns)."""
+    parts = []
+    for rows in chunks(filename, chunk_bytes):
+        parts.append(rows[list(columns)] if columns else rows)
+    if not parts:
+        raise ValueError('%s has no rows' % filename)
+    return np.concatenate(parts)
+
+
+def follow(filename, interval=1.0, timeout=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Record arrays of new rows as they are appended to a file.
+
+    Polls every `interval` seconds; stops after `timeout` seconds without
+    new rows, or without the file appearing (None: never). If the file is
+    rewritten or replaced (a solver restart), None is yielded and the rows are read again from the start:
+    everything received before the None is stale (see History.reset).
+    """
+    idle = 0.0
+    while not os.path.exists(filename):
+        if timeout is not None and idle >= timeout:
+            return
+        time.sleep(interval)
+        idle += interval
+    reader = _Reader(filename, chunk_bytes)
+    idle = 0.0
+    try:
+        while True:
+            if reader.rewritten():
+                reader.restart()
+                yield None
+            got = False
+            for rows in reader.read():
+                got = True
+                yield rows
+                # the caller may have taken a while: check before reading on
+                if reader.rewritten():
+                    break
+            if got:
+                idle = 0.0
+                continue
+            if timeout is not None and idle >= timeout:
+                rows = reader.finish()
+                if rows is not None:
+                    yield rows
+                return
+            time.sleep(interval)
+            idle += interval
+    finally:
+        reader.close()
+
+
+class History(object):
+    """
+    The rows of a history in at most `capacity` rows of memory.
+
+    Row r (counting from 0 over everything appended) is kept while the
+    stride divides r; each time the buffer fills up the stride doubles and
+    the rows that no longer qualify are dropped. The last row appended is
+    always available as `last`.
+    """
+
+    def __init__(self, dtype, capacity=4096):
+        self.capacity = capacity - capacity % 2
+        self.rows = np.empty(self.capacity, dtype=dtype)
+        self.count = 0
+        self.seen = 0
+        self.stride = 1
+        self.last = None
+
+    def append(self, rows):
+        if len(rows) == 0:
+            return
+        self.last = rows[-1].copy()
+        index = self.seen + np.arange(len(rows))
+        self.seen += len(rows)
+        while True:
+            keep = rows[index % self.stride == 0]
+            if self.count + len(keep) <= self.capacity:
+                self.rows[self.count:self.count + len(keep)] = keep
+                self.count += len(keep)
+                return
+            self._halve()
+
+    def reset(self):
+        """Forget every row, e.g. when follow() reports a rewritten file."""
+        self.count = 0
+        self.seen = 0
+        self.stride = 1
+        self.last = None
+
+    def _halve(self):
+        half = self.rows[:self.count:2].copy()
+        self.count = len(half)
+        self.rows[:self.count] = half
+        self.stride *= 2
+
+    def data(self):
+        """The kept rows (a view)."""
+        return self.rows[:self.count]
+
+
+def residual_columns(names):
+    return [name for name in names if name.startswith('Res_')]
+
+
+class ResidualPlot(object):
+    """
+    Residuals against iteration on one axes, one line per Res_* column;
+    update(history) only replaces the line data.
+    """
+
+    def __init__(self, names, x='Iteration', ax=None):
+        import matplotlib.pyplot as plt
+        self.x = x
+        self.columns = residual_columns(names)
+        if ax is None:
+            fig, ax = plt.subplots(figsize=(8, 5))
+        self.ax = ax
+        self.lines = [ax.plot([], [], label=name)[0] for name in self.columns]
+        ax.set_xlabel(x)
+        ax.set_ylabel('log10 residual')
+        ax.grid(True, alpha=0.3)
+        ax.legend(loc='upper right', fontsize='small')
+
+    def update(self, history):
+        rows = history.data()
+        if len(rows) == 0:
+            return
+        for line, name in zip(self.lines, self.columns):
+            line.set_data(rows[self.x], rows[name])
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.ax.set_title('%d iterations' % (int(history.last[self.x]) + 1))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('filename', nargs='?', default='../../sim_lab2/history1.vtk')
+    parser.add_argument('--follow', action='store_true',
+                        help='keep reading as the solver appends rows')
+    parser.add_argument('--interval', type=float, default=1.0)
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='stop following after this many idle seconds')
+    parser.add_argument('--capacity', type=int, default=4096,
+                        help='rows of history kept in memory')
+    parser.add_argument('--png', help='write the plot to a file instead of showing it')
+    args = parser.parse_args()
+
+    import matplotlib
+    if args.png:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    source = (follow(args.filename, args.interval, args.timeout) if args.follow
+              else chunks(args.filename))
+    history = plot = None
+    for rows in source:
+        if rows is None:
+            # the file was rewritten: the rows so far belong to another run
+            if history is not None:
+                history.reset()
+            continue
+        if history is None:
+            history = History(rows.dtype, args.capacity)
+            plot = ResidualPlot(rows.dtype.names)
+        elif rows.dtype != history.rows.dtype:
+            # the new run writes other columns
+            history = History(rows.dtype, args.capacity)
+            plot.ax.clear()
+            plot = ResidualPlot(rows.dtype.names, ax=plot.ax)
+        history.append(rows)
+        plot.update(history)
+        if args.follow and not args.png:
+            plt.pause(0.01)
+    if history is None or history.last is None:
+        sys.exit('%s has no rows' % args.filename)
+
+    print( '%d rows, %d kept (every %d)' % (history.seen, history.count, history.stride) )
+    for name in plot.columns:
+        print( '%-14s %10.4f' % (name, history.last[name]) )
+    if args.png:
+        plot.ax.figure.savefig(args.png, dpi=100)
+    else:
+        plt.show()
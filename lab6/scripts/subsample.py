@@ -0,0 +1,352 @@
+"""
+Deterministic, spatially stratified point subsampling
+
+vtkMaskPoints with RandomModeOn() picks a different set of points on every
+run, and how well the picked points cover the data is luck: clumps and holes
+are common, and on a stretched grid the fine core gets most of the points.
+The modes here are deterministic (the same input gives the same indices) and
+spread the points out in space, all vectorized with NumPy:
+
+    'grid'       -- one point per cell of a uniform binning of the bounds,
+                    the one nearest the cell centre
+    'poisson'    -- no two points closer than a radius (Poisson-disk), with
+                    one candidate per cell of r/sqrt(3) and conflicts resolved
+                    by a parallel greedy independent set over a fixed
+                    pseudo-random priority
+    'importance' -- points drawn with probability proportional to the
+                    magnitude of an array, by systematic sampling along a
+                    Z-order curve so the draws are also spread in space
+
+Index sets are stored in the dataset cache (see datacache.py) of the file the
+data came from, keyed by the mode, its parameters and a hash of the points,
+so they are computed once per point set and parameters.
+
+    indices = subsample.indices(ugrid, 'grid', ratio=50)
+    subset = subsample.subset(ugrid, 'poisson', ratio=50)   # vtkPolyData
+"""
+
+import hashlib
+import sys
+import time
+import weakref
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+import datacache
+import gridconvert
+
+
+MODES = ('grid', 'poisson', 'importance')
+
+# points_digest() memo: {id(dataset): (points MTime, digest)}, and weak
+# references that drop an entry with its dataset
+_digests = {}
+_datasets = {}
+
+
+def dataset_points(dataset):
+    """(n, 3) point coordinates of a point set, rectilinear grid or image."""
+    if isinstance(dataset, (vtk.vtkRectilinearGrid, vtk.vtkImageData)):
+        return gridconvert.lattice_points(dataset)
+    return numpy_support.vtk_to_numpy(dataset.GetPoints().GetData()).astype(np.float64)
+
+
+def _cell_size(points, count):
+    # edge of a cube (square, segment) that holds count cells in the bounds
+    extent = points.max(axis=0) - points.min(axis=0)
+    varying = extent[extent > 0]
+    if not len(varying):
+        return 1.0
+    return (np.prod(varying) / max(count, 1)) ** (1.0 / len(varying))
+
+
+def _cells(points, size):
+    # integer cell coordinates of every point and the number of cells per axis
+    lower = points.min(axis=0)
+    ijk = np.floor((points - lower) / size).astype(np.int64)
+    return ijk, ijk.max(axis=0) + 1
+
+
+def _cell_keys(ijk, dims):
+    return (ijk[:, 2] * dims[1] + ijk[:, 1]) * dims[0] + ijk[:, 0]
+
+
+def grid_binned(points, count):
+    """
+    Indices of one point per occupied cell of a uniform binning into about
+    `count` cells: the point nearest the cell's centre.
+    """
+    size = _cell_size(points, count)
+    ijk, dims = _cells(points, size)
+    centres = points.min(axis=0) + (ijk + 0.5) * size
+    distance = np.einsum('ij,ij->i', points - centres, points - centres)
+    keys = _cell_keys(ijk, dims)
+    order = np.lexsort((np.arange(len(points)), distance, keys))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = keys[order][1:] != keys[order][:-1]
+    return np.sort(order[first])
+
+
+def poisson_disk(points, radius, seed=0):
+    """
+    Indices of points no two of which are closer than `radius`, maximal
+    among the per-cell candidates.
+
+    The bounds are binned into cells of radius/sqrt(3), which can hold at
+    most one chosen point; each cell proposes its highest priority point.
+    Candidates then decide in parallel rounds: a candidate is chosen when no
+    undecided candidate within radius has a higher priority, and dropped
+    when a chosen one is within radius.
+    """
+    size = radius / np.sqrt(3)
+    ijk, dims = _cells(points, size)
+    priority = np.random.default_rng(seed).random(len(points))
+    keys = _cell_keys(ijk, dims)
+    order = np.lexsort((-priority, keys))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = keys[order][1:] != keys[order][:-1]
+    candidates = order[first]
+    cand_keys = keys[candidates]            # sorted
+    cand_ijk = ijk[candidates]
+    cand_points = points[candidates]
+    cand_priority = priority[candidates]
+
+    # pairs of candidates closer than radius: they can only be in cells up to
+    # two apart, and each pair is found once from the half of the offsets
+    r = np.arange(-2, 3)
+    offsets = np.stack(np.meshgrid(r, r, r, indexing='ij'), -1).reshape(-1, 3)
+    offsets = offsets[_cell_keys(offsets, (5, 5, 5)) > 0]
+    first, second = [], []
+    for offset in offsets:
+        nijk = cand_ijk + offset
+        valid = np.all((nijk >= 0) & (nijk < dims), axis=1)
+        nkeys = _cell_keys(np.where(valid[:, None], nijk, 0), dims)
+        pos = np.minimum(np.searchsorted(cand_keys, nkeys), len(cand_keys) - 1)
+        valid &= cand_keys[pos] == nkeys
+        d = cand_points[pos] - cand_points
+        near = np.flatnonzero(valid & (np.einsum('ij,ij->i', d, d) < radius * radius))
+        first.append(near)
+        second.append(pos[near])
+    # every edge points from the lower to the higher priority candidate
+    a = np.concatenate(first)
+    b = np.concatenate(second)
+    swap = cand_priority[a] > cand_priority[b]
+    low = np.where(swap, b, a)
+    high = np.where(swap, a, b)
+
+    UNDECIDED, CHOSEN, DROPPED = 0, 1, 2
+    state = np.zeros(len(candidates), dtype=np.int8)
+    while True:
+        # chosen: no undecided neighbour of higher priority
+        beaten = np.zeros(len(candidates), dtype=bool)
+        beaten[low[state[high] == UNDECIDED]] = True
+        state[(state == UNDECIDED) & ~beaten] = CHOSEN
+        # dropped: a chosen neighbour
+        for u, v in ((low, high), (high, low)):
+            hit = u[(state[v] == CHOSEN) & (state[u] == UNDECIDED)]
+            state[hit] = DROPPED
+        keep = (state[low] == UNDECIDED) & (state[high] == UNDECIDED)
+        if not (state == UNDECIDED).any():
+            break
+        low, high = low[keep], high[keep]
+    return np.sort(candidates[state == CHOSEN])
+
+
+def _morton(ijk):
+    # Z-order key of (n, 3) cell coordinates below 2**21
+    key = np.zeros(len(ijk), dtype=np.uint64)
+    for a in range(3):
+        v = ijk[:, a].astype(np.uint64)
+        v = (v | v << np.uint64(32)) & np.uint64(0x1f00000000ffff)
+        v = (v | v << np.uint64(16)) & np.uint64(0x1f0000ff0000ff)
+        v = (v | v << np.uint64(8)) & np.uint64(0x100f00f00f00f00f)
+        v = (v | v << np.uint64(4)) & np.uint64(0x10c30c30c30c30c3)
+        v = (v | v << np.uint64(2)) & np.uint64(0x1249249249249249)
+        key |= v << np.uint64(a)
+    return key
+
+
+def importance(points, weights, count):
+    """
+    Indices of about `count` points drawn with probability proportional to
+    `weights` (systematic sampling along a Z-order curve through the
+    bounds, so no random numbers are involved and the draws are spread out).
+    """
+    # 2**20 cells along every axis that varies, so planar and line data get
+    # the full resolution of the curve too
+    lower = points.min(axis=0)
+    extent = points.max(axis=0) - lower
+    scale = np.zeros(3)
+    scale[extent > 0] = ((1 << 20) - 1) / extent[extent > 0]
+    ijk = ((points - lower) * scale).astype(np.int64)
+    order = np.argsort(_morton(ijk), kind='stable')
+    cumulative = np.cumsum(np.asarray(weights, dtype=np.float64)[order])
+    total = cumulative[-1]
+    if total <= 0:
+        return np.sort(order[np.linspace(0, len(order) - 1, count).astype(np.intp)])
+    targets = (np.arange(count) + 0.5) * (total / count)
+    picked = np.searchsorted(cumulative, targets)
+    return np.unique(order[np.minimum(picked, len(order) - 1)])
+
+
+def _weight_array(dataset, array):
+    # the named point array, or the active vectors, else the active scalars
+    data = dataset.GetPointData()
+    if array is None:
+        values = data.GetVectors() or data.GetScalars()
+    else:
+        values = data.GetArray(array)
+    if values is None:
+        raise KeyError('no point array %r for importance sampling' % array)
+    return values
+
+
+def _weights(values, power):
+    values = numpy_support.vtk_to_numpy(values)
+    if values.ndim == 2:
+        values = np.sqrt(np.einsum('ij,ij->i', values, values))
+    return np.abs(values) ** power
+
+
+def indices(dataset, mode='grid', ratio=None, count=None, radius=None,
+            array=None, power=1.0, seed=0, cache=True):
+    """
+    Sorted indices of the chosen points of `dataset`.
+
+    mode   -- 'grid', 'poisson' or 'importance'
+    ratio  -- keep about one point in `ratio` (like vtkMaskPoints' OnRatio)
+    count  -- or: keep about `count` points
+    radius -- 'poisson' only: minimum distance (default: from the count)
+    array  -- 'importance' only: point array whose magnitude weighs the
+              points (default: the active vectors, else scalars)
+    power  -- 'importance' only: weights are magnitude**power
+    seed   -- 'poisson' only: seed of the fixed candidate priorities
+    cache  -- keep the index set in the dataset cache when the dataset came
+              from it (True for the default cache, or a DatasetCache)
+    """
+    if mode not in MODES:
+        raise ValueError('mode must be one of %s, not %r' % (', '.join(MODES), mode))
+    n = dataset.GetNumberOfPoints()
+    if count is None:
+        count = max(1, n // (ratio or 1))
+    if mode == 'importance':
+        weights = _weight_array(dataset, array)
+
+    def compute():
+        points = dataset_points(dataset)
+        if mode == 'grid':
+            return grid_binned(points, count)
+        if mode == 'poisson':
+            # a radius of 0.8 binning cells keeps close to `count` points
+            return poisson_disk(points, radius or 0.8 * _cell_size(points, count), seed)
+        return importance(points, _weights(weights, power), count)
+
+    digest = datacache.source_digest(dataset)
+    if not cache or digest is None:
+        return compute()
+    if cache is True:
+        cache = datacache.default_cache()
+    # the key names the point set itself, not only the file it came from
+    params = [mode, 'n%d' % count, 'p%d' % n, points_digest(dataset)]
+    if mode == 'poisson':
+        params += ['r%r' % radius, 's%d' % seed]
+    elif mode == 'importance':
+        params += ['a%s' % weights.GetName(), 'p%r' % power]
+    ids = cache.array(digest, 'subsample_' + '_'.join(params), compute)
+    if len(ids) and (ids[-1] >= n or ids[0] < 0):
+        # stored for another point set: do not trust it
+        return compute()
+    return ids
+
+
+def points_digest(dataset):
+    """
+    Short hash of the point coordinates of a dataset.
+
+    Rectilinear grids and images hash their axes; point sets hash their
+    points once and reuse the hash until the points are modified.
+    """
+    if isinstance(dataset, (vtk.vtkRectilinearGrid, vtk.vtkImageData)):
+        h = hashlib.blake2b(digest_size=8)
+        for axis in gridconvert.axis_coordinates(dataset):
+            h.update(np.ascontiguousarray(axis).tobytes())
+            h.update(b'|')
+        return h.hexdigest()
+
+    # one digest per dataset, dropped with the dataset
+    did = id(dataset)
+    if did not in _datasets:
+        _datasets[did] = weakref.ref(dataset, lambda ref, did=did: _forget(did))
+    stamp = dataset.GetPoints().GetMTime()
+    if _digests.get(did, (None,))[0] != stamp:
+        h = hashlib.blake2b(digest_size=8)
+        h.update(np.ascontiguousarray(dataset_points(dataset)).tobytes())
+        _digests[did] = (stamp, h.hexdigest())
+    return _digests[did][1]
+
+
+def _forget(did):
+    _datasets.pop(did, None)
+    _digests.pop(did, None)
+
+
+def extract(dataset, ids):
+    """vtkPolyData of the points `ids` of a dataset, with their point data."""
+    ids = np.asarray(ids, dtype=np.intp)
+    points = vtk.vtkPoints()
+    points.SetData(numpy_support.numpy_to_vtk(
+        np.ascontiguousarray(dataset_points(dataset)[ids]), deep=True))
+    polydata = vtk.vtkPolyData()
+    polydata.SetPoints(points)
+
+    source = dataset.GetPointData()
+    target = polydata.GetPointData()
+    active = {'scalars': source.GetScalars(), 'vectors': source.GetVectors()}
+    for i in range(source.GetNumberOfArrays()):
+        array = source.GetArray(i)
+        if array is None:
+            continue
+        values = numpy_support.vtk_to_numpy(array)[ids]
+        copy = numpy_support.numpy_to_vtk(np.ascontiguousarray(values), deep=True,
+                                          array_type=array.GetDataType())
+        copy.SetName(array.GetName())
+        target.AddArray(copy)
+    for kind, array in active.items():
+        if array is not None and array.GetName():
+            getattr(target, 'SetActive' + kind.capitalize())(array.GetName())
+    return polydata
+
+
+def subset(dataset, mode='grid', **options):
+    """The chosen points as vtkPolyData (see indices() for the options)."""
+    return extract(dataset, indices(dataset, mode, **options))
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    ratio = 50
+
+    rng = np.random.default_rng(0)
+    points = rng.random((n, 3)) ** 2          # clustered towards one corner
+    polydata = vtk.vtkPolyData()
+    vtkPoints = vtk.vtkPoints()
+    vtkPoints.SetData(numpy_support.numpy_to_vtk(points, deep=True))
+    polydata.SetPoints(vtkPoints)
+    weights = numpy_support.numpy_to_vtk(np.exp(-8 * points[:, 0]), deep=True)
+    weights.SetName('weights')
+    polydata.GetPointData().SetScalars(weights)
+
+    start = time.perf_counter()
+    mask = vtk.vtkMaskPoints()
+    mask.SetOnRatio(ratio)
+    mask.RandomModeOn()
+    mask.SetInputData(polydata)
+    mask.Update()
+    print( '%-12s %6d points %7.3f s' % ('vtkMaskPoints', mask.GetOutput().GetNumberOfPoints(),
+                                       time.perf_counter() - start) )
+    for mode in MODES:
+        start = time.perf_counter()
+        ids = indices(polydata, mode, ratio=ratio, cache=False)
+        print( '%-12s %6d points %7.3f s' % (mode, len(ids), time.perf_counter() - start) )
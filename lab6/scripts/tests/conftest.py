@@ -0,0 +1,52 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import vtk
+from vtk.util import numpy_support
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# the helpers live next to the scripts in lab6/scripts
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+DATA = os.path.join(HERE, '..', '..', 'data')
+SIM_LAB2 = os.path.join(HERE, '..', '..', '..', 'sim_lab2')
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """A fresh dataset cache, also used as the default one."""
+    import datacache
+    monkeypatch.setenv('SCICOMPVIZ_CACHE', str(tmp_path / 'cache'))
+    monkeypatch.setattr(datacache, '_default', None)
+    return datacache.default_cache()
+
+
+def stretched_grid(n=20, seed=0):
+    """Rectilinear grid on random axes with random 'vectors' and 'field'."""
+    rng = np.random.default_rng(seed)
+    grid = vtk.vtkRectilinearGrid()
+    grid.SetDimensions(n, n + 3, n - 4)
+    coords = [np.cumsum(rng.uniform(0.5, 1.5, d)) for d in grid.GetDimensions()]
+    for setter, c in zip((grid.SetXCoordinates, grid.SetYCoordinates,
+                          grid.SetZCoordinates), coords):
+        setter(numpy_support.numpy_to_vtk(c, deep=True))
+    npts = grid.GetNumberOfPoints()
+    vectors = numpy_support.numpy_to_vtk(rng.random((npts, 3)), deep=True)
+    vectors.SetName('vectors')
+    grid.GetPointData().SetVectors(vectors)
+    scalars = numpy_support.numpy_to_vtk(rng.random(npts), deep=True)
+    scalars.SetName('field')
+    grid.GetPointData().SetScalars(scalars)
+    return grid, coords
+
+
+def polydata(points):
+    """vtkPolyData of (m, 3) points, without cells."""
+    vtkPoints = vtk.vtkPoints()
+    vtkPoints.SetData(numpy_support.numpy_to_vtk(points, deep=True))
+    result = vtk.vtkPolyData()
+    result.SetPoints(vtkPoints)
+    return result
@@ -0,0 +1,90 @@
+import gc
+import os
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+import contourcache
+import contouring
+from conftest import DATA
+
+
+def image():
+    reader = vtk.vtkXMLImageDataReader()
+    reader.SetFileName(os.path.join(DATA, 'challenge_2.vti'))
+    reader.Update()
+    return reader.GetOutput()
+
+
+def points(polydata):
+    values = numpy_support.vtk_to_numpy(polydata.GetPoints().GetData())
+    return values[np.lexsort(values.T[::-1])]
+
+
+def test_levels_match_direct_contouring():
+    data = image()
+    value_range = data.GetPointData().GetScalars().GetRange()
+    cache = contourcache.ContourCache()
+    values = contourcache.generate_values(9, value_range)
+    levels = cache.levels(data, n=9, value_range=value_range)
+    assert len(levels) == 9
+    for value, level in zip(values, levels):
+        direct = contouring.contour_image(data, values=[value])
+        assert level.GetNumberOfCells() == direct.GetNumberOfCells()
+        if direct.GetNumberOfPoints():
+            np.testing.assert_allclose(points(level), points(direct))
+    whole = contouring.contour_image(data, n=9, value_range=value_range)
+    assert cache.contour(data, n=9, value_range=value_range).GetNumberOfCells() == \
+        whole.GetNumberOfCells()
+
+
+def test_refine_and_coarsen_reuse_levels():
+    data = image()
+    value_range = data.GetPointData().GetScalars().GetRange()
+    cache = contourcache.ContourCache()
+    n = 17
+    cache.levels(data, n=n, value_range=value_range)
+    misses = cache.misses
+    fine = contourcache.refine(n)
+    cache.levels(data, n=fine, value_range=value_range)
+    assert cache.misses - misses == fine - n
+    misses = cache.misses
+    for m in (contourcache.coarsen(fine), contourcache.coarsen(n), n):
+        cache.levels(data, n=m, value_range=value_range)
+    assert cache.misses == misses
+    assert contourcache.coarsen(contourcache.refine(n)) == n
+    assert contourcache.coarsen(4) == 4
+
+
+def test_changed_scalars_are_recontoured():
+    data = image()
+    value_range = data.GetPointData().GetScalars().GetRange()
+    cache = contourcache.ContourCache()
+    before = cache.dataset_hash(data)
+    cache.levels(data, n=5, value_range=value_range)
+    scalars = numpy_support.vtk_to_numpy(data.GetPointData().GetScalars())
+    scalars[:] = scalars[::-1]
+    data.GetPointData().GetScalars().Modified()
+    assert cache.dataset_hash(data) != before
+    misses = cache.misses
+    cache.levels(data, n=5, value_range=value_range)
+    assert cache.misses == misses + 5
+
+
+def test_digests_dropped_with_the_dataset():
+    cache = contourcache.ContourCache()
+    data = image()
+    cache.dataset_hash(data)
+    assert cache._digests
+    del data
+    gc.collect()
+    assert not cache._digests and not cache._datasets
+
+
+def test_eviction_keeps_the_size_limit():
+    data = image()
+    value_range = data.GetPointData().GetScalars().GetRange()
+    cache = contourcache.ContourCache(max_bytes=1)
+    cache.levels(data, n=5, value_range=value_range)
+    assert len(cache) == 1
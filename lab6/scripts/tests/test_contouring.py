@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pytest
+import vtk
+from vtk.util import numpy_support
+
+import contouring
+from conftest import DATA
+
+
+def read(name):
+    reader = vtk.vtkXMLImageDataReader()
+    reader.SetFileName(os.path.join(DATA, name))
+    reader.Update()
+    return reader.GetOutput()
+
+
+def sorted_points(polydata):
+    values = numpy_support.vtk_to_numpy(polydata.GetPoints().GetData())
+    return values[np.lexsort(values.T[::-1])]
+
+
+@pytest.mark.parametrize('name', ['challenge_0.vti', 'challenge_1.vti', 'challenge_2.vti'])
+def test_direct_matches_the_geometry_route(name):
+    image = read(name)
+    value_range = image.GetPointData().GetScalars().GetRange(-1)
+    direct = contouring.contour_image(image, n=12, value_range=value_range)
+    geometry = contouring.contour_geometry(image, n=12, value_range=value_range)
+    assert direct.GetNumberOfCells() == geometry.GetNumberOfCells() > 0
+    # both merge the crossing points of shared edges
+    np.testing.assert_allclose(sorted_points(direct), sorted_points(geometry), atol=1e-5)
+
+
+def test_component_of_a_multi_component_array():
+    image = read('challenge_2.vti')
+    scalars = image.GetPointData().GetScalars()
+    if scalars.GetNumberOfComponents() == 1:
+        pytest.skip('single-component image')
+    # the same contour through the first component as a scalar array
+    single = vtk.vtkImageData()
+    single.CopyStructure(image)
+    first = numpy_support.numpy_to_vtk(
+        numpy_support.vtk_to_numpy(scalars)[:, 0].astype(np.float64), deep=True)
+    single.GetPointData().SetScalars(first)
+    values = [50.5, 120.5]
+    direct = contouring.contour_image(image, values=values, component=0)
+    expected = contouring.contour_geometry(single, values=values)
+    assert direct.GetNumberOfCells() == expected.GetNumberOfCells() > 0
+
+
+def test_volume_matches_contour_filter():
+    source = vtk.vtkRTAnalyticSource()
+    source.SetWholeExtent(-12, 12, -12, 12, -12, 12)
+    source.Update()
+    volume = source.GetOutput()
+    values = [120.0, 180.0, 220.0]
+    direct = contouring.contour_image(volume, values=values)
+    contour = vtk.vtkContourFilter()
+    contour.SetInputData(volume)
+    contouring.set_values(contour, values)
+    contour.Update()
+    expected = contour.GetOutput()
+    assert direct.GetNumberOfPolys() == expected.GetNumberOfPolys() > 0
+    np.testing.assert_allclose(sorted_points(direct), sorted_points(expected), atol=1e-4)
+
+
+def test_threads():
+    backend, threads = contouring.use_threads(2)
+    assert threads >= 1
+    assert backend == vtk.vtkSMPTools().GetBackend()
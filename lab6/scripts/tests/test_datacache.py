@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+import datacache
+import derived
+import gridconvert
+from conftest import DATA
+
+WIND = os.path.join(DATA, 'wind_image.vti')
+
+
+def point_arrays(dataset):
+    pointData = dataset.GetPointData()
+    return dict((pointData.GetArrayName(i), numpy_support.vtk_to_numpy(pointData.GetArray(i)))
+                for i in range(pointData.GetNumberOfArrays()))
+
+
+def sub_block(dataset):
+    # a filter output that inherits the field data (and so the digest tag)
+    voi = vtk.vtkExtractVOI()
+    voi.SetInputData(dataset)
+    voi.SetVOI(2, 11, 3, 12, 1, 5)
+    voi.Update()
+    return voi.GetOutput()
+
+
+def test_cached_load_matches_reader(cache):
+    parsed = datacache.parse(WIND)
+    for i in range(2):
+        loaded = cache.load(WIND)
+        assert loaded.GetDimensions() == parsed.GetDimensions()
+        assert loaded.GetBounds() == parsed.GetBounds()
+        expected = point_arrays(parsed)
+        got = point_arrays(loaded)
+        for name in expected:
+            np.testing.assert_array_equal(got[name], expected[name])
+        assert datacache.source_digest(loaded) == cache.digest(WIND)
+
+
+def test_digest_is_not_inherited_by_filter_outputs(cache):
+    grid = cache.load(WIND)
+    assert datacache.source_digest(sub_block(grid)) is None
+    # a copy with the same points and cells is still the loaded dataset
+    assert datacache.source_digest(gridconvert.to_unstructured(grid)) is not None
+
+
+def test_derived_fields_of_a_sub_block(cache):
+    grid = cache.load(WIND)
+    grid.GetPointData().SetActiveVectors('wind_velocity')
+    fields = derived.DerivedFields('wind_velocity', store=cache)
+    fields.compute(grid, 'vorticity')                   # stored on disk
+
+    block = sub_block(grid)
+    expected = derived.DerivedFields('wind_velocity').compute(block, 'vorticity')
+    for store in (cache, None):
+        values = derived.DerivedFields('wind_velocity', store=store).compute(block, 'vorticity')
+        np.testing.assert_array_equal(values, expected)
+    fields.attach(block, 'magnitude')
+    assert block.GetPointData().GetArray('magnitude').GetNumberOfTuples() == 500
+
+
+def test_derived_array_cache(cache):
+    digest = cache.digest(WIND)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return np.arange(10.0)
+
+    for i in range(2):
+        np.testing.assert_array_equal(cache.array(digest, 'test', compute), np.arange(10.0))
+    assert len(calls) == 1
@@ -0,0 +1,79 @@
+import gc
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+import derived
+import gridconvert
+import streamlines
+
+
+def vtk_gradient(grid):
+    gradient = vtk.vtkGradientFilter()
+    gradient.SetInputData(grid)
+    gradient.SetInputArrayToProcess(0, 0, 0, 0, 'vectors')
+    gradient.SetComputeVorticity(True)
+    gradient.SetComputeDivergence(True)
+    gradient.SetComputeQCriterion(True)
+    gradient.Update()
+    pointData = gradient.GetOutput().GetPointData()
+    return dict((name, numpy_support.vtk_to_numpy(pointData.GetArray(name)))
+                for name in ('Vorticity', 'Divergence', 'Q-criterion'))
+
+
+FIELDS = (('vorticity', 'Vorticity'), ('divergence', 'Divergence'),
+          ('q_criterion', 'Q-criterion'))
+
+
+def linear_field(grid):
+    # every difference quotient of a linear field is exact, on any spacing
+    A = np.array([[0.3, -1.2, 0.5], [0.9, -0.1, 0.4], [-0.7, 0.2, 0.6]])
+    points = numpy_support.vtk_to_numpy(gridconvert.to_unstructured(grid).GetPoints().GetData())
+    array = numpy_support.numpy_to_vtk(points @ A.T + [1.0, 2.0, 3.0], deep=True)
+    array.SetName('vectors')
+    grid.GetPointData().SetVectors(array)
+    return grid
+
+
+def test_fields_match_vtk_gradient_filter():
+    grid = linear_field(streamlines.swirling_jet(12))
+    expected = vtk_gradient(grid)
+    fields = derived.DerivedFields()
+    n = grid.GetNumberOfPoints()
+    for ours, name in FIELDS:
+        np.testing.assert_allclose(fields.compute(grid, ours).reshape(n, -1),
+                                   expected[name].reshape(n, -1), atol=1e-9)
+
+
+def test_fields_close_to_vtk_gradient_filter():
+    grid = streamlines.swirling_jet(24)
+    expected = vtk_gradient(grid)
+    fields = derived.DerivedFields()
+    n = grid.GetNumberOfPoints()
+    # central differences inside and one-sided at the boundary in both; they
+    # differ in how the boundary differences weight stretched spacing
+    for ours, name in FIELDS:
+        values = fields.compute(grid, ours).reshape(n, -1)
+        reference = expected[name].reshape(n, -1)
+        assert np.abs(values - reference).max() < 0.1 * np.abs(reference).max()
+
+    vectors = numpy_support.vtk_to_numpy(grid.GetPointData().GetVectors())
+    np.testing.assert_allclose(fields.compute(grid, 'magnitude').ravel(),
+                               np.linalg.norm(vectors, axis=1))
+
+
+def test_cache_follows_the_array_and_the_grid():
+    grid = streamlines.swirling_jet(12)
+    fields = derived.DerivedFields()
+    first = fields.compute(grid, 'magnitude')
+    assert fields.compute(grid, 'magnitude') is first
+
+    vectors = numpy_support.vtk_to_numpy(grid.GetPointData().GetVectors())
+    vectors *= 2
+    grid.GetPointData().GetVectors().Modified()
+    np.testing.assert_allclose(fields.compute(grid, 'magnitude'), 2 * first)
+
+    del grid, vectors
+    gc.collect()
+    assert not fields._cache and not fields._grids
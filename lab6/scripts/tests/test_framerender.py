@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+import framerender
+
+# off-screen contexts without an X display
+os.environ.setdefault('VTK_DEFAULT_OPENGL_WINDOW', 'vtkEGLRenderWindow')
+
+SIZE = (80, 60)
+
+
+def png(filename):
+    reader = vtk.vtkPNGReader()
+    reader.SetFileName(filename)
+    reader.Update()
+    return numpy_support.vtk_to_numpy(reader.GetOutput().GetPointData().GetScalars())
+
+
+def hand_wired(first, step, i, n):
+    # the manual route: a window, the demo framed at the first step and
+    # drawn at `step`, a window grab
+    renderer = vtk.vtkRenderer()
+    renderer.SetBackground(0.5, 0.5, 0.5)
+    renderWindow = vtk.vtkRenderWindow()
+    renderWindow.SetOffScreenRendering(1)
+    renderWindow.SetSize(SIZE)
+    renderWindow.AddRenderer(renderer)
+    update = framerender.demo(renderer)
+    update(first)
+    renderer.ResetCamera()
+    update(step)
+    camera = renderer.GetActiveCamera()
+    camera.Azimuth(360.0 * i / n)
+    renderer.ResetCameraClippingRange()
+    renderWindow.Render()
+    grab = vtk.vtkWindowToImageFilter()
+    grab.SetInput(renderWindow)
+    grab.ReadFrontBufferOff()
+    grab.Update()
+    pixels = numpy_support.vtk_to_numpy(grab.GetOutput().GetPointData().GetScalars())
+    renderWindow.Finalize()
+    return pixels.copy()
+
+
+def test_frames_match_the_hand_wired_pipeline(tmp_path):
+    pattern = str(tmp_path / 'frames' / 'frame_%04d.png')
+    steps = [0, 10, 20, 30]
+    fps = framerender.render('demo', steps, pattern, SIZE, framerender.Orbit())
+    assert fps > 0
+    for i, step in enumerate(steps):
+        pixels = png(pattern % i)
+        assert pixels.shape[0] == SIZE[0] * SIZE[1]
+        expected = hand_wired(steps[0], step, i, len(steps))
+        assert np.abs(pixels.astype(int) - expected[:, :pixels.shape[1]]).max() <= 1
+    assert len(set(png(pattern % i).tobytes() for i in range(4))) == 4
+
+
+def test_workers_write_the_same_frames(tmp_path):
+    one = str(tmp_path / 'one_%02d.png')
+    two = str(tmp_path / 'two_%02d.png')
+    framerender.render('demo', 5, one, SIZE, framerender.Orbit(90), workers=1)
+    framerender.render('demo', 5, two, SIZE, framerender.Orbit(90), workers=2)
+    for i in range(5):
+        np.testing.assert_array_equal(png(one % i), png(two % i))
+
+
+def test_orbit_is_independent_of_the_order():
+    base = vtk.vtkCamera()
+    base.SetPosition(0, 0, 5)
+    path = framerender.Orbit(180.0, elevation=20.0)
+    first, again = vtk.vtkCamera(), vtk.vtkCamera()
+    path(first, base, 3, 8)
+    path(again, base, 7, 8)
+    path(again, base, 3, 8)
+    np.testing.assert_allclose(first.GetPosition(), again.GetPosition())
+    np.testing.assert_allclose(first.GetViewUp(), again.GetViewUp())
+
+
+def test_record_an_existing_window(tmp_path):
+    renderer = vtk.vtkRenderer()
+    renderWindow = vtk.vtkRenderWindow()
+    renderWindow.SetOffScreenRendering(1)
+    renderWindow.SetSize(SIZE)
+    renderWindow.AddRenderer(renderer)
+    framerender.demo(renderer)(5)
+    renderer.ResetCamera()
+    pattern = str(tmp_path / 'rec' / 'f%d.png')
+    assert framerender.record(renderWindow, pattern, 3) > 0
+    renderWindow.Finalize()
+    assert sorted(os.listdir(str(tmp_path / 'rec'))) == ['f0.png', 'f1.png', 'f2.png']
+    assert framerender.load_setup('framerender:demo') is framerender.demo
@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+import glyphs
+import interpolate
+from conftest import DATA
+
+
+def wind():
+    reader = vtk.vtkXMLImageDataReader()
+    reader.SetFileName(os.path.join(DATA, 'wind_image.vti'))
+    reader.Update()
+    return reader.GetOutput()
+
+
+def test_levels_sample_the_grid():
+    grid = wind()
+    arrows = glyphs.VectorGlyphs(grid, 'wind_velocity')
+    counts = [arrows.samples(level)[0].GetNumberOfPoints() for level in range(3)]
+    # the densest level has an arrow for every grid point
+    assert counts[0] == grid.GetNumberOfPoints()
+    assert counts[0] > counts[1] > counts[2] > 0
+    samples = arrows.samples(0)[0]
+    points = numpy_support.vtk_to_numpy(samples.GetPoints().GetData())
+    expected = interpolate.Interpolator(grid).sample(points, 'wind_velocity')
+    np.testing.assert_allclose(
+        numpy_support.vtk_to_numpy(samples.GetPointData().GetArray('wind_velocity')), expected)
+    np.testing.assert_allclose(
+        numpy_support.vtk_to_numpy(samples.GetPointData().GetArray('magnitude')),
+        np.linalg.norm(expected, axis=1))
+
+
+def test_level_follows_the_camera():
+    grid = wind()
+    arrows = glyphs.VectorGlyphs(grid, 'wind_velocity')
+    renderer = vtk.vtkRenderer()
+    renderer.AddActor(arrows.actor)
+    renderer.ResetCamera()
+    camera = renderer.GetActiveCamera()
+    assert arrows.level_for(camera) == 0
+    levels = []
+    for distance in (1.0, 3.0, 6.0):
+        camera.SetPosition(arrows.center + [0, 0, distance * arrows.diagonal])
+        levels.append(arrows.level_for(camera))
+    assert levels == [0, 1, 2]
+    arrows.set_level(levels[-1])
+    assert arrows.count() == arrows.samples(2)[0].GetNumberOfPoints()
+
+
+def test_optional_cap():
+    grid = wind()
+    arrows = glyphs.VectorGlyphs(grid, 'wind_velocity', max_fraction=0.1)
+    count = arrows.samples(0)[0].GetNumberOfPoints()
+    assert 0.05 * grid.GetNumberOfPoints() < count <= 0.1 * grid.GetNumberOfPoints()
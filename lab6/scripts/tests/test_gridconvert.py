@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pytest
+import vtk
+from vtk.util import numpy_support
+
+import gridconvert
+import streamlines
+from conftest import DATA
+
+
+def cells(ugrid):
+    types = np.array([ugrid.GetCellType(i) for i in range(ugrid.GetNumberOfCells())])
+    return (types,
+            numpy_support.vtk_to_numpy(ugrid.GetCells().GetOffsetsArray()),
+            numpy_support.vtk_to_numpy(ugrid.GetCells().GetConnectivityArray()))
+
+
+def wind():
+    reader = vtk.vtkXMLImageDataReader()
+    reader.SetFileName(os.path.join(DATA, 'wind_image.vti'))
+    reader.Update()
+    return reader.GetOutput()
+
+
+def plane():
+    image = vtk.vtkImageData()
+    image.SetDimensions(7, 1, 5)
+    image.SetSpacing(0.5, 1.0, 2.0)
+    return image
+
+
+def line():
+    image = vtk.vtkImageData()
+    image.SetDimensions(1, 9, 1)
+    return image
+
+
+@pytest.mark.parametrize('make', [lambda: streamlines.swirling_jet(9), wind, plane, line])
+def test_numpy_matches_append_filter(make):
+    grid = make()
+    expected = gridconvert.to_unstructured(grid, 'append')
+    got = gridconvert.to_unstructured(grid)
+    np.testing.assert_allclose(numpy_support.vtk_to_numpy(got.GetPoints().GetData()),
+                               numpy_support.vtk_to_numpy(expected.GetPoints().GetData()))
+    for a, b in zip(cells(got), cells(expected)):
+        np.testing.assert_array_equal(a, b)
+    assert got.GetPointData().GetNumberOfArrays() == grid.GetPointData().GetNumberOfArrays()
+
+
+@pytest.mark.parametrize('dims', [(4, 3, 2), (4, 1, 3), (5, 1, 1)])
+def test_structured_grid_cells(dims):
+    # a sheared lattice: cells are hexahedra/quads, not voxels/pixels
+    k, j, i = np.meshgrid(*[np.arange(d, dtype=float) for d in dims[::-1]], indexing='ij')
+    xyz = np.column_stack((i.ravel() + 0.3 * j.ravel(), j.ravel(), k.ravel() + 0.2 * i.ravel()))
+    sgrid = vtk.vtkStructuredGrid()
+    sgrid.SetDimensions(dims)
+    points = vtk.vtkPoints()
+    points.SetData(numpy_support.numpy_to_vtk(xyz, deep=True))
+    sgrid.SetPoints(points)
+    ugrid = gridconvert.to_unstructured(sgrid)
+    assert gridconvert.dimensions(sgrid) == dims
+    assert ugrid.GetPoints().GetData() is sgrid.GetPoints().GetData()
+    for a, b in zip(cells(ugrid), cells(gridconvert.to_unstructured(sgrid, 'append'))):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        gridconvert.to_unstructured(plane(), 'vtk')
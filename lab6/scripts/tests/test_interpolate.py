@@ -0,0 +1,36 @@
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+import interpolate
+from conftest import polydata, stretched_grid
+
+
+def test_probe_matches_vtk_probe_filter():
+    grid, coords = stretched_grid()
+    rng = np.random.default_rng(1)
+    # some points outside the grid: zeros and a cleared valid mask
+    points = np.column_stack([rng.uniform(c[0] - 1, c[-1] + 1, 5000) for c in coords])
+    source = polydata(points)
+
+    probeFilter = vtk.vtkProbeFilter()
+    probeFilter.SetInputData(source)
+    probeFilter.SetSourceData(grid)
+    probeFilter.Update()
+    expected = probeFilter.GetOutput().GetPointData()
+
+    probed = interpolate.Interpolator(grid, workers=2).probe(source).GetPointData()
+    for name in ('vectors', 'field', 'vtkValidPointMask'):
+        np.testing.assert_allclose(
+            numpy_support.vtk_to_numpy(probed.GetArray(name)),
+            numpy_support.vtk_to_numpy(expected.GetArray(name)), atol=1e-6)
+
+
+def test_chunked_sample_matches_single_call():
+    grid, coords = stretched_grid(12)
+    rng = np.random.default_rng(2)
+    points = np.column_stack([rng.uniform(c[0], c[-1], interpolate.CHUNK + 100)
+                              for c in coords])
+    one = interpolate.Interpolator(grid, workers=1).sample(points)
+    many = interpolate.Interpolator(grid, workers=3).sample(points)
+    np.testing.assert_array_equal(one, many)
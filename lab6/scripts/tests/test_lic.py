@@ -0,0 +1,34 @@
+import numpy as np
+
+import lic
+import streamlines
+
+
+def test_tiles_match_one_pass():
+    rng = np.random.default_rng(2)
+    field = rng.normal(size=(37, 29, 2))
+    whole = lic.convolve(field, lic.noise((37, 29)), length=6)
+    np.testing.assert_allclose(lic.lic(field, length=6, workers=3, tile=8), whole)
+
+
+def test_uniform_flow_averages_along_rows():
+    h, w, length = 8, 40, 5
+    field = np.zeros((h, w, 2))
+    field[..., 0] = 1.0
+    texture = lic.noise((h, w))
+    out = lic.lic(field, length=length, workers=1)
+    # one pixel per step along +-x, stopping at the border
+    for j in (0, 3, 20, w - 1):
+        lo, hi = max(0, j - length), min(w - 1, j + length)
+        np.testing.assert_allclose(out[:, j], texture[:, lo:hi + 1].mean(axis=1))
+
+
+def test_slice_image():
+    grid = streamlines.swirling_jet(12)
+    image = lic.slice_lic(grid, 'vectors', axis=1, position=0.25, size=32, length=4)
+    dims = image.GetDimensions()
+    assert dims[1] == 1 and max(dims) == 32
+    bounds = grid.GetBounds()
+    assert image.GetOrigin()[1] == bounds[2] + 0.25 * (bounds[3] - bounds[2])
+    assert image.GetPointData().GetArray('lic').GetNumberOfTuples() == dims[0] * dims[2]
+    assert lic.texture_image(image).GetDimensions() == (dims[0], dims[2], 1)
@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pytest
+import vtk
+from vtk.util import numpy_support
+
+import plot3d
+from conftest import DATA
+
+XYZ = os.path.join(DATA, 'combxyz.bin')
+Q = os.path.join(DATA, 'combq.bin')
+
+
+def vtk_block(xyz, q, **layout):
+    reader = vtk.vtkMultiBlockPLOT3DReader()
+    reader.SetXYZFileName(xyz)
+    reader.SetQFileName(q)
+    if layout.get('byte_order') == '<':
+        reader.SetByteOrderToLittleEndian()
+    if layout.get('precision') == 8:
+        reader.DoublePrecisionOn()
+    reader.SetScalarFunctionNumber(100)
+    reader.SetVectorFunctionNumber(202)
+    reader.AddFunction(110)
+    reader.AddFunction(153)
+    reader.AddFunction(200)
+    reader.Update()
+    return reader.GetOutput().GetBlock(0)
+
+
+def assert_matches(pl3d, block, rtol):
+    ours = pl3d.structured_grid(0)
+    assert ours.GetExtent() == block.GetExtent()
+    np.testing.assert_allclose(
+        numpy_support.vtk_to_numpy(ours.GetPoints().GetData()),
+        numpy_support.vtk_to_numpy(block.GetPoints().GetData()), rtol=rtol)
+    for name in ('density', 'momentum', 'pressure', 'velocity_magnitude', 'velocity'):
+        np.testing.assert_allclose(
+            pl3d.variable(0, name).reshape(block.GetNumberOfPoints(), -1),
+            numpy_support.vtk_to_numpy(
+                block.GetPointData().GetArray(plot3d._VTK_NAMES[name])
+            ).reshape(block.GetNumberOfPoints(), -1),
+            rtol=rtol, atol=rtol)
+
+
+def test_combustor_matches_vtk_reader():
+    pl3d = plot3d.Plot3D(XYZ, Q)
+    assert pl3d.layout == {'byte_order': '>', 'record_markers': False,
+                           'multigrid': False, 'precision': 4, 'iblank': False}
+    assert_matches(pl3d, vtk_block(XYZ, Q), rtol=1e-4)
+    grid = pl3d.structured_grid(0)
+    assert grid.GetPoints().GetData().GetDataType() == vtk.VTK_FLOAT
+
+
+def test_double_precision_is_kept(tmp_path):
+    single = plot3d.Plot3D(XYZ, Q)
+    ni, nj, nk = single.dims[0]
+    xyz, q = str(tmp_path / 'x.bin'), str(tmp_path / 'q.bin')
+    # the combustor in little-endian double precision, with a coordinate
+    # offset that float32 would round away
+    with open(xyz, 'wb') as f:
+        np.array([ni, nj, nk], '<i4').tofile(f)
+        (single.coordinates(0).astype('<f8') + 1e-9).tofile(f)
+    with open(q, 'wb') as f:
+        np.array([ni, nj, nk], '<i4').tofile(f)
+        np.array([0.5, 0.1, 1e5, 0.0], '<f8').tofile(f)
+        single.q(0).astype('<f8').tofile(f)
+
+    pl3d = plot3d.Plot3D(xyz, q)
+    assert pl3d.layout['precision'] == 8 and pl3d.layout['byte_order'] == '<'
+    assert pl3d.conditions(0)['fsmach'] == 0.5
+    grid = pl3d.structured_grid(0)
+    assert grid.GetPoints().GetData().GetDataType() == vtk.VTK_DOUBLE
+    assert grid.GetPointData().GetScalars().GetDataType() == vtk.VTK_DOUBLE
+    assert_matches(pl3d, vtk_block(xyz, q, byte_order='<', precision=8), rtol=1e-12)
+
+
+def test_not_plot3d(tmp_path):
+    path = str(tmp_path / 'junk.bin')
+    with open(path, 'wb') as f:
+        f.write(b'not a plot3d file at all')
+    with pytest.raises(ValueError):
+        plot3d.Plot3D(path)
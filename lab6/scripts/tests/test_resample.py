@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+import vtk
+from vtk.util import numpy_support
+
+import resample
+from conftest import stretched_grid
+
+
+def arrays(image, name):
+    return numpy_support.vtk_to_numpy(image.GetPointData().GetArray(name))
+
+
+def test_resample_matches_vtk_probe_filter():
+    grid, coords = stretched_grid()
+    for dims in (None, (17, 9, 33)):
+        image = resample.to_image(grid, ['field', 'vectors'], dims=dims, workers=2)
+        probed = resample.probe(grid, dims)
+        assert image.GetDimensions() == probed.GetDimensions()
+        for name in ('field', 'vectors'):
+            np.testing.assert_allclose(
+                numpy_support.vtk_to_numpy(image.GetPointData().GetArray(name)),
+                numpy_support.vtk_to_numpy(probed.GetPointData().GetArray(name)),
+                atol=1e-6)
+
+
+def test_matches_probe_filter_on_the_image_points():
+    # resample.probe() is only a helper; check against the filter itself
+    grid, coords = stretched_grid(15, seed=4)
+    image = resample.to_image(grid, 'field', dims=(21, 11, 8), workers=1)
+    target = vtk.vtkImageData()
+    target.CopyStructure(image)
+    probeFilter = vtk.vtkProbeFilter()
+    probeFilter.SetInputData(target)
+    probeFilter.SetSourceData(grid)
+    probeFilter.Update()
+    np.testing.assert_allclose(arrays(image, 'field'),
+                               arrays(probeFilter.GetOutput(), 'field'), atol=1e-6)
+    assert image.GetPointData().GetScalars().GetName() == 'field'
+
+
+def test_image_covers_the_grid():
+    grid, coords = stretched_grid(10, seed=5)
+    image = resample.to_image(grid)
+    bounds = image.GetBounds()
+    np.testing.assert_allclose(bounds, grid.GetBounds(), rtol=1e-12)
+    assert image.GetDimensions() == grid.GetDimensions()
+    with pytest.raises(KeyError):
+        resample.to_image(grid, 'missing')
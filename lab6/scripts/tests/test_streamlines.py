@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+import vtk
+from vtk.util import numpy_support
+
+import derived
+import interpolate
+import streamlines
+
+
+def seeds(n=20):
+    # mid-way up the jet, so that the lines run both ways
+    rng = np.random.default_rng(0)
+    return np.column_stack([rng.uniform(-0.6, 0.6, n), np.full(n, 1.0),
+                            rng.uniform(-0.6, 0.6, n)])
+
+
+def helix(n=16, a=1.5):
+    # v = (a z, 1, -a x): a linear field, so every vorticity estimate is
+    # exact (0, 2a, 0) and the rotation of the normals can be compared
+    x, y, z = np.linspace(-1, 1, n), np.linspace(0, 3, n), np.linspace(-1, 1, n)
+    Z, Y, X = np.meshgrid(z, y, x, indexing='ij')
+    grid = vtk.vtkRectilinearGrid()
+    grid.SetDimensions(n, n, n)
+    for setter, c in zip((grid.SetXCoordinates, grid.SetYCoordinates,
+                          grid.SetZCoordinates), (x, y, z)):
+        setter(numpy_support.numpy_to_vtk(c, deep=True))
+    v = np.stack([a*Z, np.ones_like(X), -a*X], axis=-1).reshape(-1, 3)
+    array = numpy_support.numpy_to_vtk(v, deep=True)
+    array.SetName('vectors')
+    grid.GetPointData().SetVectors(array)
+    return grid
+
+
+def vtk_lines(grid, points, direction='forward', vorticity=False):
+    source = vtk.vtkPolyData()
+    vtkPoints = vtk.vtkPoints()
+    vtkPoints.SetData(numpy_support.numpy_to_vtk(np.asarray(points, dtype=float), deep=True))
+    source.SetPoints(vtkPoints)
+    tracer = vtk.vtkStreamTracer()
+    tracer.SetInputData(grid)
+    tracer.SetSourceData(source)
+    tracer.SetIntegratorTypeToRungeKutta45()
+    getattr(tracer, 'SetIntegrationDirectionTo' + direction.capitalize())()
+    tracer.SetMaximumPropagation(10)
+    tracer.SetComputeVorticity(vorticity)
+    tracer.Update()
+    return tracer.GetOutput()
+
+
+def by_seed(lines):
+    # {seed id: (m, 3) points} of every polyline
+    points = numpy_support.vtk_to_numpy(lines.GetPoints().GetData())
+    offsets = numpy_support.vtk_to_numpy(lines.GetLines().GetOffsetsArray())
+    ids = numpy_support.vtk_to_numpy(lines.GetLines().GetConnectivityArray())
+    seedIds = numpy_support.vtk_to_numpy(lines.GetCellData().GetArray('SeedIds'))
+    return dict((int(s), points[ids[a:b]])
+                for s, a, b in zip(seedIds, offsets[:-1], offsets[1:]))
+
+
+def distance_to_line(points, line):
+    a, d = line[:-1], np.diff(line, axis=0)
+    t = np.einsum('pij,ij->pi', points[:, None] - a, d) / np.maximum(
+        np.einsum('ij,ij->i', d, d), 1e-300)
+    nearest = a + np.clip(t, 0, 1)[..., None] * d
+    return np.linalg.norm(points[:, None] - nearest, axis=-1).min(axis=1)
+
+
+@pytest.mark.parametrize('method', ['rk4', 'rk45'])
+@pytest.mark.parametrize('direction', ['forward', 'backward', 'both'])
+def test_lines_follow_vtk_stream_tracer(method, direction):
+    grid = streamlines.swirling_jet(24)
+    tracer = streamlines.Tracer(grid, workers=2)
+    ours = by_seed(tracer.trace(seeds(), direction=direction, method=method,
+                                max_propagation=10))
+    reference = by_seed(vtk_lines(grid, seeds(), direction))
+    assert sorted(ours) == sorted(reference)
+    for seed, line in reference.items():
+        assert distance_to_line(line, ours[seed]).max() < 5e-3
+    assert tracer.stats['lines'] == len(ours)
+
+
+def test_vorticity_normals_match_vtk_stream_tracer():
+    grid = helix()
+    expected = vtk_lines(grid, [[0.3, 0.05, 0.1], [-0.2, 0.05, 0.4],
+                                [0.5, 0.05, -0.3]], vorticity=True)
+
+    # the vtkStreamTracer lines with only their velocities
+    lines = vtk.vtkPolyData()
+    lines.SetPoints(expected.GetPoints())
+    lines.SetLines(expected.GetLines())
+    lines.GetPointData().AddArray(expected.GetPointData().GetArray('vectors'))
+    vorticity = derived.DerivedFields().compute(grid, 'vorticity')
+    streamlines.vorticity_normals(lines, interpolate.Interpolator(
+        coords=streamlines.Tracer(grid).coords, arrays={'vorticity': vorticity}))
+
+    pointData = lines.GetPointData()
+    assert pointData.GetNormals().GetName() == 'Normals'
+    # rotation integrated with the trapezoidal rule over dt = ds/|v|
+    for name, tolerance in (('Vorticity', 1e-9), ('Rotation', 0.02),
+                            ('Normals', 0.02)):
+        np.testing.assert_allclose(
+            numpy_support.vtk_to_numpy(pointData.GetArray(name)),
+            numpy_support.vtk_to_numpy(expected.GetPointData().GetArray(name)),
+            atol=tolerance)
+    assert np.ptp(numpy_support.vtk_to_numpy(pointData.GetArray('Rotation'))) > 1
+
+
+def test_trace_with_vorticity_adds_normals():
+    grid = streamlines.swirling_jet(24)
+    vorticity = derived.DerivedFields().compute(grid, 'vorticity')
+    lines = streamlines.Tracer(grid).trace(seeds(5), direction='both',
+                                           vorticity=vorticity)
+    normals = numpy_support.vtk_to_numpy(lines.GetPointData().GetNormals())
+    assert len(normals) == lines.GetNumberOfPoints()
+    np.testing.assert_allclose(np.linalg.norm(normals, axis=1), 1.0, atol=1e-3)
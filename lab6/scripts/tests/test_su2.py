@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pytest
+
+import su2
+from conftest import SIM_LAB2
+
+MESH = os.path.join(SIM_LAB2, 'Mesh_1.su2')
+
+
+def reference(filename):
+    # the format read one line at a time with plain Python
+    with open(filename) as f:
+        lines = [line.split('%')[0].strip() for line in f]
+    lines = iter([line for line in lines if line])
+
+    def keyword(name):
+        key, value = next(lines).split('=')
+        assert key.strip() == name
+        return value.strip()
+
+    def elements(count):
+        rows = [next(lines).split() for i in range(count)]
+        types = [int(row[0]) for row in rows]
+        nodes = {3: 2, 5: 3, 9: 4, 10: 4, 12: 8, 13: 6, 14: 5}
+        cells = [[int(v) for v in row[1:1 + nodes[t]]] for t, row in zip(types, rows)]
+        return types, cells
+
+    ndime = int(keyword('NDIME'))
+    types, cells = elements(int(keyword('NELEM')))
+    npoin = int(keyword('NPOIN'))
+    points = np.zeros((npoin, 3))
+    for i in range(npoin):
+        row = next(lines).split()
+        index = int(row[ndime]) if len(row) > ndime else i
+        points[index, :ndime] = [float(v) for v in row[:ndime]]
+    markers = {}
+    for m in range(int(keyword('NMARK'))):
+        tag = keyword('MARKER_TAG')
+        markers[tag] = elements(int(keyword('MARKER_ELEMS')))
+    return ndime, types, cells, points, markers
+
+
+def cells_of(types, offsets, connectivity):
+    return list(types), [list(connectivity[a:b]) for a, b in zip(offsets[:-1], offsets[1:])]
+
+
+def test_matches_line_by_line_parser():
+    ndime, types, cells, points, markers = reference(MESH)
+    # small blocks, so that element and point rows span many of them
+    mesh = su2.read(MESH, cache=False, chunk_bytes=4096)
+    assert mesh.ndime == ndime
+    np.testing.assert_array_equal(mesh.points, points)
+    assert cells_of(mesh.types, mesh.offsets, mesh.connectivity) == (types, cells)
+    assert sorted(mesh.markers) == sorted(markers)
+    for tag, elements in markers.items():
+        assert cells_of(*mesh.markers[tag]) == elements
+
+    grid = mesh.unstructured_grid()
+    assert grid.GetNumberOfCells() == len(types)
+    assert grid.GetNumberOfPoints() == len(points)
+    assert mesh.marker_grid('Surface').GetNumberOfCells() == len(markers['Surface'][0])
+
+
+def test_cached_mesh_is_the_parsed_one(cache):
+    parsed = su2.read(MESH, cache=False)
+    for i in range(2):
+        mesh = su2.read(MESH, cache=cache)
+        np.testing.assert_array_equal(mesh.points, parsed.points)
+        np.testing.assert_array_equal(mesh.connectivity, parsed.connectivity)
+        assert sorted(mesh.markers) == sorted(parsed.markers)
+
+
+@pytest.mark.parametrize('edit', [
+    lambda text: text[:text.index('NMARK=')],
+    lambda text: text.replace('NMARK=', 'NMARKS='),
+    lambda text: text.replace('NPOIN=', 'NPOINT='),
+])
+def test_malformed_sections_raise(tmp_path, edit):
+    with open(MESH) as f:
+        text = f.read()
+    path = str(tmp_path / 'broken.su2')
+    with open(path, 'w') as f:
+        f.write(edit(text))
+    with pytest.raises(ValueError):
+        su2.parse(path)
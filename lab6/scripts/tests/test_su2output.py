@@ -0,0 +1,120 @@
+import csv
+import os
+import threading
+import time
+
+import numpy as np
+
+import su2output
+from conftest import SIM_LAB2
+
+HISTORY = os.path.join(SIM_LAB2, 'history1.vtk')
+SURFACE = os.path.join(SIM_LAB2, 'surface_flow1.csv')
+
+
+def reference(filename):
+    with open(filename) as f:
+        rows = list(csv.reader(f))
+    names = su2output.read_header(','.join(rows[0]))
+    return names, np.array([[float(v) for v in row] for row in rows[1:] if row])
+
+
+def test_load_matches_csv_module():
+    for filename in (HISTORY, SURFACE):
+        names, values = reference(filename)
+        # small blocks, so that rows are split across reads
+        rows = su2output.load(filename, chunk_bytes=1000)
+        assert list(rows.dtype.names) == names
+        for i, name in enumerate(names):
+            np.testing.assert_array_equal(rows[name], values[:, i])
+    assert su2output.load(HISTORY)['Iteration'].dtype == np.int64
+
+
+def test_history_keeps_every_stride_th_row():
+    rows = su2output.load(HISTORY)
+    history = su2output.History(rows.dtype, capacity=32)
+    for start in range(0, len(rows), 7):
+        history.append(rows[start:start + 7])
+    assert history.seen == len(rows)
+    assert history.count <= 32
+    np.testing.assert_array_equal(history.data(), rows[::history.stride])
+    assert history.last == rows[-1]
+
+    history.reset()
+    assert history.count == 0 and history.seen == 0 and history.last is None
+    history.append(rows[:5])
+    np.testing.assert_array_equal(history.data(), rows[:5])
+
+
+def test_follow_reports_a_rewritten_file(tmp_path):
+    path = str(tmp_path / 'history.csv')
+
+    def run(rows, first):
+        with open(path, 'w') as f:
+            f.write('"Iteration","Res_Flow[0]"\n')
+            for i in range(rows):
+                f.write('%d, %f\n' % (i, first - i))
+                f.flush()
+                time.sleep(0.02)
+
+    def solver():
+        run(6, 0.0)
+        time.sleep(0.3)
+        run(3, -10.0)
+
+    writer = threading.Thread(target=solver)
+    writer.start()
+    history = None
+    restarts = 0
+    try:
+        for rows in su2output.follow(path, interval=0.05, timeout=0.6):
+            if rows is None:
+                restarts += 1
+                history.reset()
+                continue
+            if history is None:
+                history = su2output.History(rows.dtype)
+            history.append(rows)
+    finally:
+        writer.join()
+    assert restarts == 1
+    np.testing.assert_array_equal(history.data()['Res_Flow[0]'], [-10, -11, -12])
+
+
+def write_history(path, iterations, mode='w'):
+    with open(path, mode) as f:
+        if mode == 'w':
+            f.write('"Iteration","Res_Flow[0]"\n')
+        for i in iterations:
+            f.write('%d, %f\n' % (i, -i))
+
+
+def test_follow_tells_appends_from_rewrites(tmp_path):
+    # the generator only polls when asked, so the writes land between polls
+    path = str(tmp_path / 'history.csv')
+    write_history(path, range(3))
+    rows = su2output.follow(path, interval=0.01, timeout=0.05)
+    assert list(next(rows)['Iteration']) == [0, 1, 2]
+
+    write_history(path, range(3, 5), mode='a')
+    assert list(next(rows)['Iteration']) == [3, 4]
+
+    # rewritten in place, longer than what was read before
+    write_history(path, range(100, 110))
+    assert next(rows) is None
+    assert list(next(rows)['Iteration']) == list(range(100, 110))
+
+    # replaced by another file
+    other = str(tmp_path / 'history.tmp')
+    write_history(other, range(200, 202))
+    os.replace(other, path)
+    assert next(rows) is None
+    assert list(next(rows)['Iteration']) == [200, 201]
+    assert list(rows) == []
+
+
+def test_follow_gives_up_on_a_missing_file(tmp_path):
+    start = time.perf_counter()
+    assert list(su2output.follow(str(tmp_path / 'never.csv'), interval=0.01,
+                                 timeout=0.05)) == []
+    assert time.perf_counter() - start < 1.0
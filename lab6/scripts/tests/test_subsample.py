@@ -0,0 +1,160 @@
+import gc
+import os
+
+import numpy as np
+import pytest
+import vtk
+from vtk.util import numpy_support
+
+import gridconvert
+import streamlines
+import subsample
+from conftest import DATA
+
+
+def clustered(n=20000):
+    points = np.random.default_rng(1).random((n, 3)) ** 2
+    polydata = vtk.vtkPolyData()
+    vtkPoints = vtk.vtkPoints()
+    vtkPoints.SetData(numpy_support.numpy_to_vtk(points, deep=True))
+    polydata.SetPoints(vtkPoints)
+    return polydata, points
+
+
+def min_distance(points):
+    d = points[:, None, :] - points[None, :, :]
+    d = np.einsum('ijk,ijk->ij', d, d)
+    np.fill_diagonal(d, np.inf)
+    return np.sqrt(d.min())
+
+
+@pytest.mark.parametrize('mode', ['grid', 'poisson', 'importance'])
+def test_deterministic(mode):
+    grid = streamlines.swirling_jet(16)
+    first = subsample.indices(grid, mode, ratio=20)
+    assert np.array_equal(first, subsample.indices(grid, mode, ratio=20))
+    assert np.array_equal(first, np.unique(first))
+    assert 0 < len(first) < grid.GetNumberOfPoints()
+
+
+def test_grid_one_point_per_cell():
+    polydata, points = clustered()
+    ids = subsample.grid_binned(points, 500)
+    size = subsample._cell_size(points, 500)
+    ijk, dims = subsample._cells(points, size)
+    keys = subsample._cell_keys(ijk, dims)
+    # every occupied cell gives exactly its point nearest the centre
+    assert np.array_equal(np.sort(keys[ids]), np.unique(keys))
+    centres = points.min(axis=0) + (ijk + 0.5) * size
+    distance = np.linalg.norm(points - centres, axis=1)
+    for key, i in zip(keys[ids][:50], ids[:50]):
+        assert distance[i] == distance[keys == key].min()
+
+
+def test_poisson_radius_and_maximal():
+    polydata, points = clustered(5000)
+    radius = 0.05
+    ids = subsample.poisson_disk(points, radius)
+    assert min_distance(points[ids]) >= radius
+    # every candidate is chosen or within radius of a chosen one, and the
+    # other points of its cell are within the cell diagonal (radius) of it
+    ijk, dims = subsample._cells(points, radius / np.sqrt(3))
+    keys = subsample._cell_keys(ijk, dims)
+    chosen = points[ids]
+    for key in np.unique(keys)[::25]:
+        cell = points[keys == key]
+        nearest = np.linalg.norm(chosen[:, None] - cell[None], axis=2).min()
+        assert nearest < 2 * radius
+
+
+def test_importance_follows_weights():
+    polydata, points = clustered()
+    weights = np.where(points[:, 0] > 0.5, 3.0, 1.0)
+    ids = subsample.importance(points, weights, 2000)
+    heavy = (points[ids, 0] > 0.5).mean()
+    expected = (weights * (points[:, 0] > 0.5)).sum() / weights.sum()
+    assert abs(heavy - expected) < 0.05
+
+
+def test_grid_and_unstructured_agree():
+    grid = streamlines.swirling_jet(16)
+    ugrid = gridconvert.to_unstructured(grid)
+    for mode in ('grid', 'poisson'):
+        np.testing.assert_array_equal(subsample.indices(grid, mode, ratio=30),
+                                      subsample.indices(ugrid, mode, ratio=30))
+
+
+def test_extract_keeps_point_data():
+    grid = streamlines.swirling_jet(12)
+    ids = subsample.indices(grid, 'grid', ratio=10)
+    sub = subsample.subset(grid, 'grid', ratio=10)
+    vectors = numpy_support.vtk_to_numpy(grid.GetPointData().GetVectors())
+    np.testing.assert_array_equal(
+        numpy_support.vtk_to_numpy(sub.GetPointData().GetVectors()), vectors[ids])
+    np.testing.assert_array_equal(numpy_support.vtk_to_numpy(sub.GetPoints().GetData()),
+                                  subsample.dataset_points(grid)[ids])
+
+
+def test_cached_indices(cache):
+    ugrid = gridconvert.to_unstructured(cache.load(os.path.join(DATA, 'wind_image.vti')))
+    for mode in ('grid', 'poisson', 'importance'):
+        computed = subsample.indices(ugrid, mode, ratio=40, cache=False)
+        for i in range(2):
+            np.testing.assert_array_equal(
+                subsample.indices(ugrid, mode, ratio=40, cache=cache), computed)
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        subsample.indices(streamlines.swirling_jet(4), 'random')
+
+
+def test_importance_spreads_planar_data():
+    # a 100 x 100 plane with equal weights: systematic sampling along the
+    # Z-order curve puts about one of 100 draws in every 10 x 10 block
+    y, x = np.mgrid[0:100, 0:100]
+    points = np.column_stack((x.ravel(), y.ravel(), np.zeros(x.size))).astype(float)
+    ids = subsample.importance(points, np.ones(len(points)), 100)
+    blocks = np.bincount((points[ids, 1] // 10 * 10 + points[ids, 0] // 10).astype(int),
+                         minlength=100)
+    assert len(ids) == 100
+    assert blocks.max() <= 3 and (blocks > 0).mean() > 0.7
+
+
+def test_points_digest_follows_the_points():
+    polydata, points = clustered(1000)
+    digest = subsample.points_digest(polydata)
+    assert subsample.points_digest(polydata) == digest
+    copy, same = clustered(1000)
+    assert subsample.points_digest(copy) == digest
+
+    numpy_support.vtk_to_numpy(polydata.GetPoints().GetData())[0] += 1.0
+    polydata.GetPoints().Modified()
+    assert subsample.points_digest(polydata) != digest
+
+    del polydata, copy
+    gc.collect()
+    assert not subsample._digests and not subsample._datasets
+
+    grid = streamlines.swirling_jet(8)
+    other = streamlines.swirling_jet(9)
+    assert subsample.points_digest(grid) == subsample.points_digest(streamlines.swirling_jet(8))
+    assert subsample.points_digest(grid) != subsample.points_digest(other)
+
+
+def sub_block(dataset):
+    voi = vtk.vtkExtractVOI()
+    voi.SetInputData(dataset)
+    voi.SetVOI(2, 11, 3, 12, 1, 5)
+    voi.Update()
+    return voi.GetOutput()
+
+
+def test_subsample_of_a_sub_block(cache):
+    grid = cache.load(os.path.join(DATA, 'wind_image.vti'))
+    parent = subsample.indices(grid, 'grid', count=200, cache=cache)
+    block = sub_block(grid)
+    ids = subsample.indices(block, 'grid', count=50, cache=cache)
+    np.testing.assert_array_equal(ids, subsample.indices(block, 'grid', count=50, cache=False))
+    assert subsample.extract(block, ids).GetNumberOfPoints() == len(ids)
+    np.testing.assert_array_equal(subsample.indices(grid, 'grid', count=200, cache=cache), parent)
@@ -0,0 +1,100 @@
+import io
+import os
+
+import numpy as np
+import pytest
+import vtk
+from vtk.util import numpy_support
+
+import volumerender
+
+# off-screen contexts without an X display
+os.environ.setdefault('VTK_DEFAULT_OPENGL_WINDOW', 'vtkEGLRenderWindow')
+
+
+def render(mapper, n=32, size=96):
+    # the synthetic blob, drawn by `mapper` into an off-screen window
+    mapper.SetInputData(volumerender._synthetic_volume(n))
+    opacity = vtk.vtkPiecewiseFunction()
+    opacity.AddPoint(0.0, 0.0)
+    opacity.AddPoint(1.5, 0.5)
+    color = vtk.vtkColorTransferFunction()
+    color.AddRGBPoint(0.0, 0.0, 0.0, 1.0)
+    color.AddRGBPoint(1.5, 1.0, 0.0, 0.0)
+    volumeProperty = vtk.vtkVolumeProperty()
+    volumeProperty.SetColor(color)
+    volumeProperty.SetScalarOpacity(opacity)
+    volumeProperty.SetInterpolationTypeToLinear()
+    volume = vtk.vtkVolume()
+    volume.SetMapper(mapper)
+    volume.SetProperty(volumeProperty)
+
+    renderer = vtk.vtkRenderer()
+    renderer.AddVolume(volume)
+    renderer.ResetCamera()
+    renderWindow = vtk.vtkRenderWindow()
+    renderWindow.SetOffScreenRendering(1)
+    renderWindow.SetSize(size, size)
+    renderWindow.AddRenderer(renderer)
+    timer = volumerender.FrameTimer(renderWindow, stream=None)
+    renderWindow.Render()
+    grab = vtk.vtkWindowToImageFilter()
+    grab.SetInput(renderWindow)
+    grab.Update()
+    pixels = numpy_support.vtk_to_numpy(grab.GetOutput().GetPointData().GetScalars())
+    renderWindow.Finalize()
+    return pixels.reshape(size, size, -1)[..., :3].astype(np.float64), timer
+
+
+@pytest.fixture
+def auto(monkeypatch):
+    monkeypatch.delenv('VOLUME_BACKEND', raising=False)
+
+
+def test_environment_override(monkeypatch):
+    for backend in volumerender.BACKENDS:
+        monkeypatch.setenv('VOLUME_BACKEND', backend.upper())
+        assert volumerender.detect()[0] == backend
+    monkeypatch.setenv('VOLUME_BACKEND', 'opencl')
+    with pytest.raises(ValueError):
+        volumerender.detect()
+
+
+def test_detect_names_the_renderer(auto):
+    backend, reason = volumerender.detect()
+    assert backend in volumerender.BACKENDS
+    window = vtk.vtkRenderWindow()
+    window.SetOffScreenRendering(1)
+    window.SetSize(1, 1)
+    window.AddRenderer(vtk.vtkRenderer())
+    window.Render()
+    name = volumerender.gl_renderer(window)
+    window.Finalize()
+    if any(s in name.lower() for s in volumerender.SOFTWARE_RENDERERS):
+        assert backend == 'cpu' and name in reason
+
+
+def test_mappers(auto):
+    cpu = volumerender.make_mapper('cpu', threads=3)
+    assert cpu.IsA('vtkFixedPointVolumeRayCastMapper') and cpu.GetNumberOfThreads() == 3
+    assert volumerender.make_mapper('gpu').IsA('vtkGPUVolumeRayCastMapper')
+    with pytest.raises(ValueError):
+        volumerender.make_mapper('opencl')
+    stream = io.StringIO()
+    mapper, backend = volumerender.volume_mapper(backend='cpu', stream=stream)
+    assert backend == 'cpu'
+    assert stream.getvalue() == ('volume rendering: cpu, '
+                                 'vtkFixedPointVolumeRayCastMapper (requested)\n')
+
+
+def test_cpu_image_matches_the_gpu_mapper():
+    cpu, timer = render(volumerender.make_mapper('cpu'))
+    gpu, gpu_timer = render(volumerender.make_mapper('gpu'))
+    # the render and the window grab are both timed
+    mean, best, count = timer.summary()
+    assert count == len(timer.times) >= 1 and best > 0
+    # the blob is drawn where the GPU mapper draws it, in about its colours
+    assert cpu.max() > 50 and gpu.max() > 50
+    covered = (cpu.sum(axis=2) > 20) == (gpu.sum(axis=2) > 20)
+    assert covered.mean() > 0.97
+    assert np.abs(cpu - gpu).mean() < 3
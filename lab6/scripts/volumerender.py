@@ -0,0 +1,199 @@
+"""
+Volume mapper selection with a CPU fallback
+
+The volume rendering scripts hard-code vtkGPUVolumeRayCastMapper. On a node
+without a GPU, OpenGL is provided by a software rasterizer (Mesa llvmpipe,
+softpipe, swrast, ...) which runs the GPU ray caster's shaders on the CPU,
+one fragment at a time, and nothing says so. volume_mapper() looks at the
+OpenGL renderer actually in use and picks:
+
+    'gpu' -- vtkGPUVolumeRayCastMapper, on hardware OpenGL that supports it
+    'cpu' -- vtkFixedPointVolumeRayCastMapper, a multi-threaded software ray
+             caster with early ray termination (rays stop once they are
+             opaque) and empty-space skipping (its min/max octree skips
+             blocks that are transparent under the current opacity function)
+
+The VOLUME_BACKEND environment variable (gpu/cpu) overrides the detection.
+FrameTimer reports the selected backend and the time of every frame.
+
+Run `python volumerender.py [n] [frames]` to time both mappers off-screen
+on a synthetic n^3 volume.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+
+BACKENDS = ('gpu', 'cpu')
+
+# substrings of GL_RENDERER for OpenGL implemented in software
+SOFTWARE_RENDERERS = ('llvmpipe', 'softpipe', 'swrast', 'software rasterizer',
+                      'swiftshader', 'gdi generic')
+
+
+def gl_renderer(renderWindow):
+    """The OpenGL renderer string of a window that has been rendered."""
+    for line in renderWindow.ReportCapabilities().splitlines():
+        if line.strip().startswith('OpenGL renderer string:'):
+            return line.split(':', 1)[1].strip()
+    return ''
+
+
+def detect(renderWindow=None):
+    """(backend, reason) for the current environment."""
+    backend = os.environ.get('VOLUME_BACKEND', '').lower()
+    if backend:
+        if backend not in BACKENDS:
+            raise ValueError('VOLUME_BACKEND must be one of %s, not %r'
+                             % (', '.join(BACKENDS), backend))
+        return backend, 'VOLUME_BACKEND=%s' % backend
+
+    probe = renderWindow is None
+    if probe:
+        # a throw-away off-screen window, only to query the OpenGL context
+        renderWindow = vtk.vtkRenderWindow()
+        renderWindow.SetOffScreenRendering(1)
+        renderWindow.SetSize(1, 1)
+        renderWindow.AddRenderer(vtk.vtkRenderer())
+    renderWindow.Render()
+    try:
+        name = gl_renderer(renderWindow)
+        if any(s in name.lower() for s in SOFTWARE_RENDERERS):
+            return 'cpu', 'software OpenGL (%s)' % name
+        gpu = vtk.vtkGPUVolumeRayCastMapper()
+        if not gpu.IsRenderSupported(renderWindow, vtk.vtkVolumeProperty()):
+            return 'cpu', 'GPU ray casting not supported by %s' % (name or 'OpenGL')
+        return 'gpu', name
+    finally:
+        if probe:
+            renderWindow.Finalize()
+
+
+def make_mapper(backend, threads=None):
+    """A volume mapper for `backend` ('gpu' or 'cpu')."""
+    if backend == 'gpu':
+        return vtk.vtkGPUVolumeRayCastMapper()
+    if backend == 'cpu':
+        mapper = vtk.vtkFixedPointVolumeRayCastMapper()
+        mapper.SetNumberOfThreads(threads or os.cpu_count() or 1)
+        # coarser image sampling while interacting, full quality at rest
+        mapper.AutoAdjustSampleDistancesOn()
+        return mapper
+    raise ValueError('unknown backend %r (one of %s)' % (backend, ', '.join(BACKENDS)))
+
+
+def volume_mapper(renderWindow=None, backend='auto', threads=None,
+                  stream=sys.stdout):
+    """
+    (mapper, backend) for the environment, or for an explicit backend.
+
+    The choice and the reason for it are written to `stream`.
+    """
+    if backend == 'auto':
+        backend, reason = detect(renderWindow)
+    else:
+        reason = 'requested'
+    mapper = make_mapper(backend, threads)
+    if stream is not None:
+        stream.write('volume rendering: %s, %s (%s)\n'
+                     % (backend, mapper.GetClassName(), reason))
+    return mapper, backend
+
+
+class FrameTimer(object):
+    """
+    Times every render of a window (StartEvent to EndEvent).
+
+    stream -- where the per-frame times go (None to only collect them)
+    """
+
+    def __init__(self, renderWindow, label='', stream=sys.stdout):
+        self.label = label
+        self.stream = stream
+        self.times = []
+        self._start = None
+        renderWindow.AddObserver('StartEvent', self._started)
+        renderWindow.AddObserver('EndEvent', self._ended)
+
+    def _started(self, obj, event):
+        self._start = time.perf_counter()
+
+    def _ended(self, obj, event):
+        if self._start is None:
+            return
+        elapsed = time.perf_counter() - self._start
+        self._start = None
+        self.times.append(elapsed)
+        if self.stream is not None:
+            self.stream.write('%sframe %d: %.1f ms\n' % (
+                self.label + ' ' if self.label else '', len(self.times),
+                1000 * elapsed))
+
+    def summary(self):
+        """Mean and best frame time in seconds, and the number of frames."""
+        if not self.times:
+            return None
+        return (float(np.mean(self.times)), float(min(self.times)),
+                len(self.times))
+
+
+def _synthetic_volume(n):
+    # smooth blob with an empty margin, so space skipping has work to do
+    x = np.linspace(-1, 1, n)
+    z, y, x = np.meshgrid(x, x, x, indexing='ij')
+    r = np.sqrt(x*x + y*y + z*z)
+    values = np.clip(1 - r, 0, None) * (1 + 0.5*np.sin(8*x)*np.cos(6*y))
+    image = vtk.vtkImageData()
+    image.SetDimensions(n, n, n)
+    array = numpy_support.numpy_to_vtk(values.ravel().astype(np.float32), deep=True)
+    array.SetName('values')
+    image.GetPointData().SetScalars(array)
+    return image
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 128
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    image = _synthetic_volume(n)
+    opacity = vtk.vtkPiecewiseFunction()
+    opacity.AddPoint(0.0, 0.0)
+    opacity.AddPoint(1.5, 0.3)
+    color = vtk.vtkColorTransferFunction()
+    color.AddRGBPoint(0.0, 0.0, 0.0, 1.0)
+    color.AddRGBPoint(1.5, 1.0, 0.0, 0.0)
+    volumeProperty = vtk.vtkVolumeProperty()
+    volumeProperty.SetColor(color)
+    volumeProperty.SetScalarOpacity(opacity)
+    volumeProperty.SetInterpolationTypeToLinear()
+
+    print( 'detected: %s (%s)' % detect() )
+    for backend in BACKENDS:
+        mapper, backend = volume_mapper(backend=backend)
+        mapper.SetInputData(image)
+        volume = vtk.vtkVolume()
+        volume.SetMapper(mapper)
+        volume.SetProperty(volumeProperty)
+
+        renderer = vtk.vtkRenderer()
+        renderer.AddVolume(volume)
+        renderer.ResetCamera()
+        renderWindow = vtk.vtkRenderWindow()
+        renderWindow.SetOffScreenRendering(1)
+        renderWindow.SetSize(500, 500)
+        renderWindow.AddRenderer(renderer)
+        renderWindow.Render()       # first frame uploads/builds, not timed
+
+        timer = FrameTimer(renderWindow, backend, stream=None)
+        for i in range(frames):
+            renderer.GetActiveCamera().Azimuth(360.0 / frames)
+            renderWindow.Render()
+        mean, best, count = timer.summary()
+        print( '%s  %d^3, %d frames: mean %.1f ms, best %.1f ms'
+               % (backend, n, count, 1000*mean, 1000*best) )
+        renderWindow.Finalize()
@@ -6,16 +6,20 @@
 
 # Gray Scott Model of Reaction Diffusion
 
+import os
+import sys
 import random
 import numpy as np
-from PIL import Image, ImageDraw
+
+# the array to image export and progress reporting live with the lab 8 solvers
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'lab8'))
+import imageexport
+import progress
 
 n = 256
 imgx = n
 imgy = n # image size
-image = Image.new("RGB", (imgx, imgy))
-draw = ImageDraw.Draw(image)
-pixels = image.load()
+cmap = 'gray' # or any matplotlib colormap name, e.g. 'viridis'
 steps = 10000
 
 params = []
@@ -44,7 +48,8 @@ V[int(n/2-r):int(n/2+r),int(n/2-r):int(n/2+r)] = 0.25
 u += 0.05*np.random.random((n,n))
 v += 0.05*np.random.random((n,n))
 
-p = 0
+# report about once a second (pass jsonl='progress.jsonl' to log the reports)
+report = progress.Progress(steps, cells=n*n, interval=1.0)
 for i in range(steps):
     Lu = (U[0:-2,1:-1] + U[1:-1,0:-2] - 4*U[1:-1,1:-1] + U[1:-1,2:] + U[2:  ,1:-1])
     Lv = (V[0:-2,1:-1] + V[1:-1,0:-2] - 4*V[1:-1,1:-1] + V[1:-1,2:] + V[2:  ,1:-1])
@@ -52,20 +57,10 @@ for i in range(steps):
     u += (Du*Lu - uvv +  F   *(1-u))
     v += (Dv*Lv + uvv - (F+k)*v    )
 
-    pn = 100 * (i + 1) / steps # percent completed
-    if pn != p:
-        p = pn
-        print ("%" + str(p).zfill(2))
-
-# paint the final state
-vMin  = V.min()
-vMax  = V.max()
+    report.update(i + 1)
+report.close()
 
-for iy in range(imgy):
-    for ix in range(imgx):
-        w = V[iy, ix]
-        c = int(255 * (w - vMin) / (vMax - vMin))
-        pixels[ix, iy] = (c, c, c)
+# paint the final state (normalized over the whole field, in one pass)
 label = "Du=" + str(Du) + " Dv=" + str(Dv) + " F=" + str(F) + " k=" + str(k)
-draw.text((0, 0), label, (0, 255, 0))
-image.save("Bacteria1_ReactionDiffusionSim.png", "PNG")
\ No newline at end of file
+imageexport.save(V[0:imgy, 0:imgx], "Bacteria1_ReactionDiffusionSim.png",
+                 cmap=cmap, vmin=V.min(), vmax=V.max(), label=label)
\ No newline at end of file
@@ -1,8 +1,17 @@
+import os
+import sys
 import numpy as np
 import math
 import matplotlib.pyplot as plt
 from matplotlib import animation, rc
 
+# the stepping engine lives with the lab 8 solvers
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lab8'))
+import batch
+
+# run without a window at full speed: python waveequation.py --headless
+headless = '--headless' in sys.argv
+
 
 # define the discretization grid
 dx = 0.1  # space increment (default 0.1)
@@ -60,9 +69,6 @@ def step_wave(t):
         u[t,0]    = np.sin(t*dt*2*math.pi)
         u[t,nx-1] = 0
 
-    l.set_data(np.linspace(xmin,xmax,nx), u[t,:])
-    return l,
-
 def step_heat(t):
 
     k = 0.4 # diffusion constant
@@ -85,14 +91,25 @@ def step_heat(t):
         u[t,0]    = 0.0
         u[t,nx-1] = 0.0
 
-    l.set_data(np.linspace(xmin,xmax,nx), u[t,:])
+# draw time level t (only used by the animated path)
+def draw(t):
+    l.set_data(x, u[t,:])
     return l,
 
-fig1 = plt.figure()
-l, = plt.plot([], [], 'k-')
-plt.xlim(xmin, xmax)
-plt.ylim(-1.5, 1.5)
-plt.xlabel('u')
-
-line_ani = animation.FuncAnimation(fig1, step_wave, nt-1, interval=5, repeat=False, blit=True)
-plt.show()
+x = np.linspace(xmin,xmax,nx)
+runner = batch.Runner(step_wave, draw=draw)
+
+if headless:
+    runner.run(nt-1)
+    runner.report('headless')
+else:
+    fig1 = plt.figure()
+    l, = plt.plot([], [], 'k-')
+    plt.xlim(xmin, xmax)
+    plt.ylim(-1.5, 1.5)
+    plt.xlabel('u')
+
+    line_ani = animation.FuncAnimation(fig1, runner.frame, nt-1, interval=5, repeat=False, blit=True,
+                                       init_func=runner.init)
+    plt.show()
+    runner.report('animated')
@@ -1,8 +1,15 @@
+import sys
 import numpy as np
 import math
 import matplotlib.pyplot as plt
 from matplotlib import animation, rc
 
+import batch
+import pde1d
+
+# run without a window at full speed: python 08_PDE_part1.py --headless
+headless = '--headless' in sys.argv
+
 
 # define the discretization grid
 dx = 0.1  # space increment (default 0.1)
@@ -15,26 +22,42 @@ xmax =   3.0  # right bound
 
 nx = int((xmax-xmin)/dx) + 1 # number of points on x grid
 nt = int((tmax-tmin)/dt) + 2 # number of points on t grid
-
-u = np.zeros((nt,nx)) # solution array
-
-#set initial pulse shape
+nsteps = nt - 1              # time levels 0 .. nt-2 are computed
+
+# solution storage
+#   'full' keeps all nt time levels (needed to plot the whole history later)
+#   'ring' keeps only the last 3 levels, memory is O(nx) instead of O(nt*nx)
+history = 'full'
+snapshot_every   = 0     # copy every k-th time level (0 disables snapshots)
+snapshot_xstride = 1     # keep every s-th grid point in each snapshot
+snapshot_file    = None  # e.g. 'wave_snapshots.npy', None keeps them in memory
+
+if history == 'ring':
+    snapshot_out = snapshot_file
+    if snapshot_every > 0 and snapshot_file is None:
+        snapshot_out = np.zeros((pde1d.snapshot_rows(nsteps, snapshot_every),
+                                 len(range(0, nx, snapshot_xstride))))
+    u = pde1d.RingHistory(nx, depth=3, every=snapshot_every,
+                          xstride=snapshot_xstride, out=snapshot_out, nt=nsteps)
+else:
+    u = pde1d.full_history(nt, nx) # solution array
+
+# x grid (same points as xmin + i*dx)
+x = pde1d.grid(xmin, dx, nx)
+
+# random generator for init_random, set a seed to make runs repeatable
+seed = None
+rng = pde1d.rng(seed)
+
+#set initial pulse shape (each call fills the whole x grid)
 def init_wave(x):
-    val = np.exp(-(x**2)/0.25)
-    if abs(val)<.001:
-        val = 0.0
-
-    return val
+    return pde1d.init_gaussian(x, width=0.25, cutoff=.001)
 
 def init_square(x):
-    val = 0.0
-    if abs(x)<0.5:
-        val = 1.0
-
-    return val
+    return pde1d.init_square(x, halfwidth=0.5)
 
 def init_random(x):
-    return np.random.rand(1)
+    return pde1d.init_random(x, generator=rng)
 
 def step_wave(t):
 
@@ -45,8 +68,7 @@ def step_wave(t):
         print( 'stability:', (c*dt/dx)**2 )
 
         # set initial condition
-        for i in range(0,nx):
-            u[t,i] = 0.0 #init_square( xmin + i*dx )
+        u[t,:] = 0.0 #init_square( x )
 
     else:
         # compute second x-derivative using central differences
@@ -60,9 +82,6 @@ def step_wave(t):
         u[t,0] = 3*math.sin(math.pi*dt*1/xmax)*math.cos(math.pi*dt*2*t/xmax)
         u[t,nx-1] = 0
 
-    l.set_data(np.linspace(xmin,xmax,nx), u[t,:])
-    return l,
-
 def step_heat(t):
 
     k = 0.4 # diffusion constant
@@ -70,8 +89,7 @@ def step_heat(t):
     if t<1:
 
         print( 'stability:', k*dt/(dx**2) )
-        for i in range(0,nx):
-            u[t,i] = init_random( xmin + i*dx )
+        u[t,:] = init_random( x )
 
     else:
 
@@ -85,14 +103,27 @@ def step_heat(t):
         u[t,0]    = 0.0
         u[t,nx-1] = 0.0
 
-    l.set_data(np.linspace(xmin,xmax,nx), u[t,:])
+# draw time level t (only used by the animated path)
+def draw(t):
+    l.set_data(x, u[t,:])
     return l,
 
-fig1 = plt.figure()
-l, = plt.plot([], [], 'k-')
-plt.xlim(xmin, xmax)
-plt.ylim(-1.5, 1.5)
-plt.xlabel('u')
-
-line_ani = animation.FuncAnimation(fig1, step_wave, nt-1, interval=5, repeat=False, blit=True)
-plt.show()
+runner = batch.Runner(step_wave, draw=draw)
+
+if headless:
+    runner.run(nsteps)
+    runner.report('headless')
+else:
+    fig1 = plt.figure()
+    l, = plt.plot([], [], 'k-')
+    plt.xlim(xmin, xmax)
+    plt.ylim(-1.5, 1.5)
+    plt.xlabel('u')
+
+    line_ani = animation.FuncAnimation(fig1, runner.frame, nsteps, interval=5, repeat=False, blit=True,
+                                       init_func=runner.init)
+    plt.show()
+    runner.report('animated')
+
+if history == 'ring':
+    snapshots = u.flush()
@@ -3,10 +3,18 @@
 # Copyright (2017) Nicolas P. Rougier - BSD license
 # More information at https://github.com/rougier/numpy-book
 # -----------------------------------------------------------------------------
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 
+import batch
+import grayscott
+import progress
+
+# run without a window at full speed: python 09_grayscott.py --headless
+headless = '--headless' in sys.argv
+
 
 # Parameters from http://www.aliensaint.com/uo/java/rd/
 # -----------------------------------------------------
@@ -26,50 +34,49 @@ Du, Dv, F, k = 0.16, 0.08, 0.035, 0.065  # Bacteria 1
 # Du, Dv, F, k = 0.16, 0.08, 0.035, 0.060  # Zebrafish
 
 
-# define variables
-Z = np.zeros((n+2, n+2), [('U', np.double),
-                          ('V', np.double)])
-U, V = Z['U'], Z['V']
-u, v = U[1:-1, 1:-1], V[1:-1, 1:-1]
+# define variables: U and V live in separate contiguous arrays inside the
+# engine ('auto' uses the compiled numba kernel when numba is installed)
+model = grayscott.GrayScott(n, Du, Dv, F, k, backend='auto')
 
 # radius
 r = 20
 
 # initial condition
-u[...] = 1.0
-U[n//2-r:n//2+r, n//2-r:n//2+r] = 0.50
-V[n//2-r:n//2+r, n//2-r:n//2+r] = 0.25
-u += 0.15*np.random.uniform(-1, +1, (n, n))
-v += 0.15*np.random.uniform(-1, +1, (n, n))
-
-def update(frame):
-
-    global U, V, u, v, im
-
-    if frame % 100 == 0:
-        print(frame)
-
-    for i in range(30):
-        Lu = (                  U[0:-2, 1:-1] +
-              U[1:-1, 0:-2] - 4*U[1:-1, 1:-1] + U[1:-1, 2:] +
-                                U[2:  , 1:-1])
-        Lv = (                  V[0:-2, 1:-1] +
-              V[1:-1, 0:-2] - 4*V[1:-1, 1:-1] + V[1:-1, 2:] +
-                                V[2:  , 1:-1])
-        uvv = u*v*v
-        u += (Du*Lu - uvv + F*(1-u))
-        v += (Dv*Lv + uvv - (F+k)*v)
+model.seed(r=r, noise=0.15)
+
+# report about once a second instead of printing from the frame callback
+frames = 2000
+report = progress.Progress(30*frames, cells=n*n, interval=1.0)
+
+def step(t):
+    model.step()
+    report.update(t + 1)
 
+
+def draw(t):
+
+    V = model.V
     img.set_data(V)
     img.set_clim(vmin=V.min(), vmax=V.max())
 
 
-fig = plt.figure(figsize=(4, 4))
-img = plt.imshow(V, interpolation='bilinear', cmap=plt.cm.viridis)
+runner = batch.Runner(step, draw=draw, steps_per_frame=30)
+
+if headless:
+    runner.run(30*frames)
+    report.close()
+    runner.report('headless')
+else:
+    fig = plt.figure(figsize=(4, 4))
+    img = plt.imshow(model.V, interpolation='bilinear', cmap=plt.cm.viridis)
 
-animation = FuncAnimation(fig, update, interval=1, frames=2000)
+    # one pass over the frames, so the steps match the Progress total
+    animation = FuncAnimation(fig, runner.frame, interval=1, frames=frames,
+                              repeat=False, init_func=runner.init)
 
-plt.xticks([])
-plt.yticks([])
-plt.title( "Gray-Scott Model" )
-plt.show()
\ No newline at end of file
+    plt.xticks([])
+    plt.yticks([])
+    plt.title( "Gray-Scott Model" )
+    plt.show()
+    report.close(runner.t)
+    runner.report('animated')
@@ -1,8 +1,15 @@
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.cm as cm
 from matplotlib import animation
 
+import batch
+import pde2d
+
+# run without a window at full speed: python 09_heat2d.py --headless
+headless = '--headless' in sys.argv
+
 # thermal conductivity 
 c = 1.0
 
@@ -19,52 +26,45 @@ dt = 0.002
 # set initial condition
 u0 = np.zeros( (nx,nx) )
 
-# step wave equation
+# double-buffered stencil engine: zero boundary conditions and the heater
+# are applied by the engine, the current solution is always heat.u
+heat = pde2d.Heat2D( u0, c*dt/(dx**2),
+                     boundary=0.0,
+                     sources=[((slice(40,-40), slice(50,80)), 1.0)] ) # heater
+
+# step heat equation (one substep; the animation draws every 10th)
 def step_wave(t):
 
     if t == 0:
         print( 'stability:', c*dt/(dx**2) )
 
-    for i in range(0,10):
-        un = u0.copy()
-
-        # compute second x-derivative using central differences
-        L = (
-                                u0[1:nx-1,0:nx-2] +
-            u0[2:nx,1:nx-1] - 4*u0[1:nx-1,1:nx-1] + u0[0:nx-2,1:nx-1] + 
-                                u0[1:nx-1,2:nx]
-            )
-
-        # apply second-order central differences in time
-        un[1:nx-1,1:nx-1] = u0[1:nx-1,1:nx-1] + c*dt/(dx**2) * L
-
-        # apply boundary conditions
-        un[0,0:nx+1]    = 0
-        un[nx-1,0:nx+1] = 0
-        un[0:nx+1,0]    = 0
-        un[0:nx+1,nx-1] = 0
-
-        # heater
-        un[40:-40,50:80] = 1.0
-
-        u0[:] = un
+    heat.step()
 
-    img.set_array(u0)
+def draw(t):
+    img.set_array(heat.u)
     return img,
 
-fig = plt.figure()
-img = plt.imshow( u0, 
-                  vmax=1.0, 
-                  vmin=0.0, 
-                  extent=[xmin, xmax, xmin, xmax], 
-                  cmap=cm.YlOrRd )
-
-anim = animation.FuncAnimation( fig, step_wave, 10000, 
-                                interval=1, 
-                                repeat=False, 
-                                blit=True)
-
-plt.title( "2D Heat Equation" )
-plt.xlim( xmin, xmax )
-plt.ylim( xmin, xmax )
-plt.show()
\ No newline at end of file
+runner = batch.Runner(step_wave, draw=draw, steps_per_frame=10)
+
+if headless:
+    runner.run(10*10000)
+    runner.report('headless')
+else:
+    fig = plt.figure()
+    img = plt.imshow( u0, 
+                      vmax=1.0, 
+                      vmin=0.0, 
+                      extent=[xmin, xmax, xmin, xmax], 
+                      cmap=cm.YlOrRd )
+
+    anim = animation.FuncAnimation( fig, runner.frame, 10000, 
+                                    init_func=runner.init,
+                                    interval=1, 
+                                    repeat=False, 
+                                    blit=True)
+
+    plt.title( "2D Heat Equation" )
+    plt.xlim( xmin, xmax )
+    plt.ylim( xmin, xmax )
+    plt.show()
+    runner.report('animated')
@@ -1,8 +1,15 @@
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.cm as cm
 from matplotlib import animation
 
+import batch
+import pde2d
+
+# run without a window at full speed: python 09_wave2d.py --headless
+headless = '--headless' in sys.argv
+
 # wave speed 
 c = 1.0
 
@@ -23,52 +30,49 @@ X, Y = np.meshgrid( x, x )
 u0 = np.exp( -np.sqrt((X-0.25)**2 + (Y+0.7)**2)/0.25 )
 u1 = u0.copy()
 
+# obstacle
+obstacles = []
+# obstacles = [((slice(40,-40), slice(50,80)), 0.0)]
+
+# leapfrog engine with rotating buffers: zero boundary conditions are written
+# into every new level, the newest level is wave.u and the previous wave.prev
+wave = pde2d.Wave2D( u0, c*dt/dx, u_prev=u1,
+                     boundary=0.0,
+                     sources=obstacles )
+
 # step wave equation
 def step_wave(t):
 
     if t == 0:
         print( 'stability:', (c*dt/dx)**2 )
 
-    un = u0.copy()
-
-    # compute second x-derivative using central differences
-    L = (
-                              u0[1:nx-1,0:nx-2] +
-          u0[2:nx,1:nx-1] - 4*u0[1:nx-1,1:nx-1] + u0[0:nx-2,1:nx-1] + 
-                              u0[1:nx-1,2:nx]
-        )
-
-    # apply second-order central differences in time
-    un[1:nx-1,1:nx-1] = 2*u0[1:nx-1,1:nx-1] - u1[1:nx-1,1:nx-1] + (c*dt/dx)**2 * L
-
-    # apply boundary conditions
-    un[0,0:nx+1]    = 0
-    un[nx-1,0:nx+1] = 0
-    un[0:nx+1,0]    = 0
-    un[0:nx+1,nx-1] = 0
-
-    # obstacle
-    # un[40:-40,50:80] = 0
-
-    u1[:] = u0
-    u0[:] = un
+    wave.step()
 
-    img.set_array(u1)
+def draw(t):
+    img.set_array(wave.prev)
     return img,
 
-fig = plt.figure()
-img = plt.imshow( u0, 
-                  vmax=0.1, 
-                  vmin=-0.1, 
-                  extent=[xmin, xmax, xmin, xmax], 
-                  cmap=cm.Spectral )
-
-anim = animation.FuncAnimation( fig, step_wave, 10000, 
-                                interval=1, 
-                                repeat=False, 
-                                blit=True)
-
-plt.title( "2D Wave Equation" )
-plt.xlim( xmin, xmax )
-plt.ylim( xmin, xmax )
-plt.show()
\ No newline at end of file
+runner = batch.Runner(step_wave, draw=draw)
+
+if headless:
+    runner.run(10000)
+    runner.report('headless')
+else:
+    fig = plt.figure()
+    img = plt.imshow( u0, 
+                      vmax=0.1, 
+                      vmin=-0.1, 
+                      extent=[xmin, xmax, xmin, xmax], 
+                      cmap=cm.Spectral )
+
+    anim = animation.FuncAnimation( fig, runner.frame, 10000, 
+                                    init_func=runner.init,
+                                    interval=1, 
+                                    repeat=False, 
+                                    blit=True)
+
+    plt.title( "2D Wave Equation" )
+    plt.xlim( xmin, xmax )
+    plt.ylim( xmin, xmax )
+    plt.show()
+    runner.report('animated')
@@ -0,0 +1,99 @@
+"""
+Stepping engine shared by the PDE scripts
+
+The solvers used to advance only inside the FuncAnimation callback, which
+ties the simulation speed to the frame interval and needs a display. Runner
+wraps a plain `step(t)` function: run() drives it headless at full NumPy
+speed with an optional observer every k steps, and frame() is the
+FuncAnimation callback for the animated path, with init() as its init_func
+(without one FuncAnimation calls frame() once more, which steps the
+physics). Both report steps/second.
+"""
+
+import time
+
+
+class Runner(object):
+    """
+    Drive `step(t)` for t = start, start+1, ...
+
+    step            -- advances the physics from time level t-1 to t
+    draw            -- optional observer draw(t) used by frame(); its return
+                       value is handed back to FuncAnimation (artists to blit,
+                       none without a draw)
+    steps_per_frame -- physics steps taken per animation frame
+    """
+
+    def __init__(self, step, draw=None, steps_per_frame=1, start=0):
+        self.step = step
+        self.draw = draw
+        self.steps_per_frame = steps_per_frame
+        self.t = start
+
+        self.steps = 0
+        self.elapsed = 0.0
+        self._last_frame = None
+
+    def run(self, n_steps, every=0, callback=None):
+        """
+        Take n_steps steps without rendering.
+
+        callback(t) is called after every `every`-th step (and never when
+        every is 0). Returns the steps/second of this call.
+        """
+        step = self.step
+        t = self.t
+        end = t + n_steps
+
+        start = time.perf_counter()
+        if callback is None or every <= 0:
+            while t < end:
+                step(t)
+                t += 1
+        else:
+            while t < end:
+                step(t)
+                t += 1
+                if t % every == 0:
+                    callback(t - 1)
+        elapsed = time.perf_counter() - start
+
+        self.t = t
+        self.steps += n_steps
+        self.elapsed += elapsed
+        return n_steps / elapsed if elapsed > 0 else float('inf')
+
+    def init(self):
+        """FuncAnimation init_func: draw the current state, no steps."""
+        if self.draw is None:
+            return ()
+        return self.draw(self.t - 1)
+
+    def frame(self, frame):
+        """FuncAnimation callback: advance steps_per_frame steps, then draw."""
+        # wall time of the animated path is measured frame to frame, so it
+        # includes drawing, blitting and the frame interval
+        now = time.perf_counter()
+        if self._last_frame is not None:
+            self.elapsed += now - self._last_frame
+            self.steps += self.steps_per_frame
+        self._last_frame = now
+
+        for i in range(self.steps_per_frame):
+            self.step(self.t)
+            self.t += 1
+
+        if self.draw is None:
+            return ()
+        return self.draw(self.t - 1)
+
+    @property
+    def rate(self):
+        """Average steps/second over everything this runner has done."""
+        if self.elapsed <= 0:
+            return 0.0
+        return self.steps / self.elapsed
+
+    def report(self, label='run'):
+        print( '%s: %d steps in %.3f s (%.1f steps/s)'
+               % (label, self.steps, self.elapsed, self.rate) )
@@ -0,0 +1,226 @@
+"""
+Gray-Scott reaction-diffusion engine
+
+09_grayscott.py keeps U and V as the two fields of one structured array, so
+every U/V slice is strided, and each iteration builds Lu, Lv, uvv and several
+intermediates. GrayScott stores U and V as separate contiguous (n+2, n+2)
+arrays (the outer ring is a fixed zero boundary, as before) and updates them
+in place using three preallocated interior scratch arrays.
+
+If numba is installed the update runs as a compiled, threaded kernel over
+two double-buffered pairs of grids; otherwise the pure NumPy path is used.
+
+Run `python grayscott.py [n ...]` to compare against the record-array
+version (defaults to 256, 1024 and 4096).
+"""
+
+import sys
+import time
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+# name: (Du, Dv, F, k), from http://www.aliensaint.com/uo/java/rd/
+PRESETS = {
+    'Bacteria 1':    (0.16, 0.08, 0.035, 0.065),
+    'Bacteria 2':    (0.14, 0.06, 0.035, 0.065),
+    'Coral':         (0.16, 0.08, 0.060, 0.062),
+    'Fingerprint':   (0.19, 0.05, 0.060, 0.062),
+    'Spirals':       (0.10, 0.10, 0.018, 0.050),
+    'Spirals Dense': (0.12, 0.08, 0.020, 0.050),
+    'Spirals Fast':  (0.10, 0.16, 0.020, 0.050),
+    'Unstable':      (0.16, 0.08, 0.020, 0.055),
+    'Worms 1':       (0.16, 0.08, 0.050, 0.065),
+    'Worms 2':       (0.16, 0.08, 0.054, 0.063),
+    'Zebrafish':     (0.16, 0.08, 0.035, 0.060),
+}
+
+
+if numba is not None:
+
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _kernel(U, V, Un, Vn, Du, Dv, F, k):
+        n0, n1 = U.shape
+        for i in numba.prange(1, n0 - 1):
+            for j in range(1, n1 - 1):
+                u = U[i, j]
+                v = V[i, j]
+                Lu = U[i-1, j] + U[i+1, j] + U[i, j-1] + U[i, j+1] - 4.0*u
+                Lv = V[i-1, j] + V[i+1, j] + V[i, j-1] + V[i, j+1] - 4.0*v
+                uvv = u*v*v
+                Un[i, j] = u + Du*Lu - uvv + F*(1.0 - u)
+                Vn[i, j] = v + Dv*Lv + uvv - (F + k)*v
+
+
+class GrayScott(object):
+    """
+    n x n Gray-Scott model with a zero boundary ring.
+
+    backend -- 'numpy', 'numba' or 'auto' (numba when it is installed)
+
+    U and V are the padded (n+2, n+2) fields and u, v their interiors. With
+    the numba backend they are different arrays after every step, so always
+    read them through the engine.
+    """
+
+    def __init__(self, n, Du, Dv, F, k, backend='auto'):
+        if backend == 'auto':
+            backend = 'numba' if numba is not None else 'numpy'
+        if backend == 'numba' and numba is None:
+            raise ImportError('the numba backend needs numba installed')
+        if backend not in ('numpy', 'numba'):
+            raise ValueError('unknown backend %r' % backend)
+
+        self.n = n
+        self.Du, self.Dv, self.F, self.k = Du, Dv, F, k
+        self.backend = backend
+
+        self.U = np.zeros((n+2, n+2))
+        self.V = np.zeros((n+2, n+2))
+
+        if backend == 'numba':
+            self._Un = np.zeros_like(self.U)
+            self._Vn = np.zeros_like(self.V)
+            self._step = self._step_numba
+        else:
+            self._su = np.empty((n, n))
+            self._sv = np.empty((n, n))
+            self._uvv = np.empty((n, n))
+            self._step = self._step_numpy
+
+    @property
+    def u(self):
+        return self.U[1:-1, 1:-1]
+
+    @property
+    def v(self):
+        return self.V[1:-1, 1:-1]
+
+    def seed(self, r=20, noise=0.15, rng=None, signed=True):
+        """
+        The scripts' initial condition: a perturbed square in the middle.
+
+        r      -- half width of the square, at most n//2
+        signed -- noise uniform in [-noise, noise] as in 09_grayscott.py; if
+                  False in [0, noise) as in lab7's 08_PDE_part2.py
+        """
+        n = self.n
+        if not 0 < r <= n//2:
+            raise ValueError('seed radius %d does not fit a %d grid' % (r, n))
+        if rng is None:
+            rng = np.random.default_rng()
+        U, V = self.U, self.V
+        U[...] = 0.0
+        V[...] = 0.0
+        U[1:-1, 1:-1] = 1.0
+        U[n//2-r:n//2+r, n//2-r:n//2+r] = 0.50
+        V[n//2-r:n//2+r, n//2-r:n//2+r] = 0.25
+        low = -1.0 if signed else 0.0
+        U[1:-1, 1:-1] += noise*rng.uniform(low, +1, (n, n))
+        V[1:-1, 1:-1] += noise*rng.uniform(low, +1, (n, n))
+        return self
+
+    def _step_numpy(self):
+        U, V = self.U, self.V
+        u, v = U[1:-1, 1:-1], V[1:-1, 1:-1]
+        su, sv, uvv = self._su, self._sv, self._uvv
+        Du, Dv, F, k = self.Du, self.Dv, self.F, self.k
+
+        # neighbour sums, taken before u and v are overwritten
+        np.add(U[0:-2, 1:-1], U[2:, 1:-1], out=su)
+        su += U[1:-1, 0:-2]
+        su += U[1:-1, 2:]
+        np.add(V[0:-2, 1:-1], V[2:, 1:-1], out=sv)
+        sv += V[1:-1, 0:-2]
+        sv += V[1:-1, 2:]
+        np.multiply(v, v, out=uvv)
+        uvv *= u
+
+        # u += Du*(su - 4u) - uvv + F*(1 - u)
+        u *= 1.0 - 4.0*Du - F
+        su *= Du
+        u += su
+        u -= uvv
+        u += F
+
+        # v += Dv*(sv - 4v) + uvv - (F + k)*v
+        v *= 1.0 - 4.0*Dv - (F + k)
+        sv *= Dv
+        v += sv
+        v += uvv
+
+    def _step_numba(self):
+        _kernel(self.U, self.V, self._Un, self._Vn,
+                self.Du, self.Dv, self.F, self.k)
+        self.U, self._Un = self._Un, self.U
+        self.V, self._Vn = self._Vn, self.V
+
+    def step(self):
+        self._step()
+
+    def run(self, n_steps):
+        step = self._step
+        for i in range(n_steps):
+            step()
+        return self
+
+
+def reference(n, Du, Dv, F, k):
+    """The record-array formulation from 09_grayscott.py, for comparison."""
+    Z = np.zeros((n+2, n+2), [('U', np.double), ('V', np.double)])
+    U, V = Z['U'], Z['V']
+    u, v = U[1:-1, 1:-1], V[1:-1, 1:-1]
+
+    def step():
+        nonlocal u, v
+        Lu = (                  U[0:-2, 1:-1] +
+              U[1:-1, 0:-2] - 4*U[1:-1, 1:-1] + U[1:-1, 2:] +
+                                U[2:  , 1:-1])
+        Lv = (                  V[0:-2, 1:-1] +
+              V[1:-1, 0:-2] - 4*V[1:-1, 1:-1] + V[1:-1, 2:] +
+                                V[2:  , 1:-1])
+        uvv = u*v*v
+        u += (Du*Lu - uvv + F*(1-u))
+        v += (Dv*Lv + uvv - (F+k)*v)
+
+    return Z, step
+
+
+def benchmark(n, n_steps=None):
+    """Return steps/second of the reference and of each available backend."""
+    if n_steps is None:
+        n_steps = max(2, int(2**22 // (n*n)))
+    params = PRESETS['Bacteria 1']
+
+    def timed(step):
+        step()  # warm up (and compile the numba kernel)
+        start = time.perf_counter()
+        for i in range(n_steps):
+            step()
+        return n_steps / (time.perf_counter() - start)
+
+    Z, ref_step = reference(n, *params)
+    Z['U'][1:-1, 1:-1] = 1.0
+    rates = {'reference': timed(ref_step)}
+    for backend in ('numpy', 'numba'):
+        if backend == 'numba' and numba is None:
+            continue
+        engine = GrayScott(n, *params, backend=backend).seed()
+        rates[backend] = timed(engine.step)
+    return rates
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [256, 1024, 4096]
+    for n in sizes:
+        rates = benchmark(n)
+        ref = rates.pop('reference')
+        line = '%5d  reference %9.1f steps/s' % (n, ref)
+        for backend, rate in sorted(rates.items()):
+            line += '  %s %9.1f steps/s (%.2fx)' % (backend, rate, rate/ref)
+        print(line)
@@ -0,0 +1,98 @@
+"""
+Array to image export
+
+Painting a field pixel by pixel through PIL's pixel access object costs one
+Python iteration per pixel. Here the field is normalized to 0..255 in bulk,
+mapped through a 256-entry colour lookup table with one fancy-indexing
+operation and handed to PIL as a uint8 buffer with Image.fromarray.
+
+Colour maps are given by name ('gray', 'gray_r', or any matplotlib colormap
+when matplotlib is installed), as a list of (position, (r, g, b)) control
+points in 0..1 like a vtkColorTransferFunction, or as a ready (256, 3) LUT.
+"""
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+try:
+    import matplotlib
+except ImportError:
+    matplotlib = None
+
+
+_luts = {}
+
+
+def normalize(a, vmin=None, vmax=None):
+    """a scaled to uint8 levels, vmin -> 0 and vmax -> 255 (truncating)."""
+    a = np.asarray(a)
+    if vmin is None:
+        vmin = a.min()
+    if vmax is None:
+        vmax = a.max()
+    levels = np.subtract(a, vmin, dtype=np.float64)
+    if vmax > vmin:
+        # 255*(a - vmin)/(vmax - vmin) in the order the pixel loop used, so
+        # values on a level boundary truncate the same way
+        levels *= 255.0
+        levels /= float(vmax - vmin)
+    else:
+        levels[...] = 0.0
+    np.clip(levels, 0, 255, out=levels)
+    return levels.astype(np.uint8)
+
+
+def lut_from_points(points):
+    """(256, 3) uint8 LUT interpolated between (position, (r, g, b)) points."""
+    points = sorted(points)
+    x = np.array([p for p, rgb in points], dtype=np.float64)
+    rgb = np.array([rgb for p, rgb in points], dtype=np.float64)
+    t = np.linspace(0.0, 1.0, 256)
+    table = np.empty((256, 3))
+    for c in range(3):
+        table[:, c] = np.interp(t, x, rgb[:, c])
+    return (255 * np.clip(table, 0, 1) + 0.5).astype(np.uint8)
+
+
+def lut(cmap='gray'):
+    """(256, 3) uint8 LUT for a colormap name, control points or table."""
+    if isinstance(cmap, np.ndarray):
+        if cmap.shape != (256, 3) or cmap.dtype != np.uint8:
+            raise ValueError('a LUT must be a (256, 3) uint8 array')
+        return cmap
+    if not isinstance(cmap, str):
+        return lut_from_points(cmap)
+
+    if cmap not in _luts:
+        if cmap == 'gray':
+            table = np.repeat(np.arange(256, dtype=np.uint8)[:, None], 3, axis=1)
+        elif cmap == 'gray_r':
+            table = lut('gray')[::-1].copy()
+        elif matplotlib is not None:
+            colormap = matplotlib.colormaps[cmap]
+            table = (255 * colormap(np.linspace(0.0, 1.0, 256))[:, :3]
+                     + 0.5).astype(np.uint8)
+        else:
+            raise ValueError('unknown colormap %r (matplotlib is needed for '
+                             'anything but gray/gray_r)' % cmap)
+        _luts[cmap] = table
+    return _luts[cmap]
+
+
+def to_image(a, cmap='gray', vmin=None, vmax=None):
+    """PIL image of the 2D array a (row 0 at the top)."""
+    levels = normalize(a, vmin, vmax)
+    if isinstance(cmap, str) and cmap == 'gray':
+        return Image.fromarray(levels, 'L')
+    return Image.fromarray(lut(cmap)[levels], 'RGB')
+
+
+def save(a, filename, cmap='gray', vmin=None, vmax=None, label=None,
+         label_color=(0, 255, 0)):
+    """Write a as an image, optionally with a text label in the corner."""
+    image = to_image(a, cmap, vmin, vmax)
+    if label is not None:
+        image = image.convert('RGB')
+        ImageDraw.Draw(image).text((0, 0), label, label_color)
+    image.save(filename)
+    return image
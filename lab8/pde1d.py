@@ -0,0 +1,196 @@
+"""
+Initial conditions and time-history storage for the 1D PDE solvers in
+08_PDE_part1.py
+
+The initializers fill a whole x grid in one vectorized call (optionally into
+an existing row via `out`), so setting up millions of points costs about as
+much as a single array operation.
+
+The explicit schemes only ever read the last one or two time levels, so the
+full (nt, nx) solution array is only needed when every level has to be
+plotted afterwards. RingHistory keeps a small rolling window of levels and can
+copy every k-th level (optionally every s-th grid point) into a preallocated
+snapshot buffer or a memory-mapped .npy file on disk.
+"""
+
+import numpy as np
+
+
+def grid(xmin, dx, nx):
+    """x coordinates xmin + i*dx for i = 0 .. nx-1."""
+    return xmin + dx*np.arange(nx)
+
+
+def _out(x, out):
+    if out is None:
+        return np.empty(np.shape(x))
+    return out
+
+
+def init_gaussian(x, width=0.25, cutoff=0.001, out=None):
+    """exp(-x**2/width), with values below `cutoff` set to exactly zero."""
+    out = _out(x, out)
+    np.square(x, out=out)
+    out *= -1.0/width
+    np.exp(out, out=out)
+    out[out < cutoff] = 0.0
+    return out
+
+
+def init_square(x, halfwidth=0.5, out=None):
+    """1 where |x| < halfwidth, 0 elsewhere."""
+    out = _out(x, out)
+    out[...] = np.abs(x) < halfwidth
+    return out
+
+
+def rng(seed=None):
+    """Seedable random generator for init_random."""
+    return np.random.default_rng(seed)
+
+
+def init_random(x, generator=None, seed=None, out=None):
+    """
+    Uniform values in [0, 1) drawn in one call.
+
+    Pass either a generator from rng() (to share one stream between several
+    initial conditions) or a seed; with neither the result is not repeatable.
+    """
+    if generator is None:
+        generator = rng(seed)
+    out = _out(x, out)
+    if isinstance(out, np.ndarray) and out.dtype == np.float64 \
+            and out.flags.c_contiguous:
+        generator.random(out=out)
+    else:
+        out[...] = generator.random(np.shape(x))
+    return out
+
+
+def init_function(func, x, out=None):
+    """
+    Apply a user function to the whole grid.
+
+    func should be a ufunc or any function written with array operations;
+    plain scalar functions are accepted too but go through np.vectorize,
+    which loops in Python.
+    """
+    out = _out(x, out)
+    try:
+        out[...] = func(x)
+    except (TypeError, ValueError):
+        out[...] = np.vectorize(func, otypes=[float])(x)
+    return out
+
+
+def full_history(nt, nx):
+    """Solution array that keeps every time level (the original behaviour)."""
+    return np.zeros((nt, nx))
+
+
+def snapshot_rows(nt, every):
+    """Snapshots of every k-th level among time levels 0 .. nt-1."""
+    return (nt - 1) // every + 1
+
+
+class RingHistory(object):
+    """
+    Rolling window of `depth` time levels indexed like a (nt, nx) array.
+
+    u[t, i] and u[t, a:b] map time level t onto row t % depth, so the step
+    functions can be used unchanged. Only levels t-depth+1 .. t are valid.
+
+    every    -- copy every k-th completed time level into the snapshots
+    xstride  -- keep every s-th grid point in each snapshot
+    out      -- None (no snapshots), a preallocated array of shape
+                (n_snapshots, ceil(nx/xstride)), or a path to a .npy file
+                that is created as a memory map
+    nt       -- number of time levels, needed to size `out` when it is a path
+                (see snapshot_rows)
+    """
+
+    def __init__(self, nx, depth=3, every=0, xstride=1, out=None, nt=None):
+        self.nx = nx
+        self.depth = depth
+        self.data = np.zeros((depth, nx))
+        self.latest = -1
+
+        self.every = every
+        self.xstride = xstride
+        self.snapshots = None
+        self.count = 0
+
+        if every > 0 and out is not None:
+            width = len(range(0, nx, xstride))
+            if isinstance(out, str):
+                if nt is None:
+                    raise ValueError('nt is required to size a snapshot file')
+                shape = (snapshot_rows(nt, every), width)
+                out = np.lib.format.open_memmap(out, mode='w+',
+                                                dtype=self.data.dtype,
+                                                shape=shape)
+            elif out.ndim != 2 or out.shape[1] != width:
+                raise ValueError('snapshot buffer must have %d columns' % width)
+            self.snapshots = out
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def _row(self, t):
+        if t > self.latest:
+            self._advance(t)
+        elif t <= self.latest - self.depth:
+            raise IndexError('time level %d is no longer stored '
+                             '(oldest is %d)' % (t, self.latest - self.depth + 1))
+        return t % self.depth
+
+    def _advance(self, t):
+        # a newer time level is being touched, so self.latest is final
+        if self.latest >= 0:
+            self._capture(self.latest)
+        for new in range(max(self.latest + 1, t - self.depth + 1), t + 1):
+            # recycled rows still hold an old level; clear them so stale
+            # values never leak into boundary points that are not rewritten
+            if new >= self.depth:
+                self.data[new % self.depth] = 0.0
+        self.latest = t
+
+    def _capture(self, t):
+        if self.snapshots is None or t % self.every != 0:
+            return
+        k = t // self.every
+        if k < len(self.snapshots):
+            self.snapshots[k] = self.data[t % self.depth, ::self.xstride]
+            self.count = max(self.count, k + 1)
+
+    def _split(self, key):
+        if isinstance(key, tuple):
+            return key[0], key[1:]
+        return key, ()
+
+    def __getitem__(self, key):
+        t, rest = self._split(key)
+        return self.data[(self._row(t),) + rest]
+
+    def __setitem__(self, key, value):
+        t, rest = self._split(key)
+        self.data[(self._row(t),) + rest] = value
+
+    def flush(self):
+        """
+        Capture the last time level (call once the run has finished) and
+        return the filled snapshot rows; rows of levels the run never
+        reached are left out.
+        """
+        if self.latest >= 0:
+            self._capture(self.latest)
+        if self.snapshots is None:
+            return None
+        if isinstance(self.snapshots, np.memmap):
+            self.snapshots.flush()
+        return self.snapshots[:self.count]
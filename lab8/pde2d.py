@@ -0,0 +1,234 @@
+"""
+Allocation-free explicit stencil engines for the 2D PDE scripts
+
+The scripts step their grids with expressions like `un = u0.copy()` and
+`L = u0[...] + u0[...] - 4*u0[...] ...`, which allocate several full-size
+temporaries on every step. The engines here preallocate every buffer once,
+evaluate the stencil with `out=` ufuncs into scratch storage and swap buffer
+references instead of copying, so the steady-state loop allocates nothing.
+
+Run `python pde2d.py [n ...]` to compare them against the original
+formulation (cells updated per second).
+"""
+
+import sys
+import time
+
+import numpy as np
+
+
+def _set_edges(a, value):
+    a[0, :] = value
+    a[-1, :] = value
+    a[:, 0] = value
+    a[:, -1] = value
+
+
+def _interior(a):
+    """Views used by the 5-point stencil: centre, up, down, left, right."""
+    return (a[1:-1, 1:-1],
+            a[0:-2, 1:-1], a[2:, 1:-1],
+            a[1:-1, 0:-2], a[1:-1, 2:])
+
+
+class Heat2D(object):
+    """
+    Forward-Euler heat equation u_t = c*(u_xx + u_yy) on a square grid.
+
+    u        -- initial condition (copied into the engine's first buffer)
+    r        -- c*dt/dx**2
+    boundary -- value held on the outer edge (Dirichlet), written into
+                every computed level; the initial condition is kept as is
+    sources  -- list of (index, value) pairs written after every step,
+                e.g. the heater ((slice(40, -40), slice(50, 80)), 1.0)
+
+    The current solution is `self.u`; it is a different array after every
+    step, so always read it through the engine.
+    """
+
+    def __init__(self, u, r, boundary=0.0, sources=()):
+        self.r = r
+        self.boundary = boundary
+        self.sources = list(sources)
+
+        self.u = np.array(u, dtype=np.float64)
+        self.un = np.empty_like(self.u)
+
+        self.scratch = np.empty_like(self.u[1:-1, 1:-1])
+        self._views = {id(self.u): _interior(self.u),
+                       id(self.un): _interior(self.un)}
+
+    def _apply_sources(self, a):
+        for index, value in self.sources:
+            a[index] = value
+
+    def step(self):
+        u, un, s = self.u, self.un, self.scratch
+        c, up, down, left, right = self._views[id(u)]
+        out = self._views[id(un)][0]
+
+        # un = u + r*(up + down + left + right - 4*u)
+        #    = (1 - 4r)*u + r*(up + down + left + right)
+        np.add(up, down, out=s)
+        s += left
+        s += right
+        s *= self.r
+        np.multiply(c, 1.0 - 4.0*self.r, out=out)
+        out += s
+
+        _set_edges(un, self.boundary)
+        self._apply_sources(un)
+        self.u, self.un = un, u
+        return un
+
+    def run(self, n_steps):
+        for i in range(n_steps):
+            self.step()
+        return self.u
+
+
+class Wave2D(object):
+    """
+    Leapfrog wave equation u_tt = c**2*(u_xx + u_yy) on a square grid.
+
+    u, u_prev -- the two starting time levels (u_prev defaults to u, i.e. a
+                 field at rest)
+    courant   -- c*dt/dx; its square is precomputed once
+    boundary  -- value held on the outer edge (Dirichlet), written into
+                 every computed level; the starting levels are kept as is
+    sources   -- list of (index, value) pairs written after every step,
+                 e.g. an obstacle ((slice(40, -40), slice(50, 80)), 0.0)
+
+    The level t-2 is dead as soon as it has been read, so the new level is
+    written into its buffer and the two references are rotated: two grids
+    and one interior scratch array in total, no copies per step. The newest
+    level is `self.u` and the one before it `self.prev`.
+    """
+
+    def __init__(self, u, courant, u_prev=None, boundary=0.0, sources=()):
+        self.C2 = courant**2
+        self.boundary = boundary
+        self.sources = list(sources)
+
+        self.u = np.array(u, dtype=np.float64)
+        if u_prev is None:
+            self.prev = self.u.copy()
+        else:
+            self.prev = np.array(u_prev, dtype=np.float64)
+
+        self.scratch = np.empty_like(self.u[1:-1, 1:-1])
+        self._views = {id(self.u): _interior(self.u),
+                       id(self.prev): _interior(self.prev)}
+
+    def step(self):
+        u, prev, s = self.u, self.prev, self.scratch
+        c, up, down, left, right = self._views[id(u)]
+        out = self._views[id(prev)][0]
+
+        # un = 2*u - prev + C2*(up + down + left + right - 4*u)
+        #    = C2*(up + down + left + right) - prev + (2 - 4*C2)*u
+        # written over prev, which is not needed afterwards
+        np.add(up, down, out=s)
+        s += left
+        s += right
+        s *= self.C2
+        np.subtract(s, out, out=out)
+        np.multiply(c, 2.0 - 4.0*self.C2, out=s)
+        out += s
+
+        _set_edges(prev, self.boundary)
+        for index, value in self.sources:
+            prev[index] = value
+        self.u, self.prev = prev, u
+        return prev
+
+    def run(self, n_steps):
+        for i in range(n_steps):
+            self.step()
+        return self.u
+
+
+def heat_step_reference(u0, r, sources=()):
+    """One step of the original copy-based formulation from 09_heat2d.py."""
+    nx = u0.shape[0]
+    un = u0.copy()
+    L = (
+                            u0[1:nx-1,0:nx-2] +
+        u0[2:nx,1:nx-1] - 4*u0[1:nx-1,1:nx-1] + u0[0:nx-2,1:nx-1] +
+                            u0[1:nx-1,2:nx]
+        )
+    un[1:nx-1,1:nx-1] = u0[1:nx-1,1:nx-1] + r * L
+    un[0,:] = 0
+    un[nx-1,:] = 0
+    un[:,0] = 0
+    un[:,nx-1] = 0
+    for index, value in sources:
+        un[index] = value
+    u0[:] = un
+    return u0
+
+
+def wave_step_reference(u0, u1, courant):
+    """One step of the original copy-based formulation from 09_wave2d.py."""
+    nx = u0.shape[0]
+    un = u0.copy()
+    L = (
+                          u0[1:nx-1,0:nx-2] +
+      u0[2:nx,1:nx-1] - 4*u0[1:nx-1,1:nx-1] + u0[0:nx-2,1:nx-1] +
+                          u0[1:nx-1,2:nx]
+        )
+    un[1:nx-1,1:nx-1] = 2*u0[1:nx-1,1:nx-1] - u1[1:nx-1,1:nx-1] + courant**2 * L
+    un[0,:] = 0
+    un[nx-1,:] = 0
+    un[:,0] = 0
+    un[:,nx-1] = 0
+    u1[:] = u0
+    u0[:] = un
+    return u0
+
+
+def _timed(step, n_steps):
+    step()  # warm up
+    start = time.perf_counter()
+    for i in range(n_steps):
+        step()
+    return time.perf_counter() - start
+
+
+def benchmark_heat(n, n_steps=20, r=0.2):
+    """Return (reference, engine) cells updated per second on an n x n grid."""
+    u = np.random.default_rng(0).random((n, n))
+    cells = (n-2)**2 * n_steps
+
+    ref = u.copy()
+    t_ref = _timed(lambda: heat_step_reference(ref, r), n_steps)
+
+    engine = Heat2D(u, r)
+    t_new = _timed(engine.step, n_steps)
+
+    return cells / t_ref, cells / t_new
+
+
+def benchmark_wave(n, n_steps=20, courant=0.5):
+    """Return (reference, engine) cells updated per second on an n x n grid."""
+    u = np.random.default_rng(0).random((n, n))
+    cells = (n-2)**2 * n_steps
+
+    ref0, ref1 = u.copy(), u.copy()
+    t_ref = _timed(lambda: wave_step_reference(ref0, ref1, courant), n_steps)
+
+    engine = Wave2D(u, courant)
+    t_new = _timed(engine.step, n_steps)
+
+    return cells / t_ref, cells / t_new
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [512, 2048, 4096]
+    for name, benchmark in (('heat', benchmark_heat), ('wave', benchmark_wave)):
+        print( '%-4s %6s %16s %16s %8s'
+               % (name, 'n', 'reference', 'engine', 'speedup') )
+        for n in sizes:
+            ref, new = benchmark(n)
+            print( '%4s %6d %12.3g c/s %12.3g c/s %7.2fx'
+                   % ('', n, ref, new, new/ref) )
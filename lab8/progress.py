@@ -0,0 +1,130 @@
+"""
+Rate-limited progress reporting for long simulation loops
+
+Printing from every iteration floods the terminal (10,000 lines for a
+10,000-step run) and costs more than the step itself on small grids.
+Progress.update(i) is a single integer comparison on the fast path; the
+clock is only read once the step count reaches the next checkpoint, which
+is re-estimated from the measured rate so that reports come out roughly
+every `interval` seconds (or every `percent` percent, if given).
+
+Each report shows percent done, steps/s, cells/s (when the grid size is
+known) and the ETA, as text on a stream or as JSON lines in a file.
+"""
+
+import json
+import sys
+import time
+
+
+class Progress(object):
+    """
+    total    -- number of steps in the run
+    cells    -- grid cells updated per step (enables cells/s)
+    interval -- seconds between reports (time-based mode, the default)
+    percent  -- report every `percent` percent instead of by time
+    stream   -- where text reports go (default: sys.stdout at the time of
+                each report); False disables them
+    jsonl    -- path of a JSON lines file to append every report to
+    label    -- prefix for the text reports
+    """
+
+    def __init__(self, total, cells=None, interval=1.0, percent=None,
+                 stream=None, jsonl=None, label=''):
+        self.total = total
+        self.cells = cells
+        self.interval = interval
+        self.percent = percent
+        self.stream = stream
+        self.label = label
+
+        self._jsonl = open(jsonl, 'a') if jsonl else None
+        self._start = time.perf_counter()
+        self._last_time = self._start
+        self._last_step = 0
+        self.done = 0
+
+        if percent:
+            self._stride = max(1, int(total * percent / 100.0))
+        else:
+            self._stride = 1
+        self._next = self._stride
+
+    def update(self, step):
+        """Record that `step` steps are done; cheap unless a report is due."""
+        if step >= self._next:
+            self._checkpoint(step)
+
+    def _checkpoint(self, step):
+        now = time.perf_counter()
+        if self.percent:
+            self._next = step + self._stride
+            self._report(step, now)
+            return
+
+        # rate since the last report, used to aim the next check at about
+        # one interval after that report (never less than one step ahead)
+        dt = now - self._last_time
+        ds = step - self._last_step
+        rate = ds / dt if dt > 0 else 0.0
+
+        if dt >= self.interval or step >= self.total:
+            self._report(step, now)
+            remaining = self.interval
+        else:
+            remaining = self.interval - dt
+
+        self._stride = max(1, int(rate * remaining))
+        self._next = min(step + self._stride, max(self.total, step + 1))
+
+    def _report(self, step, now):
+        elapsed = now - self._start
+        rate = step / elapsed if elapsed > 0 else 0.0
+        record = {
+            'step': step,
+            'total': self.total,
+            'percent': 100.0 * step / self.total if self.total else 100.0,
+            'elapsed': elapsed,
+            'steps_per_s': rate,
+            'cells_per_s': rate * self.cells if self.cells else None,
+            'eta': (self.total - step) / rate if rate > 0 else None,
+        }
+        self.done = step
+        self._last_time = now
+        self._last_step = step
+
+        if self.stream is not False:
+            # looked up per report so redirects of sys.stdout are followed
+            stream = sys.stdout if self.stream is None else self.stream
+            stream.write(self.format(record) + '\n')
+            stream.flush()
+        if self._jsonl is not None:
+            self._jsonl.write(json.dumps(record) + '\n')
+            self._jsonl.flush()
+
+    def format(self, record):
+        line = '%s%5.1f%%  %d/%d steps  %.1f steps/s' % (
+            self.label + ' ' if self.label else '',
+            record['percent'], record['step'], record['total'],
+            record['steps_per_s'])
+        if record['cells_per_s'] is not None:
+            line += '  %.3g cells/s' % record['cells_per_s']
+        if record['eta'] is not None:
+            line += '  ETA %s' % _clock(record['eta'])
+        return line
+
+    def close(self, step=None):
+        """Final report (if the last step has not been reported yet)."""
+        if step is None:
+            step = self.total
+        if step != self.done:
+            self._report(step, time.perf_counter())
+        if self._jsonl is not None:
+            self._jsonl.close()
+            self._jsonl = None
+
+
+def _clock(seconds):
+    m, s = divmod(int(seconds + 0.5), 60)
+    h, m = divmod(m, 60)
+    return '%d:%02d:%02d' % (h, m, s)
@@ -0,0 +1,150 @@
+"""
+Gray-Scott parameter sweeps across a process pool
+
+lab7/scripts/08_PDE_part2.py lists the (Du, Dv, F, k) presets but runs only
+one of them, and switching means editing the file. This runs every preset,
+or a grid of F/k values at fixed Du/Dv, one simulation per worker process,
+and writes the final fields (<name>.npz with U and V) and a labelled PNG of
+V for each run.
+
+Every run starts from the initial condition of 08_PDE_part2.py, which the
+presets were chosen for: the perturbed square with 0.05*random noise added
+to u and v (not the +-0.15 noise of 09_grayscott.py). The square is 40 of
+256 points wide there and keeps that fraction of the grid at any size.
+
+    python sweep.py                                  # all presets
+    python sweep.py --presets Coral "Worms 1"
+    python sweep.py --F 0.01:0.07:13 --k 0.04:0.07:13 --Du 0.16 --Dv 0.08
+    python sweep.py --F 0.035 --k 0.065 --Du 0.1:0.2:3 --Dv 0.08
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import grayscott
+import imageexport
+
+
+def preset_jobs(names=None):
+    """(name, (Du, Dv, F, k)) for the given preset names (default: all)."""
+    if not names:
+        names = list(grayscott.PRESETS)
+    return [(name, grayscott.PRESETS[name]) for name in names]
+
+
+def grid_jobs(Du_values, Dv_values, F_values, k_values):
+    """(name, (Du, Dv, F, k)) for every combination of the values."""
+    return [('Du%.4f_Dv%.4f_F%.4f_k%.4f' % params, params)
+            for params in itertools.product(Du_values, Dv_values,
+                                            F_values, k_values)]
+
+
+def _linspace(spec):
+    """'start:stop:num' -> np.linspace(start, stop, num); 'x' -> [x]."""
+    parts = [float(p) for p in spec.split(':')]
+    if len(parts) == 1:
+        return parts
+    start, stop, num = parts
+    return list(np.linspace(start, stop, int(num)))
+
+
+def seed_radius(n):
+    """Half width of the seed square: 20 on the 256 grid of 08_PDE_part2.py."""
+    return max(1, int(round(20 * n / 256.0)))
+
+
+def simulate(name, params, n, steps, out_dir, seed, backend='numpy',
+             cmap='gray', r=None):
+    """
+    Run one simulation and write its fields and image; runs in a worker.
+
+    r -- half width of the seed square (default: seed_radius(n))
+    """
+    if grayscott.numba is not None:
+        # one process per core already, don't let every kernel spawn threads
+        grayscott.numba.set_num_threads(1)
+
+    start = time.perf_counter()
+    model = grayscott.GrayScott(n, *params, backend=backend)
+    model.seed(r=r or seed_radius(n), noise=0.05, signed=False,
+               rng=np.random.default_rng(seed))
+    model.run(steps)
+    elapsed = time.perf_counter() - start
+
+    base = os.path.join(out_dir, name.replace(' ', '_'))
+    np.savez(base + '.npz', U=model.u, V=model.v, params=np.array(params))
+    imageexport.save(model.v, base + '.png', cmap=cmap,
+                     label="Du=%s Dv=%s F=%s k=%s" % params)
+    return name, elapsed
+
+
+def sweep(jobs, n=256, steps=10000, out_dir='sweep', workers=None,
+          seed=0, backend='numpy', cmap='gray'):
+    """Run all jobs in parallel; returns {name: seconds}."""
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+
+    times = {}
+    # fresh interpreters: a forked worker inherits the numba thread pool of
+    # a parent that already ran a kernel, and can deadlock in it
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [pool.submit(simulate, name, params, n, steps, out_dir,
+                               seed + i, backend, cmap)
+                   for i, (name, params) in enumerate(jobs)]
+        for future in as_completed(futures):
+            name, elapsed = future.result()
+            times[name] = elapsed
+            print( '%-20s %8.2f s  (%d/%d)'
+                   % (name, elapsed, len(times), len(jobs)) )
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--presets', nargs='*', metavar='NAME',
+                        help='preset names (default: all of them)')
+    parser.add_argument('--F', help="F values as 'start:stop:num' (grid mode)")
+    parser.add_argument('--k', help="k values as 'start:stop:num' (grid mode)")
+    parser.add_argument('--Du', default='0.16',
+                        help="Du value or 'start:stop:num' (grid mode)")
+    parser.add_argument('--Dv', default='0.08',
+                        help="Dv value or 'start:stop:num' (grid mode)")
+    parser.add_argument('-n', type=int, default=256, help='grid size')
+    parser.add_argument('--steps', type=int, default=10000)
+    parser.add_argument('--out', default='sweep', help='output directory')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: one per core)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backend', default='numpy',
+                        choices=['numpy', 'numba', 'auto'])
+    parser.add_argument('--cmap', default='gray',
+                        help='colormap for the PNGs (gray or a matplotlib name)')
+    args = parser.parse_args(argv)
+
+    if args.F or args.k:
+        if not (args.F and args.k):
+            parser.error('grid mode needs both --F and --k')
+        jobs = grid_jobs(_linspace(args.Du), _linspace(args.Dv),
+                         _linspace(args.F), _linspace(args.k))
+    else:
+        jobs = preset_jobs(args.presets)
+
+    start = time.perf_counter()
+    times = sweep(jobs, n=args.n, steps=args.steps, out_dir=args.out,
+                  workers=args.workers, seed=args.seed, backend=args.backend,
+                  cmap=args.cmap)
+    wall = time.perf_counter() - start
+    print( '%d runs in %.2f s wall, %.2f s of simulation (%.1fx parallel)'
+           % (len(times), wall, sum(times.values()),
+              sum(times.values()) / wall) )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the engines live next to the scripts in lab8
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
@@ -0,0 +1,40 @@
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib import animation
+
+import batch
+
+
+def test_run_steps_and_observer():
+    seen = []
+    runner = batch.Runner(seen.append)
+    calls = []
+    runner.run(10, every=4, callback=calls.append)
+    assert seen == list(range(10))
+    assert calls == [3, 7]
+    assert runner.t == 10 and runner.steps == 10
+
+
+def test_animation_takes_the_headless_number_of_steps(tmp_path):
+    steps = []
+    fig = plt.figure()
+    line, = plt.plot([], [])
+    runner = batch.Runner(steps.append, draw=lambda t: (line,), steps_per_frame=3)
+    anim = animation.FuncAnimation(fig, runner.frame, 5, repeat=False, blit=True,
+                                   init_func=runner.init)
+    anim.save(str(tmp_path / 'anim.gif'), writer=animation.PillowWriter(fps=5))
+    plt.close(fig)
+    assert steps == list(range(15))
+
+
+def test_blitting_without_a_draw_callback(tmp_path):
+    steps = []
+    fig = plt.figure()
+    runner = batch.Runner(steps.append)
+    assert runner.init() == ()
+    anim = animation.FuncAnimation(fig, runner.frame, 4, repeat=False, blit=True,
+                                   init_func=runner.init)
+    anim.save(str(tmp_path / 'anim.gif'), writer=animation.PillowWriter(fps=5))
+    plt.close(fig)
+    assert steps == list(range(4))
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+import grayscott
+
+
+BACKENDS = ['numpy'] + (['numba'] if grayscott.numba is not None else [])
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_engine_matches_reference(backend):
+    n = 40
+    params = grayscott.PRESETS['Bacteria 1']
+    engine = grayscott.GrayScott(n, *params, backend=backend)
+    engine.seed(r=8, rng=np.random.default_rng(1))
+
+    Z, step = grayscott.reference(n, *params)
+    Z['U'][...] = engine.U
+    Z['V'][...] = engine.V
+    for i in range(30):
+        step()
+    engine.run(30)
+    np.testing.assert_allclose(engine.u, Z['U'][1:-1, 1:-1], rtol=0, atol=1e-12)
+    np.testing.assert_allclose(engine.v, Z['V'][1:-1, 1:-1], rtol=0, atol=1e-12)
+
+
+def test_seed_must_fit_the_grid():
+    engine = grayscott.GrayScott(32, *grayscott.PRESETS['Coral'], backend='numpy')
+    with pytest.raises(ValueError):
+        engine.seed(r=20)
@@ -0,0 +1,70 @@
+import matplotlib
+import numpy as np
+import pytest
+from PIL import Image
+
+import imageexport
+
+
+def field(shape=(37, 53)):
+    y, x = np.mgrid[0:shape[0], 0:shape[1]]
+    return np.sin(x / 5.0) * np.cos(y / 7.0) + 0.01 * np.random.default_rng(0).random(shape)
+
+
+def paint_per_pixel(V):
+    # the loop of lab7/scripts/08_PDE_part2.py
+    imgy, imgx = V.shape
+    image = Image.new("RGB", (imgx, imgy))
+    pixels = image.load()
+    vMin = V.min()
+    vMax = V.max()
+    for iy in range(imgy):
+        for ix in range(imgx):
+            w = V[iy, ix]
+            c = int(255 * (w - vMin) / (vMax - vMin))
+            pixels[ix, iy] = (c, c, c)
+    return np.asarray(image)
+
+
+def test_gray_matches_the_pixel_loop():
+    V = field((37, 256))
+    # a row of values that land exactly on level boundaries
+    V[0, :] = np.arange(256) * 0.3
+    V[1:] = np.clip(V[1:], 0, V[0].max())
+    expected = paint_per_pixel(V)
+    image = imageexport.to_image(V)
+    assert image.mode == 'L' and image.size == (V.shape[1], V.shape[0])
+    np.testing.assert_array_equal(np.asarray(image), expected[..., 0])
+    np.testing.assert_array_equal(np.asarray(imageexport.to_image(V, 'gray_r')),
+                                  255 - expected)
+
+
+def test_colormaps():
+    V = field()
+    levels = imageexport.normalize(V)
+    colormap = matplotlib.colormaps['viridis']
+    expected = (255 * colormap(levels / 255.0)[..., :3] + 0.5).astype(np.uint8)
+    np.testing.assert_array_equal(np.asarray(imageexport.to_image(V, 'viridis')), expected)
+
+    points = [(0.0, (0, 0, 1)), (1.0, (1, 0, 0))]
+    table = imageexport.lut(points)
+    assert tuple(table[0]) == (0, 0, 255) and tuple(table[255]) == (255, 0, 0)
+    np.testing.assert_array_equal(np.asarray(imageexport.to_image(V, table)), table[levels])
+    with pytest.raises(ValueError):
+        imageexport.lut(np.zeros((10, 3), np.uint8))
+
+
+def test_normalize_range_and_constant_field():
+    np.testing.assert_array_equal(imageexport.normalize([0.0, 0.5, 1.0, 2.0], 0.0, 1.0),
+                                  [0, 127, 255, 255])
+    assert not imageexport.normalize(np.full((4, 4), 3.0)).any()
+
+
+def test_save_with_label(tmp_path):
+    path = str(tmp_path / 'field.png')
+    imageexport.save(field(), path, label='Du=0.16')
+    image = Image.open(path)
+    assert image.mode == 'RGB'
+    pixels = np.asarray(image)
+    # the green label is drawn into the top left corner
+    assert (pixels[:12, :40, 1] > pixels[:12, :40, 0]).any()
@@ -0,0 +1,100 @@
+import numpy as np
+
+import pde1d
+
+
+def wave_steps(u, nt, nx, courant=0.5):
+    # the leapfrog step of 08_PDE_part1.py with a Gaussian start
+    x = pde1d.grid(-3.0, 0.1, nx)
+    for t in range(nt):
+        if t < 2:
+            u[t, :] = pde1d.init_gaussian(x)
+        else:
+            u[t, 1:nx-1] = (2*u[t-1, 1:nx-1] - u[t-2, 1:nx-1]
+                            + courant**2 * (u[t-1, 0:nx-2] - 2*u[t-1, 1:nx-1]
+                                            + u[t-1, 2:nx]))
+            u[t, 0] = 0.0
+            u[t, nx-1] = 0.0
+
+
+def test_ring_history_matches_full_history():
+    nt, nx = 200, 61
+    full = pde1d.full_history(nt, nx)
+    wave_steps(full, nt, nx)
+
+    snapshots = np.zeros(((nt - 1) // 7 + 1, len(range(0, nx, 3))))
+    ring = pde1d.RingHistory(nx, depth=3, every=7, xstride=3, out=snapshots)
+    wave_steps(ring, nt, nx)
+    ring.flush()
+
+    for t in range(nt - 3, nt):
+        np.testing.assert_array_equal(ring[t], full[t])
+    np.testing.assert_array_equal(snapshots, full[::7, ::3])
+    assert ring.nbytes == 3 * nx * 8
+
+
+def test_ring_history_snapshot_file(tmp_path):
+    nt, nx = 50, 21
+    full = pde1d.full_history(nt, nx)
+    wave_steps(full, nt, nx)
+
+    path = str(tmp_path / 'snapshots.npy')
+    ring = pde1d.RingHistory(nx, every=5, out=path, nt=nt)
+    wave_steps(ring, nt, nx)
+    ring.flush()
+    np.testing.assert_array_equal(np.load(path), full[::5])
+
+
+def test_ring_history_forgets_old_levels():
+    ring = pde1d.RingHistory(4, depth=3)
+    for t in range(5):
+        ring[t, :] = t
+    try:
+        ring[1]
+    except IndexError:
+        pass
+    else:
+        raise AssertionError('level 1 should no longer be stored')
+
+
+def test_flush_returns_only_recorded_levels():
+    # sized for nt levels, but the run stops one level short, as the
+    # runner of 08_PDE_part1.py does: the unreached last row is left out
+    nt, nx, every = 41, 11, 5
+    full = pde1d.full_history(nt, nx)
+    wave_steps(full, nt - 1, nx)
+    out = np.zeros((pde1d.snapshot_rows(nt, every), nx))
+    ring = pde1d.RingHistory(nx, every=every, out=out)
+    wave_steps(ring, nt - 1, nx)
+    snapshots = ring.flush()
+    assert len(snapshots) == len(out) - 1 == pde1d.snapshot_rows(nt - 1, every)
+    np.testing.assert_array_equal(snapshots, full[:nt - 1:every])
+    assert pde1d.RingHistory(nx).flush() is None
+
+
+def test_initializers_match_the_per_point_loops():
+    # the scalar initializers 08_PDE_part1.py used to call point by point
+    def gaussian(x):
+        val = np.exp(-(x**2)/0.25)
+        return 0.0 if abs(val) < .001 else val
+
+    def square(x):
+        return 1.0 if abs(x) < 0.5 else 0.0
+
+    x = pde1d.grid(-3.0, 0.1, 61)
+    np.testing.assert_allclose(x, [-3.0 + i*0.1 for i in range(61)])
+    np.testing.assert_array_equal(pde1d.init_gaussian(x), [gaussian(v) for v in x])
+    np.testing.assert_array_equal(pde1d.init_square(x), [square(v) for v in x])
+    np.testing.assert_array_equal(pde1d.init_function(square, x), [square(v) for v in x])
+    np.testing.assert_array_equal(pde1d.init_function(np.cos, x), np.cos(x))
+
+    row = np.zeros((2, 61))
+    pde1d.init_gaussian(x, out=row[1])
+    np.testing.assert_array_equal(row[1], pde1d.init_gaussian(x))
+
+
+def test_random_initializer_is_seedable():
+    x = pde1d.grid(0.0, 1.0, 100)
+    a = pde1d.init_random(x, seed=3)
+    np.testing.assert_array_equal(a, pde1d.init_random(x, generator=pde1d.rng(3)))
+    assert a.min() >= 0 and a.max() < 1 and len(np.unique(a)) == 100
@@ -0,0 +1,52 @@
+import numpy as np
+
+import pde2d
+
+
+def gaussian(n):
+    # the start of 09_wave2d.py: clearly nonzero on the lower edge
+    x = np.linspace(-1, 1, n)
+    X, Y = np.meshgrid(x, x)
+    return np.exp(-np.sqrt((X - 0.25)**2 + (Y + 0.7)**2) / 0.25)
+
+
+def test_heat_matches_reference():
+    n = 48
+    u = np.random.default_rng(0).random((n, n))
+    sources = [((slice(10, -10), slice(20, 30)), 1.0)]
+    engine = pde2d.Heat2D(u, 0.2, sources=sources)
+    reference = u.copy()
+    for i in range(25):
+        engine.step()
+        pde2d.heat_step_reference(reference, 0.2, sources)
+    np.testing.assert_allclose(engine.u, reference, rtol=0, atol=1e-12)
+
+
+def test_heat_boundary_and_buffers():
+    u = np.random.default_rng(1).random((32, 32))
+    heat = pde2d.Heat2D(u, 0.2, boundary=0.0)
+    np.testing.assert_array_equal(heat.u, u)
+    buffers = set(id(b) for b in (heat.u, heat.un))
+    for i in range(3):
+        heat.step()
+        assert set(id(b) for b in (heat.u, heat.un)) == buffers
+    assert not heat.u[0].any() and not heat.u[:, -1].any()
+
+
+def test_wave_matches_reference():
+    n = 48
+    u = gaussian(n)
+    engine = pde2d.Wave2D(u, 0.5, u_prev=u.copy())
+    u0, u1 = u.copy(), u.copy()
+    for i in range(40):
+        engine.step()
+        pde2d.wave_step_reference(u0, u1, 0.5)
+    np.testing.assert_allclose(engine.u, u0, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(engine.prev, u1, rtol=0, atol=1e-12)
+
+
+def test_wave_keeps_the_initial_levels():
+    u = gaussian(32)
+    wave = pde2d.Wave2D(u, 0.5)
+    np.testing.assert_array_equal(wave.u, u)
+    np.testing.assert_array_equal(wave.prev, u)
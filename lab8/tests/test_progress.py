@@ -0,0 +1,60 @@
+import io
+import json
+
+import progress
+
+
+class Clock(object):
+    # stands in for time.perf_counter: every read advances `tick` seconds
+    def __init__(self, tick):
+        self.now = 0.0
+        self.tick = tick
+
+    def __call__(self):
+        self.now += self.tick
+        return self.now
+
+
+def test_reports_go_to_the_current_stdout(capsys):
+    report = progress.Progress(10, percent=50)
+    for i in range(1, 11):
+        report.update(i)
+    report.close()
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2
+    assert ' 50.0%  5/10 steps' in lines[0] and '100.0%  10/10 steps' in lines[1]
+
+
+def test_stream_false_is_silent(capsys, tmp_path):
+    path = str(tmp_path / 'progress.jsonl')
+    report = progress.Progress(4, cells=100, percent=25, stream=False, jsonl=path)
+    for i in range(1, 5):
+        report.update(i)
+    report.close()
+    assert capsys.readouterr().out == ''
+    records = [json.loads(line) for line in open(path)]
+    assert [r['step'] for r in records] == [1, 2, 3, 4]
+    assert records[-1]['percent'] == 100.0
+    assert records[0]['cells_per_s'] == 100 * records[0]['steps_per_s']
+
+
+def test_time_mode_reads_the_clock_rarely(monkeypatch):
+    # 1 ms per clock read and a 10 ms interval: the checks are aimed at the
+    # next interval from the measured rate, not made on every step
+    clock = Clock(0.001)
+    monkeypatch.setattr(progress.time, 'perf_counter', clock)
+    stream = io.StringIO()
+    report = progress.Progress(100000, interval=0.01, stream=stream)
+    reads = clock.now
+    for i in range(1, 100001):
+        report.update(i)
+    report.close()
+    assert (clock.now - reads) / clock.tick < 100
+    lines = stream.getvalue().splitlines()
+    assert 1 < len(lines) < 50
+    assert lines[-1].startswith('100.0%  100000/100000 steps')
+
+
+def test_clock_format():
+    assert progress._clock(3725.4) == '1:02:05'
+    assert progress._clock(59.6) == '0:01:00'
@@ -0,0 +1,50 @@
+import numpy as np
+
+import grayscott
+import sweep
+
+
+def test_one_sided_seed():
+    engine = grayscott.GrayScott(32, *grayscott.PRESETS['Coral'], backend='numpy')
+    engine.seed(r=4, noise=0.05, signed=False, rng=np.random.default_rng(0))
+    assert engine.u.min() >= 0.5 and engine.u.max() < 1.05
+    assert engine.v.min() >= 0.0 and engine.v.max() < 0.30
+
+
+def test_run_is_the_seeded_engine(tmp_path):
+    params = grayscott.PRESETS['Coral']
+    sweep.simulate('Coral', params, 64, 20, str(tmp_path), seed=3)
+    fields = np.load(str(tmp_path / 'Coral.npz'))
+
+    engine = grayscott.GrayScott(64, *params, backend='numpy')
+    engine.seed(r=sweep.seed_radius(64), noise=0.05, signed=False,
+                rng=np.random.default_rng(3))
+    engine.run(20)
+    np.testing.assert_allclose(fields['V'], engine.v, rtol=0, atol=1e-12)
+    assert (tmp_path / 'Coral.png').exists()
+
+
+def test_seed_square_scales_with_the_grid():
+    assert sweep.seed_radius(256) == 20
+    for n in (8, 24, 39, 64):
+        r = sweep.seed_radius(n)
+        assert 0 < r <= n // 2
+        assert abs(2.0 * r / n - 40 / 256.0) < 1.0 / n + 1e-12 or r == 1
+
+
+def test_grid_names_hold_every_parameter():
+    jobs = sweep.grid_jobs([0.1, 0.2], [0.08], [0.03, 0.04], [0.06])
+    names = [name for name, params in jobs]
+    assert len(set(names)) == len(jobs) == 4
+    assert names[0] == 'Du0.1000_Dv0.0800_F0.0300_k0.0600'
+    assert jobs[-1][1] == (0.2, 0.08, 0.04, 0.06)
+
+
+def test_small_grid_sweep(tmp_path):
+    # the process pool end to end on grids too small for the old r=20 seed
+    jobs = sweep.grid_jobs([0.16], [0.08], [0.035], [0.060, 0.065])
+    times = sweep.sweep(jobs, n=24, steps=5, out_dir=str(tmp_path), workers=1)
+    assert sorted(times) == sorted(name for name, params in jobs)
+    for name, params in jobs:
+        fields = np.load(str(tmp_path / (name + '.npz')))
+        assert fields['V'].shape == (24, 24) and np.isfinite(fields['V']).all()